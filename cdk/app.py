@@ -1,11 +1,12 @@
 # app.py
-from aws_cdk import App
-from next_memo.next_memo_stack import NextMemosStack
+import os
+from aws_cdk import App, Environment
+from next_memo.next_memo_stack import NextMemoStack
+from next_memo.data_stack import NextMemoDataStack
 
 app = App()
-NextMemosStack(app, "NextMemosStack")
+# NextMemoDataStack 은 기본 VPC 와 보안 그룹을 조회하므로 계정/리전이 필요
+env = Environment(account=os.environ.get("CDK_DEFAULT_ACCOUNT"), region=os.environ.get("CDK_DEFAULT_REGION"))
+NextMemoStack(app, "NextMemoStack", env=env)
+NextMemoDataStack(app, "NextMemoDataStack", env=env)
 app.synth()
-
-# requirements.txt
-aws-cdk-lib>=2.0.0
-constructs>=10.0.0
\ No newline at end of file
@@ -8,20 +8,70 @@ from aws_cdk import (
     aws_iam as iam,
     aws_opensearchserverless as opensearch,
     aws_lambda_event_sources as lambda_event_sources,
+    aws_sqs as sqs,
+    custom_resources as cr,
+    CustomResource,
     Stack,
     Duration,
     CfnOutput
 )
 from constructs import Construct
 
+# 동기화 Lambda 와 스트림 이벤트 소스 기본값 (cdk.json context 또는 `cdk deploy -c syncBatchSize=200` 으로 변경)
+SYNC_DEFAULTS = {
+    # Lambda 는 메모리에 비례해 CPU 를 배정함 (benchmarks/power_tuning_bench.py 로 1k 레코드 당 비용 비교)
+    "syncMemorySize": 512,
+    # 핸들러는 배치를 메모 id 별로 합쳐 _bulk 한 번으로 색인하므로 호출 당 레코드를 충분히 모음
+    "syncBatchSize": 100,
+    # 쓰기가 드문 시간대에도 최대 1초만 모아서 호출
+    "syncMaxBatchingWindowSeconds": 1,
+    # 샤드 당 동시 배치 수 (같은 메모 id 의 레코드 순서는 유지됨)
+    "syncParallelizationFactor": 2,
+    "syncRetryAttempts": 3,
+    # 이보다 오래된 레코드는 재시도하지 않고 on-failure 큐로 보냄 (스트림 보관 기간 24시간 안에 재처리 가능)
+    "syncMaxRecordAgeSeconds": 3600,
+    # 첫 배포 시 스트림에 남아 있는 변경부터 읽음 (버전 색인이라 중복 반영은 무시됨)
+    "syncStartingPosition": "TRIM_HORIZON",
+}
+
+# 메모 테이블 용량 기본값 (PROVISIONED 로 바꾸면 아래 읽기/쓰기 용량을 테이블과 각 GSI 에 적용)
+TABLE_DEFAULTS = {
+    "memoTableBillingMode": "PAY_PER_REQUEST",
+    "memoTableReadCapacity": 5,
+    "memoTableWriteCapacity": 5,
+    "memoIndexReadCapacity": 5,
+    "memoIndexWriteCapacity": 5,
+}
+
+# 검색 컬렉션 기본값
+SEARCH_DEFAULTS = {
+    # Titan 임베딩을 knn_vector 필드에 함께 색인. OpenSearch Serverless 는 knn_vector 를 VECTORSEARCH
+    # 컬렉션에서만 허용하므로 켜면 컬렉션 종류도 VECTORSEARCH 가 됨 (컬렉션이 새로 만들어지므로
+    # 배포 후 `python reindex.py --embeddings` 로 다시 색인)
+    "embeddingEnabled": False,
+}
+
 class NextMemoDataStack(Stack):
     def __init__(self, scope: Construct, id: str, **kwargs):
         super().__init__(scope, id, **kwargs)
 
+        def setting(name):
+            value = self.node.try_get_context(name)
+            default = {**SYNC_DEFAULTS, **TABLE_DEFAULTS, **SEARCH_DEFAULTS}[name]
+            # -c 로 넘긴 값은 문자열이므로 기본값의 타입으로 변환
+            if value is None:
+                return default
+            if isinstance(default, bool):
+                return str(value).lower() == "true"
+            return type(default)(value)
+
         # Resource Names
         DYNAMODB_TABLE = "next-memo"
         COLLECTION_NAME = "memo-search"
         SG_NAME = "next-memos-sg"
+        embedding_enabled = setting("embeddingEnabled")
+        # 인덱스 매핑(lambda/dynamodb_to_opensearch/mapping.py)의 knn_vector 필드와 컬렉션 종류를 함께 결정
+        search_environment = {"EMBEDDING_ENABLED": "true" if embedding_enabled else "false"}
         
         vpc = ec2.Vpc.from_lookup(
             self, "ExistingVPC",
@@ -35,9 +85,43 @@ class NextMemoDataStack(Stack):
         )
 
         # DynamoDB 테이블 생성
-        table = dynamodb.Table.from_table_attributes(
+        # 동기화 Lambda 는 OldImage 와 NewImage 를 비교해 검색 필드 변경이 없는 MODIFY 를 건너뛰므로
+        # 테이블 스트림은 NEW_AND_OLD_IMAGES 로 설정
+        billing_mode = dynamodb.BillingMode[setting("memoTableBillingMode")]
+        provisioned = billing_mode == dynamodb.BillingMode.PROVISIONED
+        table = dynamodb.Table(
             self, "MemoTable",
             table_name=DYNAMODB_TABLE,
+            partition_key=dynamodb.Attribute(name="id", type=dynamodb.AttributeType.STRING),
+            billing_mode=billing_mode,
+            read_capacity=setting("memoTableReadCapacity") if provisioned else None,
+            write_capacity=setting("memoTableWriteCapacity") if provisioned else None,
+            stream=dynamodb.StreamViewType.NEW_AND_OLD_IMAGES,
+            point_in_time_recovery=True,
+            removal_policy=RemovalPolicy.RETAIN
+        )
+        index_capacity = {
+            "read_capacity": setting("memoIndexReadCapacity"),
+            "write_capacity": setting("memoIndexWriteCapacity"),
+        } if provisioned else {}
+        # 목록 화면(MemoCard)은 본문과 첨부 파일까지 그리고 목록 검색 필터는 본문을 읽으므로 두 GSI 모두 ALL 로 복사
+        # (INCLUDE 로 좁혀도 결국 모든 속성이 들어가 절감이 없고, 기존 테이블의 GSI 를 다시 만들 필요도 없음)
+        # 최근 수정순 목록: 파티션 키를 "ALL#<n>" 으로 나눠 쓰고 읽을 때 샤드를 합침
+        # (샤드 수는 src/lib/constants.ts 와 lambda/dynamodb_to_opensearch/migration.py 의 GSI_SHARD_COUNT)
+        table.add_global_secondary_index(
+            index_name="UpdatedIndex",
+            partition_key=dynamodb.Attribute(name="gsiPartitionKey", type=dynamodb.AttributeType.STRING),
+            sort_key=dynamodb.Attribute(name="updatedAt", type=dynamodb.AttributeType.NUMBER),
+            projection_type=dynamodb.ProjectionType.ALL,
+            **index_capacity
+        )
+        # 우선순위별 목록
+        table.add_global_secondary_index(
+            index_name="PriorityUpdatedIndex",
+            partition_key=dynamodb.Attribute(name="priority", type=dynamodb.AttributeType.NUMBER),
+            sort_key=dynamodb.Attribute(name="updatedAt", type=dynamodb.AttributeType.NUMBER),
+            projection_type=dynamodb.ProjectionType.ALL,
+            **index_capacity
         )
         
         # Collection에 Security Policy 연결
@@ -59,7 +143,7 @@ class NextMemoDataStack(Stack):
         collection = opensearch.CfnCollection(
             self, "MemoSearchCollection",
             name=COLLECTION_NAME,
-            type="SEARCH",
+            type="VECTORSEARCH" if embedding_enabled else "SEARCH",
             description="Collection for memo search"
         )
 
@@ -145,10 +229,12 @@ class NextMemoDataStack(Stack):
         # Lambda 함수 생성
         sync_function = lambda_.Function(
             self, "DynamoToOpenSearchFunction",
-            runtime=lambda_.Runtime.PYTHON_3_9,
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            architecture=lambda_.Architecture.ARM_64,
             handler="index.handler",
             code=lambda_.Code.from_asset("../lambda/dynamodb_to_opensearch"),
             role=lambda_role,
+            memory_size=setting("syncMemorySize"),
             timeout=Duration.seconds(30),
             vpc=vpc,
             vpc_subnets=ec2.SubnetSelection(
@@ -159,16 +245,74 @@ class NextMemoDataStack(Stack):
             environment={
                 "OPENSEARCH_ENDPOINT": collection.attr_collection_endpoint,
                 "REGION": self.region,
+                # Titan 임베딩을 knn_vector 필드에 함께 색인 (embeddingEnabled)
+                **search_environment,
+                "EMBEDDING_CONCURRENCY": "4",
+                # _bulk 본문 gzip 압축과 warm 호출 간 keep-alive 커넥션 풀
+                "OPENSEARCH_HTTP_COMPRESS": "true",
+                "OPENSEARCH_KEEP_ALIVE": "true",
+                "OPENSEARCH_POOL_MAXSIZE": "10",
+                # 큰 배치를 메모 id 별로 나눠 동시에 보내는 _bulk 요청 수
+                "WRITE_CONCURRENCY": "4",
+            }
+        )
+
+        # 배포 시 한 번 next_memo 인덱스와 매핑을 만듦 (핸들러는 호출마다 인덱스를 확인하지 않음)
+        bootstrap_function = lambda_.Function(
+            self, "IndexBootstrapFunction",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            architecture=lambda_.Architecture.ARM_64,
+            handler="bootstrap.on_event",
+            code=lambda_.Code.from_asset("../lambda/dynamodb_to_opensearch"),
+            role=lambda_role,
+            # wait_for_index_ready 의 최대 대기 시간(10회 x (30초 + 2초))보다 길게
+            timeout=Duration.minutes(6),
+            vpc=vpc,
+            vpc_subnets=ec2.SubnetSelection(
+                subnet_type=ec2.SubnetType.PUBLIC
+            ),
+            allow_public_subnet=True,
+            security_groups=[sg],
+            environment={
+                "OPENSEARCH_ENDPOINT": collection.attr_collection_endpoint,
+                "REGION": self.region,
+                **search_environment,
             }
         )
+        index_bootstrap = CustomResource(
+            self, "IndexBootstrap",
+            service_token=cr.Provider(
+                self, "IndexBootstrapProvider",
+                on_event_handler=bootstrap_function
+            ).service_token,
+            properties={"IndexName": "next_memo"}
+        )
+        index_bootstrap.node.add_dependency(vpc_endpoint)
+        # 인덱스가 만들어진 뒤에 스트림 소비를 시작
+        sync_function.node.add_dependency(index_bootstrap)
+
+        # 재시도를 모두 소진한 배치의 샤드/시퀀스 번호 범위를 보관 (replay_failures.py 로 다시 색인)
+        sync_failure_queue = sqs.Queue(
+            self, "SyncFailureQueue",
+            queue_name="next-memo-sync-failures",
+            retention_period=Duration.days(14)
+        )
 
         # DynamoDB Stream을 Lambda 함수의 이벤트 소스로 추가
+        # 핸들러는 실패한 레코드만 batchItemFailures 로 보고하고, 함수 에러가 나면 배치를 반으로 나눠
+        # 문제 레코드를 분리한 뒤 재시도를 소진하면 on-failure 큐로 보내 샤드가 멈추지 않게 함
         sync_function.add_event_source(
             lambda_event_sources.DynamoEventSource(
                 table,
-                starting_position=lambda_.StartingPosition.LATEST,
-                batch_size=1,
-                retry_attempts=3
+                starting_position=lambda_.StartingPosition[setting("syncStartingPosition")],
+                batch_size=setting("syncBatchSize"),
+                max_batching_window=Duration.seconds(setting("syncMaxBatchingWindowSeconds")),
+                parallelization_factor=setting("syncParallelizationFactor"),
+                retry_attempts=setting("syncRetryAttempts"),
+                max_record_age=Duration.seconds(setting("syncMaxRecordAgeSeconds")),
+                report_batch_item_failures=True,
+                bisect_batch_on_error=True,
+                on_failure=lambda_event_sources.SqsDlq(sync_failure_queue)
             )
         )
 
@@ -178,3 +322,9 @@ class NextMemoDataStack(Stack):
             value=collection.attr_collection_endpoint,
             description="OpenSearch Serverless collection endpoint"
         )
+
+        CfnOutput(
+            self, "SyncFailureQueueUrl",
+            value=sync_failure_queue.queue_url,
+            description="On-failure destination of the stream sync (python replay_failures.py --queue-url ...)"
+        )
@@ -5,16 +5,36 @@ from aws_cdk import (
     aws_elasticloadbalancingv2 as elbv2,
     aws_iam as iam,
     aws_logs as logs,
+    aws_cloudfront as cloudfront,
+    aws_cloudfront_origins as origins,
     Stack,
     Duration,
     CfnOutput
 )
 from constructs import Construct
 
+# 웹 서비스 태스크 크기와 오토스케일링 기본값 (cdk.json context 또는 `cdk deploy -c webMaxTasks=8` 으로 변경)
+WEB_DEFAULTS = {
+    "webCpu": 512,
+    "webMemoryMiB": 1024,
+    # AZ 하나에 문제가 생겨도 요청을 받도록 최소 2개
+    "webMinTasks": 2,
+    "webMaxTasks": 6,
+    "webCpuTargetPercent": 60,
+    # SSR 과 API 요청을 합친 태스크 당 목표 요청 수 (1분 기준)
+    "webRequestsPerTarget": 500,
+}
+
 class NextMemoStack(Stack):
     def __init__(self, scope: Construct, id: str, **kwargs):
         super().__init__(scope, id, **kwargs)
 
+        def web_setting(name):
+            value = self.node.try_get_context(name)
+            default = WEB_DEFAULTS[name]
+            # -c 로 넘긴 값은 문자열이므로 기본값의 타입으로 변환
+            return default if value is None else type(default)(value)
+
         # AWS Region
         REGION = "ap-northeast-2"
 
@@ -29,6 +49,8 @@ class NextMemoStack(Stack):
         ALB_NAME = "next-memos-alb"
         LISTENER_PORT = 80
         CONTAINER_PORT = 3000
+        # next.config 의 trailingSlash 설정 때문에 슬래시로 끝나야 리다이렉트 없이 200 응답
+        HEALTH_CHECK_PATH = "/api/health/"
 
         # Create VPC with two public subnets
         vpc = ec2.Vpc(
@@ -101,8 +123,8 @@ class NextMemoStack(Stack):
         task_definition = ecs.FargateTaskDefinition(
             self, TASK_FAMILY,
             family=TASK_FAMILY,
-            cpu=256,
-            memory_limit_mib=512,
+            cpu=web_setting("webCpu"),
+            memory_limit_mib=web_setting("webMemoryMiB"),
             execution_role=execution_role
         )
 
@@ -122,7 +144,7 @@ class NextMemoStack(Stack):
             cluster=cluster,
             service_name=SERVICE_NAME,
             task_definition=task_definition,
-            desired_count=1,
+            desired_count=web_setting("webMinTasks"),
             assign_public_ip=True,
             security_groups=[sg],
             vpc_subnets=ec2.SubnetSelection(
@@ -131,12 +153,12 @@ class NextMemoStack(Stack):
         )
 
         # Attach ECS Service to ALB Listener
-        listener.add_targets(
+        target_group = listener.add_targets(
             "ECS",
             port=LISTENER_PORT,
             targets=[service],
             health_check=elbv2.HealthCheck(
-                path="/",  # Adjust the health check path if necessary
+                path=HEALTH_CHECK_PATH,
                 interval=Duration.seconds(30),
                 timeout=Duration.seconds(5),
                 healthy_threshold_count=2,
@@ -144,7 +166,93 @@ class NextMemoStack(Stack):
             )
         )
 
+        # CPU 사용률과 태스크 당 ALB 요청 수 중 더 많은 태스크가 필요한 쪽을 따라 확장
+        scaling = service.auto_scale_task_count(
+            min_capacity=web_setting("webMinTasks"),
+            max_capacity=web_setting("webMaxTasks")
+        )
+        scaling.scale_on_cpu_utilization(
+            "CpuScaling",
+            target_utilization_percent=web_setting("webCpuTargetPercent"),
+            scale_in_cooldown=Duration.seconds(300),
+            scale_out_cooldown=Duration.seconds(60)
+        )
+        scaling.scale_on_request_count(
+            "RequestScaling",
+            requests_per_target=web_setting("webRequestsPerTarget"),
+            target_group=target_group,
+            scale_in_cooldown=Duration.seconds(300),
+            scale_out_cooldown=Duration.seconds(60)
+        )
+
+        # CloudFront: 해시가 붙은 정적 파일은 엣지에서 오래 캐시하고, 페이지와 API 는 캐시 없이 ALB 로 전달
+        alb_origin = origins.LoadBalancerV2Origin(
+            alb,
+            protocol_policy=cloudfront.OriginProtocolPolicy.HTTP_ONLY,
+            http_port=LISTENER_PORT
+        )
+        # 파일 이름에 빌드 해시가 들어가 내용이 바뀌면 URL 도 바뀌는 파일 (_next/static, workbox-<hash>.js)
+        immutable_cache_policy = cloudfront.CachePolicy(
+            self, "ImmutableAssetsCachePolicy",
+            comment="Hashed Next.js build assets",
+            default_ttl=Duration.days(365),
+            min_ttl=Duration.days(1),
+            max_ttl=Duration.days(365),
+            enable_accept_encoding_gzip=True,
+            enable_accept_encoding_brotli=True
+        )
+        # 이름이 고정된 public/ 파일 (아이콘 등): 배포 후 하루 안에 갱신되도록 짧게
+        public_cache_policy = cloudfront.CachePolicy(
+            self, "PublicAssetsCachePolicy",
+            comment="Unhashed files from public/",
+            default_ttl=Duration.days(1),
+            min_ttl=Duration.seconds(0),
+            max_ttl=Duration.days(7),
+            enable_accept_encoding_gzip=True,
+            enable_accept_encoding_brotli=True
+        )
+
+        def static_behavior(cache_policy):
+            return cloudfront.BehaviorOptions(
+                origin=alb_origin,
+                viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+                cache_policy=cache_policy,
+                compress=True
+            )
+
+        # 쿠키, 쿼리, 본문을 모두 ALB 로 넘기고 캐시하지 않음
+        dynamic_behavior = cloudfront.BehaviorOptions(
+            origin=alb_origin,
+            viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+            allowed_methods=cloudfront.AllowedMethods.ALLOW_ALL,
+            cache_policy=cloudfront.CachePolicy.CACHING_DISABLED,
+            origin_request_policy=cloudfront.OriginRequestPolicy.ALL_VIEWER,
+            compress=True
+        )
+
+        distribution = cloudfront.Distribution(
+            self, "Distribution",
+            comment=f"{SERVICE_NAME} CDN",
+            default_behavior=dynamic_behavior,
+            additional_behaviors={
+                "/api/*": dynamic_behavior,
+                # 서비스 워커는 새 배포를 바로 받아야 하므로 캐시하지 않음
+                "/sw.js": dynamic_behavior,
+                "/_next/static/*": static_behavior(immutable_cache_policy),
+                "/workbox-*.js": static_behavior(immutable_cache_policy),
+                "/icon/*": static_behavior(public_cache_policy),
+            },
+            http_version=cloudfront.HttpVersion.HTTP2_AND_3,
+            price_class=cloudfront.PriceClass.PRICE_CLASS_200
+        )
+
         # Outputs
+        CfnOutput(
+            self, "DistributionDomainName",
+            value=distribution.distribution_domain_name,
+            description="CloudFront domain in front of the ALB"
+        )
+
         CfnOutput(
             self, "LoadBalancerDNS",
             value=alb.load_balancer_dns_name
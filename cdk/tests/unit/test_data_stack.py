@@ -0,0 +1,125 @@
+import os
+import sys
+
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+import pytest
+
+from next_memo.data_stack import NextMemoDataStack
+
+# 부트스트랩 커스텀 리소스가 배포 시 보내는 인덱스 매핑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "lambda", "dynamodb_to_opensearch"))
+from mapping import build_index_body  # noqa: E402
+
+ENV = core.Environment(account="123456789012", region="ap-northeast-2")
+
+
+def synth(context=None):
+    app = core.App(context=context)
+    stack = NextMemoDataStack(app, "NextMemoDataStack", env=ENV)
+    return assertions.Template.from_stack(stack)
+
+
+def test_stream_event_source_uses_production_defaults():
+    template = synth()
+
+    template.has_resource_properties("AWS::Lambda::EventSourceMapping", {
+        "BatchSize": 100,
+        "MaximumBatchingWindowInSeconds": 1,
+        "ParallelizationFactor": 2,
+        "MaximumRetryAttempts": 3,
+        "MaximumRecordAgeInSeconds": 3600,
+        "StartingPosition": "TRIM_HORIZON",
+        "BisectBatchOnFunctionError": True,
+        "FunctionResponseTypes": ["ReportBatchItemFailures"],
+        "DestinationConfig": {"OnFailure": {"Destination": assertions.Match.any_value()}},
+    })
+
+
+def test_stream_event_source_reads_context_overrides():
+    template = synth({
+        "syncBatchSize": "500",
+        "syncMaxBatchingWindowSeconds": "5",
+        "syncParallelizationFactor": "10",
+        "syncStartingPosition": "LATEST",
+    })
+
+    template.has_resource_properties("AWS::Lambda::EventSourceMapping", {
+        "BatchSize": 500,
+        "MaximumBatchingWindowInSeconds": 5,
+        "ParallelizationFactor": 10,
+        "StartingPosition": "LATEST",
+    })
+
+
+def test_index_is_bootstrapped_by_custom_resource_before_streaming():
+    template = synth()
+
+    template.has_resource_properties("AWS::Lambda::Function", {"Handler": "bootstrap.on_event"})
+    bootstrap = template.find_resources("AWS::CloudFormation::CustomResource", {
+        "Properties": {"IndexName": "next_memo"},
+    })
+    assert len(bootstrap) == 1
+    [bootstrap_id] = bootstrap
+    [sync_function] = template.find_resources("AWS::Lambda::Function", {
+        "Properties": {"Handler": "index.handler"},
+    }).values()
+    assert bootstrap_id in sync_function["DependsOn"]
+
+
+def test_sync_function_runs_on_arm64_with_configurable_memory():
+    template = synth({"syncMemorySize": "1024"})
+
+    template.has_resource_properties("AWS::Lambda::Function", {
+        "Handler": "index.handler",
+        "Runtime": "python3.12",
+        "Architectures": ["arm64"],
+        "MemorySize": 1024,
+    })
+
+
+def test_table_streams_new_and_old_images_with_full_list_projections():
+    template = synth()
+    [table] = template.find_resources("AWS::DynamoDB::Table").values()
+    properties = table["Properties"]
+    indexes = {index["IndexName"]: index for index in properties["GlobalSecondaryIndexes"]}
+
+    assert table["DeletionPolicy"] == "Retain"
+    assert properties["BillingMode"] == "PAY_PER_REQUEST"
+    assert properties["StreamSpecification"] == {"StreamViewType": "NEW_AND_OLD_IMAGES"}
+    for index in indexes.values():
+        assert index["Projection"] == {"ProjectionType": "ALL"}
+    assert indexes["UpdatedIndex"]["KeySchema"][0] == {"AttributeName": "gsiPartitionKey", "KeyType": "HASH"}
+
+
+def test_table_capacity_reads_context_overrides():
+    template = synth({"memoTableBillingMode": "PROVISIONED", "memoTableReadCapacity": "20",
+                      "memoIndexWriteCapacity": "10"})
+    [table] = template.find_resources("AWS::DynamoDB::Table").values()
+    properties = table["Properties"]
+
+    assert properties["ProvisionedThroughput"] == {"ReadCapacityUnits": 20, "WriteCapacityUnits": 5}
+    for index in properties["GlobalSecondaryIndexes"]:
+        assert index["ProvisionedThroughput"] == {"ReadCapacityUnits": 5, "WriteCapacityUnits": 10}
+
+
+@pytest.mark.parametrize("context, collection_type", [
+    (None, "SEARCH"),
+    ({"embeddingEnabled": "true"}, "VECTORSEARCH"),
+])
+def test_collection_type_matches_bootstrapped_mapping(context, collection_type):
+    template = synth(context)
+    [collection] = template.find_resources("AWS::OpenSearchServerless::Collection").values()
+    [bootstrap] = template.find_resources("AWS::Lambda::Function", {
+        "Properties": {"Handler": "bootstrap.on_event"},
+    }).values()
+    [sync_function] = template.find_resources("AWS::Lambda::Function", {
+        "Properties": {"Handler": "index.handler"},
+    }).values()
+    embeddings = bootstrap["Properties"]["Environment"]["Variables"]["EMBEDDING_ENABLED"] == "true"
+    properties = build_index_body(embeddings=embeddings)["mappings"]["properties"]
+
+    assert collection["Properties"]["Type"] == collection_type
+    assert sync_function["Properties"]["Environment"]["Variables"]["EMBEDDING_ENABLED"] == str(embeddings).lower()
+    # OpenSearch Serverless 는 knn_vector 를 VECTORSEARCH 컬렉션에서만 허용
+    assert ("embedding" in properties) == (collection_type == "VECTORSEARCH")
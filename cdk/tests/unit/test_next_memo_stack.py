@@ -0,0 +1,67 @@
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+
+from next_memo.next_memo_stack import NextMemoStack
+
+
+def synth(context=None):
+    app = core.App(context=context)
+    stack = NextMemoStack(app, "NextMemoStack")
+    return assertions.Template.from_stack(stack)
+
+
+def scaling_policies(template):
+    policies = template.find_resources("AWS::ApplicationAutoScaling::ScalingPolicy")
+    return {policy["Properties"]["TargetTrackingScalingPolicyConfiguration"]["PredefinedMetricSpecification"]
+            ["PredefinedMetricType"]: policy["Properties"]["TargetTrackingScalingPolicyConfiguration"]
+            for policy in policies.values()}
+
+
+def test_service_scales_on_cpu_and_request_count():
+    template = synth()
+
+    template.has_resource_properties("AWS::ApplicationAutoScaling::ScalableTarget", {
+        "MinCapacity": 2,
+        "MaxCapacity": 6,
+        "ScalableDimension": "ecs:service:DesiredCount",
+    })
+    policies = scaling_policies(template)
+    assert policies["ECSServiceAverageCPUUtilization"]["TargetValue"] == 60
+    assert policies["ALBRequestCountPerTarget"]["TargetValue"] == 500
+
+
+def test_task_size_and_capacity_read_context_overrides():
+    template = synth({"webCpu": "1024", "webMemoryMiB": "2048", "webMinTasks": "1", "webMaxTasks": "10"})
+
+    template.has_resource_properties("AWS::ECS::TaskDefinition", {"Cpu": "1024", "Memory": "2048"})
+    template.has_resource_properties("AWS::ApplicationAutoScaling::ScalableTarget", {
+        "MinCapacity": 1,
+        "MaxCapacity": 10,
+    })
+
+
+def test_health_check_uses_dedicated_endpoint():
+    template = synth()
+
+    template.has_resource_properties("AWS::ElasticLoadBalancingV2::TargetGroup", {
+        "HealthCheckPath": "/api/health/",
+    })
+
+
+def test_distribution_caches_static_assets_and_passes_api_through():
+    template = synth()
+    [distribution] = template.find_resources("AWS::CloudFront::Distribution").values()
+    config = distribution["Properties"]["DistributionConfig"]
+    behaviors = {behavior["PathPattern"]: behavior for behavior in config["CacheBehaviors"]}
+    # CachingDisabled 관리형 캐시 정책
+    caching_disabled = "4135ea2d-6df8-44a3-9df3-4b5a84be39ad"
+
+    assert config["HttpVersion"] == "http2and3"
+    assert config["DefaultCacheBehavior"]["CachePolicyId"] == caching_disabled
+    assert behaviors["/api/*"]["CachePolicyId"] == caching_disabled
+    assert "POST" in behaviors["/api/*"]["AllowedMethods"]
+    assert behaviors["/_next/static/*"]["CachePolicyId"] != caching_disabled
+    assert all(behavior["Compress"] for behavior in behaviors.values())
+    template.has_resource_properties("AWS::CloudFront::CachePolicy", {
+        "CachePolicyConfig": {"DefaultTTL": 31536000},
+    })
@@ -0,0 +1,149 @@
+"""분석기 프로필(mapping.ANALYZER_PROFILES) 별 인덱스 크기 / 색인 처리량 / 검색 지연 시간 비교
+
+같은 합성 메모 코퍼스를 프로필마다 임시 인덱스(analyzer_bench_<profile>)에 색인하고,
+/api/search 라우트와 같은 multi_match 쿼리로 검색 지연 시간을 잰 뒤 인덱스를 지운다.
+분석기가 실제로 동작해야 하므로 OpenSearch 엔드포인트가 필요하다 (로컬 docker 또는 개발용 컬렉션).
+
+    python benchmarks/analyzer_bench.py --endpoint http://localhost:9200 --docs 5000 --queries 200
+"""
+import os
+import json
+import time
+import random
+import argparse
+
+from ingest_bench import latency_summary
+from synthetic import ENGLISH_WORDS, KOREAN_WORDS, MemoGenerator
+import connection
+from bulk import build_document, index_action, send_bulk
+from mapping import ANALYZER_PROFILES, build_index_body
+
+INDEX_PREFIX = "analyzer_bench_"
+
+
+def build_corpus(docs, seed=42):
+    memos = MemoGenerator(seed)
+    images = [memos.image() for _ in range(docs)]
+    return [index_action(image['id']['S'], build_document(image)) for image in images]
+
+
+def build_queries(count, seed=42):
+    """단어 / 두 단어 / 접두어(검색어 입력 중) 검색어 혼합"""
+    rng = random.Random(seed)
+    words = KOREAN_WORDS + ENGLISH_WORDS
+    queries = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            queries.append(rng.choice(words))
+        elif kind == 1:
+            queries.append(f"{rng.choice(words)} {rng.choice(words)}")
+        else:
+            word = rng.choice(words)
+            queries.append(word[:max(1, len(word) // 2)])
+    return queries
+
+
+def search_body(query):
+    """src/app/api/search/route.ts 의 POST 검색과 같은 쿼리"""
+    return {
+        'query': {'bool': {'must': [{'multi_match': {
+            'query': query,
+            # *.autocomplete 는 edge_ngram 프로필에만 있는 접두어 필드 (다른 프로필에서는 무시됨)
+            'fields': ['title^2', 'content', 'summary', 'tags', 'title.autocomplete', 'tags.autocomplete'],
+            'type': 'best_fields',
+            'fuzziness': 'AUTO',
+            'operator': 'or',
+        }}]}},
+        'size': 20,
+        'sort': [{'_score': {'order': 'desc'}}, {'updatedAt': {'order': 'desc'}}, {'_id': {'order': 'desc'}}],
+    }
+
+
+def index_size(client, index_name):
+    """primary 저장 크기(bytes), 통계 API 를 지원하지 않으면 None"""
+    try:
+        stats = client.indices.stats(index=index_name, metric='store,docs')
+        return stats['_all']['primaries']['store']['size_in_bytes']
+    except Exception:
+        return None
+
+
+def run_profile(client, profile, corpus, queries, keep=False):
+    index_name = f"{INDEX_PREFIX}{profile}"
+    client.indices.delete(index=index_name)
+    client.indices.create(index=index_name, body=build_index_body(profile=profile))
+
+    started = time.perf_counter()
+    results = send_bulk(client, corpus, index_name)
+    index_seconds = time.perf_counter() - started
+    errors = [error for ok, error in results if not ok]
+
+    client.indices.refresh(index=index_name)
+    size = index_size(client, index_name)
+
+    latencies, hits = [], 0
+    for query in queries:
+        started = time.perf_counter()
+        response = client.search(index=index_name, body=search_body(query))
+        latencies.append(time.perf_counter() - started)
+        hits += response.get('hits', {}).get('total', {}).get('value', 0)
+
+    if not keep:
+        client.indices.delete(index=index_name)
+
+    return {
+        'profile': profile,
+        'docs': len(corpus),
+        'index_errors': len(errors),
+        'first_error': errors[0] if errors else None,
+        'index_docs_per_sec': round(len(corpus) / index_seconds, 1),
+        'index_size_bytes': size,
+        'query_latency': latency_summary(latencies),
+        'avg_hits': round(hits / len(queries), 1) if queries else 0,
+    }
+
+
+def run_analyzer_benchmark(client, docs, queries, profiles=ANALYZER_PROFILES, seed=42, keep=False):
+    corpus = build_corpus(docs, seed)
+    query_list = build_queries(queries, seed)
+    return [run_profile(client, profile, corpus, query_list, keep) for profile in profiles]
+
+
+def print_report(results):
+    print(f"\n{'profile':<12}{'docs/s':>10}{'size MB':>10}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'avg hits':>10}")
+    for result in results:
+        size = result['index_size_bytes']
+        size = f"{size / 1024 / 1024:.1f}" if size is not None else 'n/a'
+        latency = result['query_latency']
+        print(f"{result['profile']:<12}{result['index_docs_per_sec']:>10}{size:>10}{latency['p50_ms']:>9}"
+              f"{latency['p90_ms']:>9}{latency['p99_ms']:>9}{result['avg_hits']:>10}")
+        if result['index_errors']:
+            print(f"  {result['index_errors']} index errors, first: {result['first_error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="분석기 프로필 별 인덱스 크기 / 처리량 / 검색 지연 시간 비교")
+    parser.add_argument('--endpoint', default=os.environ.get('OPENSEARCH_ENDPOINT'), help="OpenSearch 엔드포인트")
+    parser.add_argument('--region', default=os.environ.get('REGION', 'ap-northeast-2'))
+    parser.add_argument('--profiles', nargs='+', choices=ANALYZER_PROFILES, default=list(ANALYZER_PROFILES))
+    parser.add_argument('--docs', type=int, default=5000, help="색인할 합성 메모 수")
+    parser.add_argument('--queries', type=int, default=200, help="검색 지연 시간을 잴 쿼리 수")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep', action='store_true', help="벤치마크 인덱스를 지우지 않음")
+    parser.add_argument('--json', action='store_true', help="결과를 JSON 으로 출력")
+    args = parser.parse_args()
+
+    if not args.endpoint:
+        parser.error("--endpoint 또는 OPENSEARCH_ENDPOINT 가 필요합니다")
+
+    client = connection.create_opensearch_client(args.endpoint, args.region, http_compress=True)
+    results = run_analyzer_benchmark(client, args.docs, args.queries, args.profiles, args.seed, args.keep)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    main()
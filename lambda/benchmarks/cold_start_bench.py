@@ -0,0 +1,101 @@
+"""Lambda cold start(초기화) 시간 벤치마크
+
+매 회 새 파이썬 프로세스에서 index 모듈을 불러오고(Init) 첫 배치를 처리(첫 Invoke)하는 시간을
+가짜 OpenSearch 엔드포인트로 측정한다. --top-imports 를 주면 `python -X importtime` 결과에서
+가장 오래 걸린 모듈도 출력한다.
+
+    python benchmarks/cold_start_bench.py --runs 10 --top-imports 10
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+from fake_opensearch import FakeOpenSearchServer
+from ingest_bench import configure_environment, percentile
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dynamodb_to_opensearch')
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 자식 프로세스에서 실행: Init(모듈 import) 과 첫 Invoke 시간을 JSON 으로 출력
+CHILD_SCRIPT = """
+import io, sys, json, time, contextlib
+started = time.perf_counter()
+import index
+init = time.perf_counter() - started
+sys.path.insert(0, {benchmark_dir!r})
+from synthetic import StreamGenerator
+event = StreamGenerator({seed}).batch({batch_size})
+with contextlib.redirect_stdout(io.StringIO()):
+    started = time.perf_counter()
+    index.handler(event, None)
+    invoke = time.perf_counter() - started
+print(json.dumps({{'init': init, 'invoke': invoke, 'modules': len(sys.modules)}}))
+"""
+
+
+def run_once(batch_size, seed=42, importtime=False):
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    script = CHILD_SCRIPT.format(benchmark_dir=BENCHMARK_DIR, seed=seed, batch_size=batch_size)
+    result = subprocess.run(command + ['-c', script], cwd=SOURCE_DIR, env=os.environ.copy(),
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def top_imports(importtime_output, count):
+    """-X importtime 출력에서 누적 시간(하위 import 포함)이 긴 모듈 목록"""
+    entries = []
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        entries.append((int(cumulative) / 1000, name.strip()))
+    return sorted(entries, reverse=True)[:count]
+
+
+def run_cold_start_benchmark(server, runs, batch_size, seed=42):
+    configure_environment(server.endpoint)
+    samples = [run_once(batch_size, seed)[0] for _ in range(runs)]
+    summary = {}
+    for key in ('init', 'invoke'):
+        values = [sample[key] for sample in samples]
+        summary[key] = {f"p{q}_ms": round(percentile(values, q) * 1000, 2) for q in (50, 90)}
+    summary['modules'] = samples[-1]['modules']
+    summary['runs'] = runs
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lambda cold start 시간 벤치마크")
+    parser.add_argument('--runs', type=int, default=10, help="새 프로세스로 반복할 횟수")
+    parser.add_argument('--batch-size', type=int, default=100, help="첫 Invoke 의 스트림 레코드 수")
+    parser.add_argument('--top-imports', type=int, default=0, help="import 시간이 긴 모듈 N 개 출력")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help="결과를 JSON 으로 출력")
+    args = parser.parse_args()
+
+    server = FakeOpenSearchServer().start()
+    try:
+        result = run_cold_start_benchmark(server, args.runs, args.batch_size, args.seed)
+        if args.top_imports:
+            _, stderr = run_once(args.batch_size, args.seed, importtime=True)
+            result['top_imports'] = [{'module': name, 'ms': ms} for ms, name in top_imports(stderr, args.top_imports)]
+    finally:
+        server.stop()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"\n[cold start] {result['runs']} runs, {result['modules']} modules loaded")
+    print(f"  init:          p50 {result['init']['p50_ms']}ms, p90 {result['init']['p90_ms']}ms")
+    print(f"  first invoke:  p50 {result['invoke']['p50_ms']}ms, p90 {result['invoke']['p90_ms']}ms")
+    for entry in result.get('top_imports', []):
+        print(f"    {entry['module']}: {entry['ms']}ms")
+
+
+if __name__ == "__main__":
+    main()
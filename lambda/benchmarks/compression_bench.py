@@ -0,0 +1,67 @@
+"""_bulk 요청 본문 gzip 압축 / keep-alive on-off 비교 벤치마크
+
+대역폭을 제한한 가짜 OpenSearch 엔드포인트(--bandwidth, bytes/ms)로 같은 스트림 배치와 백필을
+설정만 바꿔 보내고, 전송 바이트와 지연 시간을 비교한다.
+
+    python benchmarks/compression_bench.py --batches 30 --items 3000 --bandwidth 5000
+"""
+import json
+import argparse
+
+from fake_opensearch import FakeOpenSearchServer
+from ingest_bench import run_migration_benchmark, run_stream_benchmark
+
+MODES = [
+    ('plain', {'http_compress': False, 'keep_alive': True}),
+    ('gzip', {'http_compress': True, 'keep_alive': True}),
+    ('gzip, no keep-alive', {'http_compress': True, 'keep_alive': False}),
+]
+
+
+def run_compression_benchmark(server, batches, batch_size, items, segments, page_size, seed=42, modes=MODES):
+    results = {}
+    for name, options in modes:
+        results[name] = {
+            'stream': run_stream_benchmark(server, batches, batch_size, seed, **options),
+            'migration': run_migration_benchmark(server, items, segments, page_size, seed, **options),
+        }
+    return results
+
+
+def print_report(results):
+    print(f"\n{'mode':<22}{'path':<11}{'bytes sent':>12}{'records/s':>11}{'p50 ms':>9}{'p90 ms':>9}{'conns':>7}")
+    for name, paths in results.items():
+        for path, result in paths.items():
+            latency = result.get('batch_latency', {})
+            print(f"{name:<22}{path:<11}{result['bytes_sent']:>12}{result['records_per_sec']:>11}"
+                  f"{latency.get('p50_ms', '-'):>9}{latency.get('p90_ms', '-'):>9}{result['connections']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="gzip 압축 / keep-alive 비교 벤치마크")
+    parser.add_argument('--batches', type=int, default=30, help="스트림 배치 수")
+    parser.add_argument('--batch-size', type=int, default=100, help="배치 당 스트림 레코드 수")
+    parser.add_argument('--items', type=int, default=3000, help="백필할 테이블 아이템 수")
+    parser.add_argument('--segments', type=int, default=4, help="백필 스캔 세그먼트 수")
+    parser.add_argument('--page-size', type=int, default=100, help="백필 스캔 페이지 크기")
+    parser.add_argument('--latency-ms', type=float, default=2, help="가짜 엔드포인트의 요청 당 지연 시간")
+    parser.add_argument('--bandwidth', type=float, default=5000, help="가짜 엔드포인트의 전송 속도 (bytes/ms)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help="결과를 JSON 으로 출력")
+    args = parser.parse_args()
+
+    server = FakeOpenSearchServer(latency_ms=args.latency_ms, bytes_per_ms=args.bandwidth).start()
+    try:
+        results = run_compression_benchmark(server, args.batches, args.batch_size, args.items,
+                                            args.segments, args.page_size, args.seed)
+    finally:
+        server.stop()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    main()
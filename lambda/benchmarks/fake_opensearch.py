@@ -0,0 +1,134 @@
+"""벤치마크용 프로세스 내 OpenSearch HTTP 대역
+
+실제 HTTP(keep-alive) 로 요청을 받아 _bulk 응답 형식을 흉내내고, 요청 수와 바이트 수를 기록한다.
+"""
+import gzip
+import json
+import time
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenSearchServer:
+
+    def __init__(self, latency_ms=0, bytes_per_ms=0):
+        self.latency_ms = latency_ms
+        # 0 보다 크면 요청 본문 크기에 비례하는 처리 시간을 더함 (네트워크/색인 비용 흉내)
+        self.bytes_per_ms = bytes_per_ms
+        self.requests = Counter()
+        self.bytes_received = 0
+        self.documents = {}
+        # 외부 버전(version_type=external_gte) 흉내: 문서 id 별 마지막 버전
+        self.versions = {}
+        self.stale_writes = 0
+        self.connections = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def endpoint(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests.clear()
+            self.bytes_received = 0
+            self.connections.clear()
+
+    def _record(self, method, path, body, client_address):
+        with self._lock:
+            self.requests[f"{method} {path}"] += 1
+            self.bytes_received += len(body)
+            self.connections.add(client_address)
+
+    def _bulk(self, body):
+        lines = [json.loads(line) for line in body.decode('utf-8').splitlines() if line.strip()]
+        items, i = [], 0
+        while i < len(lines):
+            op, meta = next(iter(lines[i].items()))
+            source = lines[i + 1] if op != 'delete' else None
+            i += 1 if op == 'delete' else 2
+            with self._lock:
+                version = meta.get('version')
+                if version is not None and version < self.versions.get(meta['_id'], version):
+                    self.stale_writes += 1
+                    items.append({op: {'_index': meta.get('_index'), '_id': meta['_id'], 'status': 409,
+                                       'error': {'type': 'version_conflict_engine_exception',
+                                                 'reason': 'version conflict'}}})
+                    continue
+                if version is not None:
+                    self.versions[meta['_id']] = version
+                if op == 'delete':
+                    status = 200 if self.documents.pop(meta['_id'], None) is not None else 404
+                elif op == 'update':
+                    if meta['_id'] in self.documents:
+                        fields = source['script']['params']['doc'] if 'script' in source else source['doc']
+                        self.documents[meta['_id']].update(fields)
+                        status = 200
+                    else:
+                        status = 404
+                else:
+                    status = 200 if meta['_id'] in self.documents else 201
+                    self.documents[meta['_id']] = source
+            items.append({op: {'_index': meta.get('_index'), '_id': meta['_id'], 'status': status}})
+        return {'took': 1, 'errors': False, 'items': items}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # 헤더와 본문을 따로 쓰므로 Nagle 을 끄지 않으면 keep-alive 연결에서 delayed ACK 만큼 지연됨
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _respond(self, status, payload=None):
+                body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if self.command != 'HEAD':
+                    self.wfile.write(body)
+                if self.headers.get('Connection') == 'close':
+                    self.close_connection = True
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length) if length else b''
+                path = self.path.split('?')[0]
+                # 전송 바이트 기록과 전송 지연은 압축된 본문 기준
+                server._record(self.command, path, body, self.client_address)
+                delay = server.latency_ms + (len(body) / server.bytes_per_ms if server.bytes_per_ms else 0)
+                if self.headers.get('Content-Encoding') == 'gzip':
+                    body = gzip.decompress(body)
+
+                if delay:
+                    time.sleep(delay / 1000)
+
+                if path.endswith('/_bulk'):
+                    self._respond(200, server._bulk(body))
+                elif path.startswith('/_cluster/health'):
+                    self._respond(200, {'status': 'green'})
+                else:
+                    # 인덱스 존재 확인(HEAD) / 생성(PUT) 등은 모두 성공으로 응답
+                    self._respond(200, {'acknowledged': True})
+
+            do_GET = do_POST = do_PUT = do_DELETE = do_HEAD = _handle
+
+        return Handler
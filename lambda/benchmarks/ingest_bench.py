@@ -0,0 +1,168 @@
+"""동기화 경로(index.handler / migration.migrate_data) 오프라인 수집 벤치마크
+
+AWS 없이 합성 스트림 이벤트와 Scan 페이지를 프로세스 내 가짜 OpenSearch HTTP 엔드포인트로 보내고
+records/sec, 배치 지연 시간 백분위, 요청 수를 출력한다.
+
+    python benchmarks/ingest_bench.py --batches 50 --batch-size 100 --items 5000 --segments 4
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'dynamodb_to_opensearch'))
+
+from fake_opensearch import FakeOpenSearchServer
+from synthetic import StreamGenerator, SyntheticTable
+
+
+def benchmark_environment(endpoint):
+    """핸들러가 가짜 엔드포인트로 SigV4 서명 요청을 보내는 데 필요한 환경 변수 (이미 설정된 리전/자격 증명은 유지)"""
+    defaults = {
+        'REGION': 'ap-northeast-2',
+        'AWS_ACCESS_KEY_ID': 'AKIDBENCHMARK',
+        'AWS_SECRET_ACCESS_KEY': 'benchmark-secret',
+        'AWS_SESSION_TOKEN': 'benchmark-token',
+    }
+    environment = {name: os.environ.get(name, value) for name, value in defaults.items()}
+    environment['OPENSEARCH_ENDPOINT'] = endpoint
+    return environment
+
+
+def configure_environment(endpoint):
+    """핸들러가 가짜 엔드포인트로 SigV4 서명 요청을 보내도록 환경 변수 설정"""
+    os.environ.update(benchmark_environment(endpoint))
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def latency_summary(latencies):
+    return {f"p{q}_ms": round(percentile(latencies, q) * 1000, 2) for q in (50, 90, 99)}
+
+
+def request_summary(server):
+    return {
+        'requests': dict(server.requests),
+        'total_requests': sum(server.requests.values()),
+        'bytes_sent': server.bytes_received,
+        'connections': len(server.connections),
+    }
+
+
+def run_stream_benchmark(server, batches, batch_size, seed=42, quiet=True, http_compress=None, keep_alive=None):
+    """합성 스트림 배치를 index.handler 로 처리 (http_compress / keep_alive 가 None 이면 핸들러 설정 그대로)"""
+    configure_environment(server.endpoint)
+    import index
+    if http_compress is not None:
+        index.HTTP_COMPRESS = http_compress
+    if keep_alive is not None:
+        index.KEEP_ALIVE = keep_alive
+    # 설정을 바꿨을 수 있으므로 cold start 처럼 클라이언트를 새로 만듦
+    index._client = None
+
+    generator = StreamGenerator(seed)
+    events = [generator.batch(batch_size) for _ in range(batches)]
+    server.reset_stats()
+
+    latencies = []
+    output = io.StringIO() if quiet else sys.stdout
+    with contextlib.redirect_stdout(output):
+        started = time.perf_counter()
+        for event in events:
+            batch_started = time.perf_counter()
+            index.handler(event, None)
+            latencies.append(time.perf_counter() - batch_started)
+        elapsed = time.perf_counter() - started
+
+    records = batches * batch_size
+    return {
+        'records': records,
+        'seconds': round(elapsed, 3),
+        'records_per_sec': round(records / elapsed, 1),
+        'batch_latency': latency_summary(latencies),
+        **request_summary(server),
+    }
+
+
+def run_migration_benchmark(server, items, segments, page_size, seed=42, quiet=True,
+                            http_compress=True, keep_alive=True, **options):
+    """합성 테이블을 migration.migrate_data 로 백필"""
+    configure_environment(server.endpoint)
+    import migration
+
+    table = SyntheticTable(items, seed)
+    client = migration.create_opensearch_client(
+        pool_maxsize=options.get('indexers', migration.INDEXERS), endpoint=server.endpoint,
+        http_compress=http_compress, keep_alive=keep_alive)
+    server.reset_stats()
+
+    output = io.StringIO() if quiet else sys.stdout
+    with contextlib.redirect_stdout(output):
+        started = time.perf_counter()
+        migration.migrate_data(total_segments=segments, page_size=page_size, target_rate=1e9,
+                               dynamodb=table, opensearch_client=client, **options)
+        elapsed = time.perf_counter() - started
+
+    return {
+        'records': items,
+        'seconds': round(elapsed, 3),
+        'records_per_sec': round(items / elapsed, 1),
+        'scan_calls': table.scan_calls,
+        **request_summary(server),
+    }
+
+
+def print_report(name, result):
+    print(f"\n[{name}]")
+    print(f"  records:        {result['records']} in {result['seconds']}s")
+    print(f"  throughput:     {result['records_per_sec']} records/s")
+    if 'batch_latency' in result:
+        latency = result['batch_latency']
+        print(f"  batch latency:  p50 {latency['p50_ms']}ms, p90 {latency['p90_ms']}ms, p99 {latency['p99_ms']}ms")
+    print(f"  requests:       {result['total_requests']} ({result['connections']} connections, "
+          f"{result['bytes_sent']} bytes)")
+    for request, count in sorted(result['requests'].items()):
+        print(f"    {request}: {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 수집 경로 벤치마크")
+    parser.add_argument('--batches', type=int, default=50, help="스트림 배치 수")
+    parser.add_argument('--batch-size', type=int, default=100, help="배치 당 스트림 레코드 수")
+    parser.add_argument('--items', type=int, default=5000, help="백필할 테이블 아이템 수")
+    parser.add_argument('--segments', type=int, default=4, help="백필 스캔 세그먼트 수")
+    parser.add_argument('--page-size', type=int, default=100, help="백필 스캔 페이지 크기")
+    parser.add_argument('--latency-ms', type=float, default=2, help="가짜 엔드포인트의 요청 당 지연 시간")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help="결과를 JSON 으로 출력")
+    args = parser.parse_args()
+
+    server = FakeOpenSearchServer(latency_ms=args.latency_ms).start()
+    try:
+        results = {
+            'stream': run_stream_benchmark(server, args.batches, args.batch_size, args.seed),
+            'migration': run_migration_benchmark(server, args.items, args.segments, args.page_size, args.seed),
+        }
+    finally:
+        server.stop()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, result in results.items():
+            print_report(name, result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""동기화 Lambda 메모리 설정 별 1k 레코드 당 비용 추정 (power tuning)
+
+고정된 합성 스트림 배치를 새 파이썬 프로세스에서 index.handler 로 처리해 배치마다 벽시계 시간과
+CPU 시간을 재고, Lambda 가 메모리에 비례해 CPU 를 배정하는 것(1,769MB 에서 vCPU 1개)을 흉내내
+메모리 설정 별 실행 시간, 과금 시간, 비용을 계산한다.
+
+    실행 시간(M) = CPU 시간 / min(M / 1769, 1) + (벽시계 시간 - CPU 시간)
+
+I/O 대기(가짜 OpenSearch 지연, --latency-ms)는 메모리와 상관없이 그대로 더한다.
+측정한 최대 RSS 보다 작은 메모리 설정은 OOM 으로 표시한다.
+실제 함수로 확인하려면 AWS Lambda Power Tuning 을 같은 메모리 목록으로 실행한다.
+
+    python benchmarks/power_tuning_bench.py --batches 50 --batch-size 100 --memory 256 512 1024 1769
+"""
+import os
+import sys
+import json
+import math
+import argparse
+import subprocess
+
+from fake_opensearch import FakeOpenSearchServer
+from ingest_bench import configure_environment, percentile
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dynamodb_to_opensearch')
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+MEMORY_SIZES = (128, 256, 512, 1024, 1769, 3008)
+FULL_VCPU_MEMORY = 1769  # MB, 이 메모리에서 vCPU 1개
+# 서울 리전 요금 (USD): GB-초 당 요금과 요청 100만 건 당 요금
+PRICES = {
+    'arm64': {'gb_second': 0.0000133334, 'million_requests': 0.20},
+    'x86_64': {'gb_second': 0.0000166667, 'million_requests': 0.20},
+}
+
+# 자식 프로세스에서 실행: Init 과 배치 별 (벽시계 시간, CPU 시간), 최대 RSS 를 JSON 으로 출력
+CHILD_SCRIPT = """
+import io, sys, json, time, resource, contextlib
+started, cpu_started = time.perf_counter(), time.process_time()
+import index
+init = (time.perf_counter() - started, time.process_time() - cpu_started)
+sys.path.insert(0, {benchmark_dir!r})
+from synthetic import StreamGenerator
+generator = StreamGenerator({seed})
+events = [generator.batch({batch_size}) for _ in range({batches})]
+batches = []
+with contextlib.redirect_stdout(io.StringIO()):
+    for event in events:
+        started, cpu_started = time.perf_counter(), time.process_time()
+        index.handler(event, None)
+        batches.append((time.perf_counter() - started, time.process_time() - cpu_started))
+max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({{'init': init, 'batches': batches, 'max_rss_mb': max_rss_mb}}))
+"""
+
+
+def measure_workload(batches, batch_size, seed=42):
+    script = CHILD_SCRIPT.format(benchmark_dir=BENCHMARK_DIR, seed=seed, batches=batches, batch_size=batch_size)
+    result = subprocess.run([sys.executable, '-c', script], cwd=SOURCE_DIR, env=os.environ.copy(),
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def simulated_duration(wall, cpu, memory_mb):
+    """메모리 설정에 따른 CPU 배분을 반영한 실행 시간 (초)"""
+    cpu_share = min(memory_mb / FULL_VCPU_MEMORY, 1.0)
+    return cpu / cpu_share + max(wall - cpu, 0.0)
+
+
+def estimate_cost(workload, memory_mb, records, architecture='arm64', timeout_ms=30000):
+    prices = PRICES[architecture]
+    durations = [simulated_duration(wall, cpu, memory_mb) * 1000 for wall, cpu in workload['batches']]
+    billed_ms = sum(math.ceil(duration) for duration in durations)
+    cost = (billed_ms / 1000 * memory_mb / 1024 * prices['gb_second']
+            + len(durations) * prices['million_requests'] / 1e6)
+    return {
+        'memory_mb': memory_mb,
+        'oom': workload['max_rss_mb'] > memory_mb,
+        'init_ms': round(simulated_duration(*workload['init'], memory_mb) * 1000, 1),
+        'p50_ms': round(percentile(durations, 50), 1),
+        'p90_ms': round(percentile(durations, 90), 1),
+        'timeouts': sum(1 for duration in durations if duration > timeout_ms),
+        'billed_ms': billed_ms,
+        'usd_per_1k_records': round(cost / records * 1000, 8),
+    }
+
+
+def run_power_tuning_benchmark(server, batches, batch_size, memory_sizes=MEMORY_SIZES, architecture='arm64',
+                               seed=42):
+    configure_environment(server.endpoint)
+    workload = measure_workload(batches, batch_size, seed)
+    records = batches * batch_size
+    return {
+        'records': records,
+        'architecture': architecture,
+        'max_rss_mb': round(workload['max_rss_mb'], 1),
+        'settings': [estimate_cost(workload, memory_mb, records, architecture) for memory_mb in memory_sizes],
+    }
+
+
+def print_report(result):
+    print(f"\n[power tuning] {result['records']} records, {result['architecture']}, "
+          f"max RSS {result['max_rss_mb']}MB")
+    print(f"{'memory MB':>10}{'init ms':>10}{'p50 ms':>10}{'p90 ms':>10}{'timeouts':>10}{'USD / 1k records':>20}")
+    cheapest = min((setting for setting in result['settings'] if not setting['oom']),
+                   key=lambda setting: setting['usd_per_1k_records'], default=None)
+    for setting in result['settings']:
+        note = ' OOM' if setting['oom'] else (' <- cheapest' if setting is cheapest else '')
+        print(f"{setting['memory_mb']:>10}{setting['init_ms']:>10}{setting['p50_ms']:>10}{setting['p90_ms']:>10}"
+              f"{setting['timeouts']:>10}{setting['usd_per_1k_records']:>20.8f}{note}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="메모리 설정 별 1k 레코드 당 비용 추정")
+    parser.add_argument('--batches', type=int, default=50, help="스트림 배치 수")
+    parser.add_argument('--batch-size', type=int, default=100, help="배치 당 스트림 레코드 수")
+    parser.add_argument('--memory', type=int, nargs='+', default=list(MEMORY_SIZES), help="비교할 메모리 설정 (MB)")
+    parser.add_argument('--architecture', choices=sorted(PRICES), default='arm64')
+    parser.add_argument('--latency-ms', type=float, default=5, help="가짜 엔드포인트의 요청 당 지연 시간")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help="결과를 JSON 으로 출력")
+    args = parser.parse_args()
+
+    server = FakeOpenSearchServer(latency_ms=args.latency_ms).start()
+    try:
+        result = run_power_tuning_benchmark(server, args.batches, args.batch_size, args.memory,
+                                            args.architecture, args.seed)
+    finally:
+        server.stop()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""벤치마크용 합성 메모 / DynamoDB 스트림 이벤트 / Scan 페이지 생성"""
+import random
+
+KOREAN_WORDS = [
+    '회의', '일정', '정리', '아이디어', '프로젝트', '배포', '검색', '메모', '요약', '데이터',
+    '서버', '성능', '개선', '테스트', '문서', '설계', '리뷰', '장애', '대응', '공유',
+    '다음', '주간', '보고', '고객', '요청', '기능', '추가', '수정', '확인', '완료',
+]
+ENGLISH_WORDS = [
+    'meeting', 'deploy', 'search', 'index', 'latency', 'throughput', 'lambda', 'stream',
+    'opensearch', 'dynamodb', 'bedrock', 'summary', 'review', 'design', 'release', 'bugfix',
+    'cache', 'query', 'memo', 'backlog', 'metric', 'alarm', 'dashboard', 'roadmap',
+]
+PREFIXES = ['📝', '💡', '📌', '✅', '🔥', '📚', '']
+
+
+class MemoGenerator:
+    """실제 메모와 비슷한 크기 분포(짧은 메모 위주, 긴 마크다운 일부)의 메모 생성기"""
+
+    def __init__(self, seed=42, korean_ratio=0.6):
+        self.random = random.Random(seed)
+        self.korean_ratio = korean_ratio
+        self.counter = 0
+        self.clock = 1700000000000
+
+    def words(self, count):
+        words = []
+        for _ in range(count):
+            pool = KOREAN_WORDS if self.random.random() < self.korean_ratio else ENGLISH_WORDS
+            words.append(self.random.choice(pool))
+        return ' '.join(words)
+
+    def content(self):
+        # 대부분 수백 자, 일부는 수천~수만 자의 마크다운
+        length = int(min(self.random.lognormvariate(6.5, 1.0), 40000))
+        paragraphs = []
+        while sum(len(p) for p in paragraphs) < length:
+            kind = self.random.random()
+            if kind < 0.15:
+                paragraphs.append(f"## {self.words(self.random.randint(2, 5))}")
+            elif kind < 0.35:
+                paragraphs.append('\n'.join(f"- {self.words(self.random.randint(3, 8))}"
+                                            for _ in range(self.random.randint(2, 6))))
+            elif kind < 0.4:
+                paragraphs.append(f"```\n{self.words(self.random.randint(5, 15))}\n```")
+            else:
+                paragraphs.append(self.words(self.random.randint(10, 60)))
+        return '\n\n'.join(paragraphs)
+
+    def memo_id(self):
+        self.counter += 1
+        return f"memo-{self.counter:08d}"
+
+    def image(self, memo_id=None):
+        """DynamoDB 속성 형식의 메모 아이템"""
+        self.clock += self.random.randint(1, 5000)
+        tags = [self.words(1) for _ in range(self.random.randint(0, 5))]
+        files = [{'M': {'fileName': {'S': f"file-{i}.png"}}} for i in range(self.random.randint(0, 2))]
+        return {
+            'id': {'S': memo_id or self.memo_id()},
+            'title': {'S': self.words(self.random.randint(2, 8))},
+            'content': {'S': self.content()},
+            'summary': {'S': self.words(self.random.randint(10, 25))},
+            'tags': {'L': [{'S': tag} for tag in tags]},
+            'prefix': {'S': self.random.choice(PREFIXES)},
+            'priority': {'N': str(self.random.choice([0, 0, 0, 1]))},
+            'files': {'L': files},
+            'fileCount': {'N': str(len(files))},
+            'gsiPartitionKey': {'S': 'ALL'},
+            'createdAt': {'N': str(self.clock)},
+            'updatedAt': {'N': str(self.clock)},
+        }
+
+    def modified(self, image):
+        """자동 저장처럼 일부 필드만 바뀐 새 이미지"""
+        new_image = dict(image)
+        self.clock += self.random.randint(1, 5000)
+        kind = self.random.random()
+        if kind < 0.6:
+            new_image['content'] = {'S': image['content']['S'] + ' ' + self.words(self.random.randint(1, 10))}
+        elif kind < 0.8:
+            new_image['title'] = {'S': self.words(self.random.randint(2, 8))}
+        elif kind < 0.9:
+            new_image['priority'] = {'N': '1' if image['priority']['N'] == '0' else '0'}
+        else:
+            # 검색 필드가 아닌 속성만 바뀌는 업데이트
+            new_image['fileCount'] = {'N': str(int(image['fileCount']['N']) + 1)}
+            return new_image
+        new_image['updatedAt'] = {'N': str(self.clock)}
+        return new_image
+
+
+class StreamGenerator:
+    """INSERT / MODIFY / REMOVE 가 섞인 DynamoDB 스트림 배치 생성기
+
+    같은 메모의 연속 MODIFY(자동 저장) 와 INSERT 후 REMOVE 도 포함한다.
+    """
+
+    def __init__(self, seed=42, insert_ratio=0.3, remove_ratio=0.05, hot_ratio=0.3):
+        self.memos = MemoGenerator(seed)
+        self.random = self.memos.random
+        self.insert_ratio = insert_ratio
+        self.remove_ratio = remove_ratio
+        self.hot_ratio = hot_ratio
+        self.live = {}
+        self.sequence_number = 100000000000000000000
+
+    def record(self, event_name, memo_id, old_image=None, new_image=None):
+        self.sequence_number += 1
+        dynamodb = {
+            'ApproximateCreationDateTime': self.memos.clock / 1000,
+            'Keys': {'id': {'S': memo_id}},
+            'SequenceNumber': str(self.sequence_number),
+            'StreamViewType': 'NEW_AND_OLD_IMAGES',
+        }
+        if old_image:
+            dynamodb['OldImage'] = old_image
+        if new_image:
+            dynamodb['NewImage'] = new_image
+        size = len(str(old_image or '')) + len(str(new_image or ''))
+        dynamodb['SizeBytes'] = size
+        return {
+            'eventID': f"event-{self.sequence_number}",
+            'eventName': event_name,
+            'eventSource': 'aws:dynamodb',
+            'awsRegion': 'ap-northeast-2',
+            'dynamodb': dynamodb,
+        }
+
+    def next_record(self, recent_ids):
+        roll = self.random.random()
+        if not self.live or roll < self.insert_ratio:
+            image = self.memos.image()
+            self.live[image['id']['S']] = image
+            return self.record('INSERT', image['id']['S'], new_image=image)
+
+        # 같은 배치에서 최근에 수정한 메모를 다시 수정하는 비율 (자동 저장)
+        if recent_ids and self.random.random() < self.hot_ratio:
+            memo_id = self.random.choice(recent_ids)
+        else:
+            memo_id = self.random.choice(list(self.live))
+
+        old_image = self.live[memo_id]
+        if roll > 1 - self.remove_ratio:
+            del self.live[memo_id]
+            return self.record('REMOVE', memo_id, old_image=old_image)
+
+        new_image = self.memos.modified(old_image)
+        self.live[memo_id] = new_image
+        return self.record('MODIFY', memo_id, old_image=old_image, new_image=new_image)
+
+    def batch(self, size):
+        """Lambda 가 받는 형태의 스트림 이벤트 {'Records': [...]}"""
+        records, recent_ids = [], []
+        for _ in range(size):
+            record = self.next_record(recent_ids)
+            records.append(record)
+            if record['eventName'] == 'REMOVE':
+                recent_ids = [memo_id for memo_id in recent_ids if memo_id in self.live]
+            else:
+                recent_ids.append(record['dynamodb']['Keys']['id']['S'])
+        return {'Records': records}
+
+
+class SyntheticTable:
+    """Segment/TotalSegments 와 페이지네이션을 지원하는 메모리 내 DynamoDB Scan 대역"""
+
+    def __init__(self, count, seed=42):
+        memos = MemoGenerator(seed)
+        self.items = [memos.image() for _ in range(count)]
+        self.scan_calls = 0
+
+    def scan(self, TableName, Limit, Segment=0, TotalSegments=1, ExclusiveStartKey=None, **kwargs):
+        self.scan_calls += 1
+        start = int(ExclusiveStartKey['offset']['N']) if ExclusiveStartKey else Segment
+        page, position = [], start
+        while position < len(self.items) and len(page) < Limit:
+            page.append(self.items[position])
+            position += TotalSegments
+
+        response = {'Items': page, 'Count': len(page), 'ScannedCount': len(page)}
+        if position < len(self.items):
+            response['LastEvaluatedKey'] = {'offset': {'N': str(position)}}
+        return response
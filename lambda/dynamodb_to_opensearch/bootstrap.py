@@ -0,0 +1,30 @@
+"""next_memo 인덱스 부트스트랩 (배포 시 한 번)
+
+스트림 핸들러는 인덱스가 있다고 가정하므로 인덱스와 매핑(next_memo_v1 + next_memo 별칭)은 여기서 만든다.
+CDK 커스텀 리소스(on_event)로 배포 때 실행되며, 로컬에서 직접 실행할 수도 있다.
+
+    python bootstrap.py
+"""
+import sys
+import index
+
+
+def on_event(event, context):
+    """CloudFormation 커스텀 리소스 핸들러 (Provider 프레임워크)
+
+    Create/Update 에서 인덱스가 없으면 만들고, Delete 에서는 색인된 데이터를 지우지 않는다.
+    """
+    request_type = event['RequestType']
+    print(f"{request_type} index bootstrap for {index.COLLECTION_NAME}")
+    if request_type in ('Create', 'Update'):
+        if not index.create_index_if_not_exists(index.get_opensearch_client()):
+            raise RuntimeError(f"Index {index.COLLECTION_NAME} is not ready")
+    return {'PhysicalResourceId': index.COLLECTION_NAME}
+
+
+if __name__ == "__main__":
+    # 로컬 실행에서만 필요한 migration(boto3 포함)은 커스텀 리소스 cold start 에서 불러오지 않음
+    import migration
+
+    if not migration.create_index_if_not_exists(migration.create_opensearch_client()):
+        sys.exit(1)
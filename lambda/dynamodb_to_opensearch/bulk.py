@@ -0,0 +1,172 @@
+import os
+import json
+import zlib
+
+# _bulk 요청 하나에 담을 최대 action 수 / 바이트 크기
+MAX_BULK_ACTIONS = int(os.environ.get('BULK_MAX_ACTIONS', '500'))
+MAX_BULK_BYTES = int(os.environ.get('BULK_MAX_BYTES', str(5 * 1024 * 1024)))
+THROTTLED_STATUS = 429
+CONFLICT_STATUS = 409
+# 버전 조건 때문에 건너뛴 쓰기 (실패가 아니라 이미 더 새로운 문서가 색인되어 있음)
+STALE_WRITE = 'stale'
+# 메모의 updatedAt(ms) 을 외부 버전으로 사용 (같은 버전은 재시도로 보고 덮어씀)
+VERSION_TYPE = 'external_gte'
+# 모든 쓰기는 index / delete 로만 보낸다. update(_update) 는 외부 버전을 받지 않고 내부 _version 을 1 만 올리므로
+# 이후 external_gte 버전 비교가 updatedAt 이 아니라 올라간 _version 과 이뤄져 오래된 문서가 덮어쓸 수 있다
+
+
+def build_document(image):
+    """DynamoDB 이미지(NewImage / Scan 아이템)를 OpenSearch 문서로 변환"""
+    return {
+        'title': image['title']['S'],
+        'content': image['content']['S'],
+        'summary': image.get('summary', {}).get('S', ''),
+        'tags': [item.get('S', '') for item in image.get('tags', {}).get('L', [])],
+        'prefix': image.get('prefix', {}).get('S', ''),
+        'priority': int(image.get('priority', {}).get('N', '0')),
+        'updatedAt': int(image['updatedAt']['N'])
+    }
+
+
+def index_action(doc_id, document):
+    """문서 전체를 색인 (document 의 updatedAt 이 있으면 그 값을 외부 버전으로 사용)"""
+    return {'op': 'index', 'id': doc_id, 'doc': document, 'version': document.get('updatedAt')}
+
+
+def delete_action(doc_id, version=None):
+    """문서 삭제 (version 은 삭제 직전 이미지의 updatedAt, 이보다 새로운 문서는 지우지 않음)"""
+    return {'op': 'delete', 'id': doc_id, 'version': version}
+
+
+def serialize_action(action, index_name):
+    """action 하나를 NDJSON 라인으로 직렬화"""
+    meta = {'_index': index_name, '_id': action['id']}
+    if action.get('version') is not None:
+        meta.update(version=action['version'], version_type=VERSION_TYPE)
+    lines = json.dumps({action['op']: meta}, ensure_ascii=False) + '\n'
+    if action['op'] != 'delete':
+        lines += json.dumps(action['doc'], ensure_ascii=False) + '\n'
+    return lines.encode('utf-8')
+
+
+def chunk_actions(actions, index_name, max_actions=None, max_bytes=None):
+    """action 목록을 개수/바이트 제한에 맞춰 (positions, payload) 청크로 분할
+
+    positions 는 청크에 포함된 action 의 원래 인덱스이며, 응답 items 와 순서가 같다.
+    단일 action 이 max_bytes 를 넘으면 그 action 만 담은 청크로 보낸다.
+    """
+    max_actions = max_actions or MAX_BULK_ACTIONS
+    max_bytes = max_bytes or MAX_BULK_BYTES
+
+    positions, lines, size = [], [], 0
+    for position, action in enumerate(actions):
+        line = serialize_action(action, index_name)
+        if positions and (len(positions) >= max_actions or size + len(line) > max_bytes):
+            yield positions, b''.join(lines)
+            positions, lines, size = [], [], 0
+        positions.append(position)
+        lines.append(line)
+        size += len(line)
+
+    if positions:
+        yield positions, b''.join(lines)
+
+
+def parse_bulk_item(action, item):
+    """_bulk 응답 item 하나를 (성공 여부, 에러 메시지) 로 변환
+
+    버전 조건 때문에 거절된(409) 쓰기는 (True, STALE_WRITE) 이다.
+    """
+    result = item.get(action['op'], {})
+    status = result.get('status', 500)
+
+    # 이미 없는 문서를 삭제하는 것은 실패로 보지 않음
+    if action['op'] == 'delete' and status == 404:
+        return True, None
+    # 더 새로운 버전이 이미 색인되어 있어 거절된 쓰기
+    if status == CONFLICT_STATUS and action.get('version') is not None:
+        return True, STALE_WRITE
+    if 200 <= status < 300:
+        return True, None
+
+    error = result.get('error', {})
+    if isinstance(error, dict):
+        error = f"{error.get('type')}: {error.get('reason')}"
+    return False, f"status {status}, {error}"
+
+
+def send_bulk(client, actions, index_name, max_actions=None, max_bytes=None, metrics=None):
+    """action 목록을 _bulk 요청으로 전송하고 action 별 (성공 여부, 에러 메시지) 목록을 반환"""
+    return send_chunks(client, actions, chunk_actions(actions, index_name, max_actions, max_bytes), metrics)
+
+
+def partition_by_id(actions, partitions):
+    """action 위치를 문서 id 기준으로 partitions 개 그룹으로 나눔
+
+    같은 id 의 action 은 항상 같은 그룹에 원래(스트림) 순서대로 들어가므로,
+    그룹끼리 동시에 보내도 한 문서에 대한 쓰기 순서는 바뀌지 않는다.
+    """
+    groups = [[] for _ in range(max(1, partitions))]
+    for position, action in enumerate(actions):
+        groups[zlib.crc32(action['id'].encode('utf-8')) % len(groups)].append(position)
+    return [group for group in groups if group]
+
+
+def send_bulk_partitioned(client, actions, index_name, executor, partitions, metrics=None):
+    """문서 id 별로 나눈 그룹을 executor 에서 동시에 _bulk 전송하고 action 별 결과 목록을 반환
+
+    배치 지연 시간이 전체 action 수가 아니라 가장 느린 그룹의 요청 시간에 맞춰진다.
+    """
+    groups = partition_by_id(actions, partitions)
+    if len(groups) <= 1:
+        return send_bulk(client, actions, index_name, metrics=metrics)
+
+    def send(positions):
+        return send_bulk(client, [actions[position] for position in positions], index_name, metrics=metrics)
+
+    results = [(False, 'not sent')] * len(actions)
+    for positions, group_results in zip(groups, executor.map(send, groups)):
+        for position, result in zip(positions, group_results):
+            results[position] = result
+    return results
+
+
+def send_chunks(client, actions, chunks, metrics=None):
+    """chunk_actions 로 미리 만든 (positions, payload) 청크를 전송하고 action 별 결과 목록을 반환
+
+    metrics 가 주어지면 요청 수, 압축 전 payload 크기(PayloadBytes), 클라이언트가 실제로 보낸 크기(BytesSent)를 기록한다.
+    """
+    results = [(False, 'not sent')] * len(actions)
+
+    for positions, payload in chunks:
+        if metrics:
+            metrics.add('BulkRequests')
+            metrics.add('PayloadBytes', len(payload), 'Bytes')
+        try:
+            response = client.bulk(body=payload)
+        except Exception as e:
+            status = getattr(e, 'status_code', None)
+            error = f"status {status}, {str(e)}" if isinstance(status, int) else str(e)
+            for position in positions:
+                results[position] = (False, error)
+            continue
+        finally:
+            if metrics:
+                metrics.add('BytesSent', client.last_request_bytes, 'Bytes')
+
+        items = response.get('items', [])
+        for position, item in zip(positions, items):
+            results[position] = parse_bulk_item(actions[position], item)
+
+    return results
+
+
+def is_stale_write(result):
+    """send_bulk 결과가 버전 조건으로 건너뛴 쓰기인지 확인"""
+    return result == (True, STALE_WRITE)
+
+
+def is_throttled(error):
+    """send_bulk 의 에러 메시지가 OpenSearch 쓰로틀링(429) 인지 확인"""
+    return bool(error) and error.startswith(f"status {THROTTLED_STATUS},")
+
@@ -0,0 +1,54 @@
+import os
+import json
+import threading
+
+
+class MigrationCheckpoint:
+    """세그먼트별 스캔 진행 상황(LastEvaluatedKey, 처리/에러 수)과 처음 시작한 시각(epoch ms)을 로컬 파일에 저장"""
+
+    def __init__(self, path, total_segments, segments=None, started_at=None):
+        self.path = path
+        self.total_segments = total_segments
+        self.started_at = started_at
+        self.segments = segments or {
+            str(segment): {'last_evaluated_key': None, 'processed': 0, 'errors': 0, 'done': False}
+            for segment in range(total_segments)
+        }
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(path, data['total_segments'], data['segments'], data.get('started_at'))
+
+    def segment(self, segment):
+        with self._lock:
+            return dict(self.segments[str(segment)])
+
+    def commit_page(self, segment, last_evaluated_key, processed, errors):
+        """색인이 끝난 페이지까지의 진행 상황을 기록"""
+        with self._lock:
+            self.segments[str(segment)] = {
+                'last_evaluated_key': last_evaluated_key,
+                'processed': processed,
+                'errors': errors,
+                'done': not last_evaluated_key
+            }
+            self._save()
+
+    def is_complete(self):
+        with self._lock:
+            return all(state['done'] for state in self.segments.values())
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        # 저장 도중 중단되어도 이전 체크포인트가 깨지지 않도록 임시 파일 교체
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'total_segments': self.total_segments, 'segments': self.segments,
+                       'started_at': self.started_at}, f)
+        os.replace(tmp_path, self.path)
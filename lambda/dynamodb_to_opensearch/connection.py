@@ -0,0 +1,281 @@
+"""OpenSearch Serverless 용 경량 SigV4 HTTP 클라이언트
+
+Lambda cold start 를 줄이기 위해 opensearch-py / requests / requests-aws4auth / boto3 대신
+표준 라이브러리로 SigV4 서명을 하고 urllib3 커넥션 풀로 요청을 보낸다.
+핸들러와 마이그레이션 도구가 쓰는 opensearch-py API(bulk, search, indices.*, cluster.health)만 제공한다.
+"""
+import os
+import gzip
+import hmac
+import json
+import socket
+import hashlib
+import datetime
+import threading
+import http.client
+from urllib.parse import urlparse, quote
+import urllib3
+
+SERVICE = 'aoss'
+# 연결을 맺지 못한 경우만 모든 요청을 다시 시도하고, 요청을 보낸 뒤의 읽기 에러는 읽기 전용 요청만 재전송.
+# _bulk, _aliases, _refresh 같은 POST 는 서버에 반영됐을 수 있으므로 urllib3 가 다시 보내지 않는다
+# (풀에서 꺼낸 keep-alive 소켓이 이미 끊겨 있던 경우는 OpenSearchHttpClient._urlopen 이 한 번 재전송)
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD'})
+RETRIES = urllib3.Retry(total=2, connect=2, read=1, status=0, other=0, allowed_methods=IDEMPOTENT_METHODS,
+                        raise_on_status=False)
+# 압축률보다 CPU 시간이 중요한 Lambda 기준 (본문 JSON 은 레벨 1 에서도 대부분 압축됨)
+COMPRESS_LEVEL = 1
+# 풀에 남아 있는 유휴 연결이 NAT/로드밸런서에서 끊기지 않도록 TCP keepalive 사용
+KEEP_ALIVE_SOCKET_OPTIONS = urllib3.connection.HTTPConnection.default_socket_options + [
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+
+
+def is_stale_connection_error(error):
+    """응답을 한 바이트도 받기 전에 소켓이 끊겼는지 (서버가 닫은 keep-alive 연결에 요청을 보낸 경우)"""
+    reason = error.args[1] if isinstance(error, urllib3.exceptions.ProtocolError) and len(error.args) > 1 else None
+    return isinstance(reason, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError))
+
+
+class TransportError(Exception):
+    """OpenSearch 가 4xx/5xx 로 응답한 경우 (opensearch-py 의 TransportError 와 같은 status_code 속성)"""
+
+    def __init__(self, status_code, error):
+        super().__init__(f"TransportError({status_code}, {error})")
+        self.status_code = status_code
+        self.error = error
+
+
+def credential_provider():
+    """요청마다 (access_key, secret_key, token) 을 돌려주는 함수
+
+    Lambda 는 실행 역할 자격 증명을 환경 변수로 주므로 botocore 없이 읽는다.
+    환경 변수가 없을 때(로컬 프로파일, SSO 등)만 botocore 를 불러와 STS 임시 토큰을 자동 갱신한다.
+    """
+    if os.environ.get('AWS_ACCESS_KEY_ID'):
+        return lambda: (os.environ['AWS_ACCESS_KEY_ID'], os.environ['AWS_SECRET_ACCESS_KEY'],
+                        os.environ.get('AWS_SESSION_TOKEN'))
+
+    import botocore.session
+    credentials = botocore.session.get_session().get_credentials()
+
+    def provider():
+        frozen = credentials.get_frozen_credentials()
+        return frozen.access_key, frozen.secret_key, frozen.token
+    return provider
+
+
+def _hmac(key, message):
+    return hmac.new(key, message.encode('utf-8'), hashlib.sha256).digest()
+
+
+class SigV4Signer:
+    """AWS Signature Version 4 서명 (요청 본문 해시를 x-amz-content-sha256 헤더로 포함)"""
+
+    def __init__(self, region, service=SERVICE, credentials=None):
+        self.region = region
+        self.service = service
+        self.credentials = credentials or credential_provider()
+
+    def sign(self, method, host, path, query, headers, body, now=None):
+        access_key, secret_key, token = self.credentials()
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+        date_stamp = now.strftime('%Y%m%d')
+
+        headers = dict(headers)
+        headers['host'] = host
+        headers['x-amz-date'] = amz_date
+        headers['x-amz-content-sha256'] = hashlib.sha256(body or b'').hexdigest()
+        if token:
+            headers['x-amz-security-token'] = token
+
+        canonical_headers = {name.lower(): ' '.join(str(value).split()) for name, value in headers.items()}
+        signed_headers = ';'.join(sorted(canonical_headers))
+        canonical_query = '&'.join(
+            f"{quote(str(key), safe='-_.~')}={quote(str(value), safe='-_.~')}"
+            for key, value in sorted(query.items())
+        )
+        canonical_request = '\n'.join([
+            method,
+            quote(path or '/', safe='/-_.~'),
+            canonical_query,
+            ''.join(f"{name}:{canonical_headers[name]}\n" for name in sorted(canonical_headers)),
+            signed_headers,
+            headers['x-amz-content-sha256'],
+        ])
+
+        scope = f"{date_stamp}/{self.region}/{self.service}/aws4_request"
+        string_to_sign = '\n'.join([
+            'AWS4-HMAC-SHA256', amz_date, scope,
+            hashlib.sha256(canonical_request.encode('utf-8')).hexdigest(),
+        ])
+        key = _hmac(f"AWS4{secret_key}".encode('utf-8'), date_stamp)
+        key = _hmac(_hmac(_hmac(key, self.region), self.service), 'aws4_request')
+        signature = hmac.new(key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+
+        headers['Authorization'] = (f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, "
+                                    f"SignedHeaders={signed_headers}, Signature={signature}")
+        return headers
+
+
+class _Indices:
+    def __init__(self, client):
+        self.client = client
+
+    def exists(self, index):
+        status, _ = self.client.perform_request('HEAD', f"/{index}", ignore=(404,))
+        return status == 200
+
+    def create(self, index, body=None):
+        return self.client.perform_request('PUT', f"/{index}", body=body)[1]
+
+    def get(self, index):
+        """인덱스(와일드카드 가능) 이름 → 정보 dict, 없으면 빈 dict"""
+        status, data = self.client.perform_request('GET', f"/{index}", ignore=(404,))
+        return data if status == 200 else {}
+
+    def get_alias(self, name):
+        """별칭 이름 → {인덱스 이름: {'aliases': ...}}, 별칭이 없으면 빈 dict"""
+        status, data = self.client.perform_request('GET', f"/_alias/{name}", ignore=(404,))
+        return data if status == 200 else {}
+
+    def update_aliases(self, body):
+        """별칭 변경 action 들을 한 번에(원자적으로) 적용"""
+        return self.client.perform_request('POST', '/_aliases', body=body)[1]
+
+    def put_settings(self, index, body):
+        return self.client.perform_request('PUT', f"/{index}/_settings", body=body)[1]
+
+    def refresh(self, index):
+        return self.client.perform_request('POST', f"/{index}/_refresh")[1]
+
+    def delete(self, index):
+        return self.client.perform_request('DELETE', f"/{index}", ignore=(404,))[1]
+
+    def stats(self, index, metric=None):
+        path = f"/{index}/_stats/{metric}" if metric else f"/{index}/_stats"
+        return self.client.perform_request('GET', path)[1]
+
+
+class _Cluster:
+    def __init__(self, client):
+        self.client = client
+
+    def health(self, index=None, **params):
+        path = f"/_cluster/health/{index}" if index else "/_cluster/health"
+        return self.client.perform_request('GET', path, params=params)[1]
+
+
+class OpenSearchHttpClient:
+    """커넥션 풀(keep-alive)을 재사용하는 SigV4 OpenSearch 클라이언트
+
+    http_compress 면 요청 본문을 gzip 으로 압축하고, SigV4 서명은 압축된 본문(실제 전송 바이트)으로 계산한다.
+    keep_alive 가 False 면 요청마다 연결을 닫는다 (비교 측정용).
+    """
+
+    def __init__(self, endpoint, region, pool_maxsize=10, http_compress=False, keep_alive=True,
+                 timeout=30, signer=None):
+        url = urlparse(endpoint if '://' in endpoint else f"https://{endpoint}")
+        use_ssl = url.scheme == 'https'
+        default_port = 443 if use_ssl else 80
+        self.port = url.port or default_port
+        self.host = url.hostname if self.port == default_port else f"{url.hostname}:{self.port}"
+        self.signer = signer or SigV4Signer(region)
+        self.http_compress = http_compress
+        self.keep_alive = keep_alive
+
+        pool_class = urllib3.HTTPSConnectionPool if use_ssl else urllib3.HTTPConnectionPool
+        socket_options = KEEP_ALIVE_SOCKET_OPTIONS if keep_alive else None
+        self._create_pool = lambda: pool_class(url.hostname, self.port, maxsize=pool_maxsize, block=False,
+                                               timeout=urllib3.Timeout(connect=5, read=timeout), retries=RETRIES,
+                                               socket_options=socket_options)
+        self._pool_lock = threading.Lock()
+        self.pool = self._create_pool()
+        self._local = threading.local()
+        self.indices = _Indices(self)
+        self.cluster = _Cluster(self)
+
+    def perform_request(self, method, path, params=None, body=None, headers=None, ignore=()):
+        """요청을 서명해 보내고 (status, 응답 JSON) 을 반환 (4xx/5xx 는 ignore 에 없으면 TransportError)"""
+        params = params or {}
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body, ensure_ascii=False)
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+
+        headers = dict(headers or {})
+        if body is not None:
+            headers.setdefault('Content-Type', 'application/json')
+            if self.http_compress:
+                body = gzip.compress(body, compresslevel=COMPRESS_LEVEL)
+                headers['Content-Encoding'] = 'gzip'
+        if self.http_compress:
+            headers['Accept-Encoding'] = 'gzip'
+        if not self.keep_alive:
+            headers['Connection'] = 'close'
+        self._local.request_bytes = len(body) if body is not None else 0
+        signed = self.signer.sign(method, self.host, path, params, headers, body)
+        del signed['host']
+
+        url = path
+        if params:
+            url += '?' + '&'.join(f"{quote(str(k), safe='-_.~')}={quote(str(v), safe='-_.~')}"
+                                  for k, v in sorted(params.items()))
+        response = self._urlopen(method, url, body, signed)
+
+        data = None
+        if response.data and method != 'HEAD':
+            try:
+                data = json.loads(response.data)
+            except ValueError:
+                data = response.data.decode('utf-8', 'replace')
+        if response.status >= 400 and response.status not in ignore:
+            raise TransportError(response.status, data)
+        return response.status, data
+
+    @property
+    def last_request_bytes(self):
+        """이 스레드에서 마지막으로 보낸 요청 본문의 실제 전송 크기 (http_compress 면 gzip 압축 후)"""
+        return getattr(self._local, 'request_bytes', 0)
+
+    def _urlopen(self, method, url, body, headers):
+        """풀에서 꺼낸 연결이 이미 끊겨 있었으면 (Lambda freeze/thaw 뒤 등) 풀을 새로 만들어 한 번 재전송
+
+        새 연결을 만들지 않았는데(재사용한 소켓) 응답을 받기 전에 끊긴 경우만 다시 보내므로
+        서버가 요청을 처리하고 응답하던 중 끊긴 POST 는 재전송하지 않는다.
+        """
+        pool = self.pool
+        connections = pool.num_connections
+        try:
+            return pool.urlopen(method, url, body=body, headers=headers, preload_content=True)
+        except urllib3.exceptions.ProtocolError as e:
+            if pool.num_connections != connections or not is_stale_connection_error(e):
+                raise
+            print(f"Resending {method} {url.split('?')[0]} on a new connection: {str(e)}")
+        self._reset_pool(pool)
+        return self.pool.urlopen(method, url, body=body, headers=headers, preload_content=True)
+
+    def _reset_pool(self, stale_pool):
+        """stale_pool 에 남은 유휴 연결(모두 끊겼을 가능성이 큼)을 버리고 새 풀로 교체"""
+        with self._pool_lock:
+            if self.pool is stale_pool:
+                self.pool = self._create_pool()
+                stale_pool.close()
+
+    def search(self, index, body):
+        return self.perform_request('POST', f"/{index}/_search", body=body)[1]
+
+    def bulk(self, body, index=None, params=None):
+        path = f"/{index}/_bulk" if index else "/_bulk"
+        return self.perform_request('POST', path, params=params, body=body,
+                                    headers={'Content-Type': 'application/x-ndjson'})[1]
+
+
+def create_opensearch_client(endpoint, region, pool_maxsize=10, http_compress=False, keep_alive=True):
+    """OpenSearch Serverless 엔드포인트(https://...)용 SigV4 클라이언트 생성
+
+    로컬 벤치마크처럼 http:// 엔드포인트와 포트도 받을 수 있다.
+    """
+    return OpenSearchHttpClient(endpoint, region, pool_maxsize=pool_maxsize,
+                                http_compress=http_compress, keep_alive=keep_alive)
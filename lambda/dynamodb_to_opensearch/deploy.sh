@@ -1,6 +1,7 @@
-python3 -m pip install -r requirements.txt -t ./packages/
+python3 -m pip install -r requirements.txt -t ./packages/ \
+    --platform manylinux2014_aarch64 --implementation cp --python-version 3.12 --only-binary=:all:
 
 LAMBDA_FUNC="NextMemoDataStack-DynamoToOpenSearchFunction9B05FD-Lk43b1d7r4O8"
-zip -rq lambda.zip . -x *__pycache__* 2zip.sh env.sh requirements.txt CONFIG
+zip -rq lambda.zip . -x *__pycache__* 2zip.sh env.sh requirements.txt CONFIG "migration-checkpoint.json*" "reindex-*.json*" "sync-watermark.json*"
 aws lambda update-function-code --function-name $LAMBDA_FUNC --zip-file fileb://lambda.zip > /dev/null 2>&1
 rm lambda.zip
@@ -0,0 +1,139 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+EMBEDDING_ENABLED = os.environ.get('EMBEDDING_ENABLED', 'false') == 'true'
+EMBEDDING_MODEL_ID = 'amazon.titan-embed-text-v2:0'
+EMBEDDING_DIMENSION = int(os.environ.get('EMBEDDING_DIMENSION', '1024'))
+EMBEDDING_CONCURRENCY = int(os.environ.get('EMBEDDING_CONCURRENCY', '4'))
+EMBEDDING_CACHE_SIZE = int(os.environ.get('EMBEDDING_CACHE_SIZE', '1024'))
+# Titan v2 입력 제한은 8,192 토큰이고 한국어는 글자 당 한 토큰 이상이므로 글자 수를 그보다 작게 자름
+EMBEDDING_MAX_CHARS = int(os.environ.get('EMBEDDING_MAX_CHARS', '8000'))
+# 그래도 토큰 제한을 넘으면(ValidationException) 입력을 절반으로 줄여 다시 호출, 이보다 짧아지면 포기
+EMBEDDING_MIN_CHARS = 500
+
+_bedrock = None
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_bedrock_client():
+    """warm 호출 간에 재사용하는 Bedrock Runtime 클라이언트"""
+    global _bedrock
+    if _bedrock is None:
+        # boto3 는 임베딩을 켰을 때만 필요하므로 cold start 에서 불러오지 않음
+        import boto3
+        region = os.environ.get('BEDROCK_REGION') or os.environ.get('REGION')
+        _bedrock = boto3.client('bedrock-runtime', region_name=region)
+    return _bedrock
+
+
+def embedding_text(document):
+    """임베딩 대상 텍스트 (제목, 요약, 본문)"""
+    parts = [document.get('title', ''), document.get('summary', ''), document.get('content', '')]
+    return '\n'.join(part for part in parts if part)[:EMBEDDING_MAX_CHARS]
+
+
+def content_hash(text):
+    key = f"{EMBEDDING_MODEL_ID}:{EMBEDDING_DIMENSION}:{text}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def _cache_get(key):
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    return None
+
+
+def _cache_put(key, vector):
+    with _cache_lock:
+        _cache[key] = vector
+        _cache.move_to_end(key)
+        while len(_cache) > EMBEDDING_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def is_input_too_long(error):
+    """Bedrock 이 입력을 거절했는지 (botocore ClientError 의 ValidationException) 확인"""
+    return getattr(error, 'response', {}).get('Error', {}).get('Code') == 'ValidationException'
+
+
+def invoke_embedding(client, text):
+    """Titan 임베딩 호출 (토큰 제한을 넘으면 입력 앞부분만 남기고 다시 호출)"""
+    while True:
+        try:
+            response = client.invoke_model(
+                modelId=EMBEDDING_MODEL_ID,
+                contentType='application/json',
+                accept='application/json',
+                body=json.dumps({'inputText': text, 'dimensions': EMBEDDING_DIMENSION, 'normalize': True})
+            )
+        except Exception as e:
+            if not is_input_too_long(e) or len(text) // 2 < EMBEDDING_MIN_CHARS:
+                raise
+            text = text[:len(text) // 2]
+            continue
+        return json.loads(response['body'].read())['embedding']
+
+
+def get_embedding(text, client=None):
+    """content hash 로 캐시된 임베딩을 반환하고, 없으면 Bedrock 을 호출"""
+    key = content_hash(text)
+    vector = _cache_get(key)
+    if vector is None:
+        vector = invoke_embedding(client or get_bedrock_client(), text)
+        _cache_put(key, vector)
+    return key, vector
+
+
+def reuse_indexed_embeddings(actions, indexed):
+    """색인된 문서의 임베딩을 캐시에 넣어, 텍스트가 그대로인 문서는 Bedrock 을 다시 호출하지 않게 하고 재사용 수를 반환
+
+    indexed 는 문서 id 별로 색인된 {'embedding', 'embeddingHash'} 이며, embeddingHash 가 지금 텍스트의
+    content hash 와 같을 때만 재사용한다 (임베딩 없이 색인된 문서는 새로 만든다).
+    """
+    reused = 0
+    for action in actions:
+        source = indexed.get(action['id']) or {}
+        text = embedding_text(action['doc']) if action['op'] == 'index' else ''
+        if text and source.get('embedding') and source.get('embeddingHash') == content_hash(text):
+            _cache_put(source['embeddingHash'], source['embedding'])
+            reused += 1
+    return reused
+
+
+def embed_actions(actions, client=None, concurrency=None):
+    """index action 문서에 embedding / embeddingHash 를 채우고 action 별 에러 메시지 목록을 반환
+
+    같은 텍스트는 한 번만 Bedrock 을 호출하며, 호출은 concurrency 개까지 동시에 실행한다.
+    """
+    errors = [None] * len(actions)
+    texts = {}
+    for position, action in enumerate(actions):
+        text = embedding_text(action['doc']) if action['op'] == 'index' else ''
+        if text:
+            texts.setdefault(text, []).append(position)
+    if not texts:
+        return errors
+
+    client = client or get_bedrock_client()
+    with ThreadPoolExecutor(max_workers=concurrency or EMBEDDING_CONCURRENCY) as executor:
+        futures = {text: executor.submit(get_embedding, text, client) for text in texts}
+
+    for text, future in futures.items():
+        try:
+            key, vector = future.result()
+        except Exception as e:
+            for position in texts[text]:
+                errors[position] = f"Error creating embedding: {str(e)}"
+            continue
+        for position in texts[text]:
+            actions[position]['doc']['embedding'] = vector
+            actions[position]['doc']['embeddingHash'] = key
+
+    return errors
@@ -1,41 +1,85 @@
 import sys, os
 import time
-import json
-import boto3
-from opensearchpy import OpenSearch, RequestsHttpConnection
-from requests_aws4auth import AWS4Auth
 from concurrent.futures import ThreadPoolExecutor
 
+# 배포 패키지의 packages/ 를 먼저 찾도록 서드파티 모듈을 불러오기 전에 경로 추가
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'packages'))
 
+import connection
+from bulk import build_document, index_action, delete_action, send_bulk_partitioned, is_stale_write
+from embedding import EMBEDDING_ENABLED, embedding_text, embed_actions, reuse_indexed_embeddings
+from mapping import build_index_body, versioned_index_name
+from metrics import InvocationMetrics
+
 COLLECTION_NAME = "next_memo"
 MAX_RETRIES = 10
 RETRY_DELAY = 2  # seconds
+POOL_MAXSIZE = int(os.environ.get('OPENSEARCH_POOL_MAXSIZE', '10'))
+HTTP_COMPRESS = os.environ.get('OPENSEARCH_HTTP_COMPRESS', 'true') == 'true'
+KEEP_ALIVE = os.environ.get('OPENSEARCH_KEEP_ALIVE', 'true') == 'true'
+# 배치를 메모 id 별로 나눠 동시에 보낼 최대 _bulk 요청 수 (커넥션 풀 크기 이하)
+WRITE_CONCURRENCY = int(os.environ.get('WRITE_CONCURRENCY', '4'))
+# 요청 수를 늘리는 비용보다 이득이 클 때만 나누도록 파티션 당 최소 action 수
+MIN_PARTITION_ACTIONS = int(os.environ.get('MIN_PARTITION_ACTIONS', '50'))
+# 남은 실행 시간이 이보다 적으면 새 단계를 시작하지 않고 남은 레코드를 실패로 보고 (진행 중인 _bulk 와 지표 기록 여유)
+DEADLINE_MARGIN_MS = int(os.environ.get('DEADLINE_MARGIN_MS', '5000'))
+DEADLINE_ERROR = 'deadline exceeded'
 
+# warm 호출 간에 재사용하는 클라이언트 (커넥션 풀과 SigV4 인증 포함)
+_client = None
+_write_executor = None
 
-def get_aws_auth():
-    credentials = boto3.Session().get_credentials()
-    region = os.environ['REGION']
-    return AWS4Auth(
-        credentials.access_key,
-        credentials.secret_key,
-        region,
-        'aoss',
-        session_token=credentials.token
-    )
 
 def create_opensearch_client():
-    host = os.environ['OPENSEARCH_ENDPOINT'].replace('https://', '')
-    region = os.environ['REGION']
-    
-    return OpenSearch(
-        hosts=[{'host': host, 'port': 443}],
-        http_auth=get_aws_auth(),
-        use_ssl=True,
-        verify_certs=True,
-        connection_class=RequestsHttpConnection
+    return connection.create_opensearch_client(
+        os.environ['OPENSEARCH_ENDPOINT'],
+        os.environ['REGION'],
+        pool_maxsize=POOL_MAXSIZE,
+        http_compress=HTTP_COMPRESS,
+        keep_alive=KEEP_ALIVE
     )
 
+def get_opensearch_client():
+    """모듈 단위로 캐시된 클라이언트를 반환 (cold start 시 한 번만 생성)"""
+    global _client
+    if _client is None:
+        _client = create_opensearch_client()
+    return _client
+
+def get_write_executor():
+    """warm 호출 간에 재사용하는 _bulk 쓰기 워커 풀"""
+    global _write_executor
+    if _write_executor is None:
+        _write_executor = ThreadPoolExecutor(max_workers=WRITE_CONCURRENCY, thread_name_prefix='bulk-write')
+    return _write_executor
+
+def write_actions(client, actions, metrics, index_name=COLLECTION_NAME):
+    """action 을 메모 id 별 파티션으로 나눠 동시에 색인 (같은 메모의 쓰기 순서는 유지)"""
+    partitions = min(WRITE_CONCURRENCY, len(actions) // MIN_PARTITION_ACTIONS)
+    if partitions > 1:
+        metrics.add('WritePartitions', partitions)
+    return send_bulk_partitioned(client, actions, index_name, get_write_executor(), partitions, metrics=metrics)
+
+def invocation_deadline(context):
+    """새 단계를 시작하지 않아야 하는 시각 (time.monotonic 기준), Lambda 컨텍스트가 없으면 None"""
+    if context is None or not hasattr(context, 'get_remaining_time_in_millis'):
+        return None
+    return time.monotonic() + (context.get_remaining_time_in_millis() - DEADLINE_MARGIN_MS) / 1000
+
+def past_deadline(deadline):
+    return deadline is not None and time.monotonic() >= deadline
+
+def defer_actions(action_positions, results, metrics):
+    """시간이 부족해 처리하지 못한 action 의 레코드를 실패로 기록 (다음 호출에서 재시도됨)"""
+    deferred = 0
+    for positions in action_positions:
+        for position in positions:
+            results[position] = (False, DEADLINE_ERROR)
+            deferred += 1
+    print(f"Deferring {deferred} records to the next invocation: remaining time is below {DEADLINE_MARGIN_MS}ms")
+    metrics.add('DeadlineDeferredRecords', deferred)
+    return [], []
+
 def wait_for_index_ready(client, index_name):
     """인덱스가 생성되고 사용 가능한 상태가 될 때까지 대기"""
     for attempt in range(MAX_RETRIES):
@@ -59,130 +103,203 @@ def wait_for_index_ready(client, index_name):
     print(f"Index did not become ready after {MAX_RETRIES} attempts")
     return False
 
-def process_record(record, client):
+def record_to_action(record):
+    """스트림 레코드를 _bulk action 으로 변환 (INSERT, MODIFY 는 updatedAt 을 외부 버전으로 쓰는 index)"""
     if record['eventName'] == 'REMOVE':
-        document_id = record['dynamodb']['OldImage']['id']['S']
-        try:
-            client.delete(
-                index=COLLECTION_NAME,
-                id=document_id
-            )
-        except Exception as e:
-            print(f"Error deleting document {document_id}: {str(e)}")
-    else: # INSERT, MODIFY
-        new_image = record['dynamodb']['NewImage']
-                
-        document = {
-            'title': new_image['title']['S'],
-            'content': new_image['content']['S'],
-            'summary': new_image.get('summary', {}).get('S', ''),
-            'tags': [item.get('S', '') for item in new_image.get('tags', {}).get('L', [])],
-            'prefix': new_image.get('prefix', {}).get('S', ''),
-            'priority': int(new_image.get('priority', {}).get('N', '0')),
-            'updatedAt': int(new_image['updatedAt']['N'])
-        }
-        
+        old_image = record['dynamodb']['OldImage']
+        version = int(old_image['updatedAt']['N']) if 'updatedAt' in old_image else None
+        return delete_action(old_image['id']['S'], version)
+
+    # INSERT, MODIFY
+    new_image = record['dynamodb']['NewImage']
+    return index_action(new_image['id']['S'], build_document(new_image))
+
+def record_memo_id(record):
+    dynamodb = record['dynamodb']
+    image = dynamodb.get('Keys') or dynamodb.get('NewImage') or dynamodb.get('OldImage')
+    return image['id']['S']
+
+def record_sequence_number(record):
+    return int(record['dynamodb'].get('SequenceNumber', 0))
+
+def coalesce_records(records):
+    """같은 메모 id 의 레코드를 스트림 시퀀스 번호 순으로 합쳐 최종 상태만 남김
+
+    (최종 레코드, 해당 id 에 속한 모든 레코드의 위치 목록) 을 반환한다.
+    INSERT 후 REMOVE 는 마지막 REMOVE 만 남아 delete 하나가 된다.
+    (재시도된 배치에서 앞선 INSERT 가 이미 반영됐을 수 있으므로 생략하지 않음)
+    """
+    groups = {}
+    for position, record in enumerate(records):
         try:
-            client.index(
-                index=COLLECTION_NAME,
-                body=document,
-                id=new_image['id']['S'],
-            )
-        except Exception as e:
-            print(f"Error indexing document: {str(e)}")
+            key = record_memo_id(record)
+        except (KeyError, TypeError):
+            # id 를 알 수 없는 레코드는 그대로 변환 단계로 넘겨 에러로 보고되게 함
+            key = ('position', position)
+        groups.setdefault(key, []).append(position)
+
+    coalesced = []
+    for positions in groups.values():
+        positions.sort(key=lambda position: record_sequence_number(records[position]))
+        coalesced.append((records[positions[-1]], positions))
+    return coalesced
+
+def is_noop_update(first_record, last_record):
+    """배치 전후로 검색 문서에 들어가는 필드가 바뀌지 않은 MODIFY 인지 확인
+
+    files, fileCount 처럼 문서에 포함되지 않는 속성만 바뀐 경우 재색인할 필요가 없다.
+    스트림이 NEW_AND_OLD_IMAGES 가 아니어서 OldImage 가 없으면 항상 재색인한다.
+    """
+    if first_record['eventName'] != 'MODIFY' or last_record['eventName'] != 'MODIFY':
+        return False
+
+    old_image = first_record['dynamodb'].get('OldImage')
+    new_image = last_record['dynamodb'].get('NewImage')
+    if not old_image or not new_image:
+        return False
+
+    try:
+        return build_document(old_image) == build_document(new_image)
+    except (KeyError, ValueError):
+        return False
+
+def is_embedding_unchanged(first_record, last_record):
+    """배치 전후로 임베딩 대상 텍스트(제목, 요약, 본문)가 그대로인 MODIFY 인지 확인"""
+    if first_record['eventName'] != 'MODIFY' or last_record['eventName'] != 'MODIFY':
+        return False
+
+    old_image = first_record['dynamodb'].get('OldImage')
+    new_image = last_record['dynamodb'].get('NewImage')
+    if not old_image or not new_image:
+        return False
+
+    try:
+        return embedding_text(build_document(old_image)) == embedding_text(build_document(new_image))
+    except (KeyError, ValueError):
+        return False
+
+def load_indexed_embeddings(client, index_name, ids):
+    """색인된 문서의 embedding / embeddingHash 를 문서 id 별로 읽음
+
+    검색은 refresh 된 문서만 보므로 방금 색인된 문서나 읽기 실패는 빈 결과가 되어 임베딩을 새로 만든다.
+    """
+    try:
+        response = client.search(index=index_name, body={
+            'size': len(ids),
+            'query': {'ids': {'values': ids}},
+            '_source': ['embedding', 'embeddingHash'],
+        })
+    except Exception as e:
+        print(f"Error loading indexed embeddings: {str(e)}")
+        return {}
+    return {hit['_id']: hit.get('_source', {}) for hit in response.get('hits', {}).get('hits', [])}
+
+def attach_embeddings(client, actions, reuse_ids, metrics, index_name=COLLECTION_NAME):
+    """index action 에 임베딩을 채움
+
+    임베딩 대상 텍스트가 바뀌지 않은 문서(reuse_ids)는 색인된 임베딩을 그대로 실어 보낸다.
+    부분 update 대신 전체 index 로 보내야 모든 쓰기가 updatedAt 을 외부 버전으로 갖는다.
+    임베딩을 만들지 못한 문서(Bedrock 쓰로틀링, 장애 등)는 embedding 없이 색인해 검색 동기화가 멈추지 않게 하고
+    EmbeddingFailures 로 센다. 임베딩이 없는 문서는 다음 쓰기에서 채워진다.
+    """
+    if reuse_ids:
+        indexed = load_indexed_embeddings(client, index_name, reuse_ids)
+        metrics.add('EmbeddingsReused', reuse_indexed_embeddings(actions, indexed))
+
+    failures = 0
+    for action, error in zip(actions, embed_actions(actions)):
+        if error:
+            print(f"Indexing {action['id']} without embedding: {error}")
+            failures += 1
+    metrics.add('EmbeddingFailures', failures)
+
+def process_records(records, client, metrics=None, index_name=COLLECTION_NAME, deadline=None):
+    """배치의 스트림 레코드를 _bulk 요청으로 색인하고 레코드 별 (성공 여부, 에러 메시지) 목록을 반환
+
+    같은 메모의 레코드는 하나로 합쳐지며, 합쳐진 레코드들은 최종 레코드의 결과를 공유한다.
+    index_name 은 기본적으로 next_memo 별칭이며, 재색인 중 스트림 따라잡기에서는 새 인덱스를 직접 지정한다.
+    deadline(time.monotonic 기준)이 지나면 임베딩/색인 단계를 시작하지 않고 남은 레코드를 실패로 돌려준다.
+    """
+    metrics = metrics or InvocationMetrics()
+    results = [(False, None)] * len(records)
+
+    with metrics.phase('Convert'):
+        coalesced = coalesce_records(records)
+        print(f"Coalesced {len(records)} records into {len(coalesced)} writes "
+              f"({len(records) - len(coalesced)} skipped)")
+        metrics.add('CoalescedRecords', len(records) - len(coalesced))
+
+        actions, action_positions, reuse_ids = [], [], []
+        noop_count = 0
+        for record, positions in coalesced:
+            if is_noop_update(records[positions[0]], record):
+                noop_count += 1
+                for position in positions:
+                    results[position] = (True, None)
+                continue
+
+            try:
+                actions.append(record_to_action(record))
+                action_positions.append(positions)
+                if EMBEDDING_ENABLED and is_embedding_unchanged(records[positions[0]], record):
+                    reuse_ids.append(actions[-1]['id'])
+            except Exception as e:
+                for position in positions:
+                    results[position] = (False, str(e))
+
+        if noop_count:
+            print(f"Skipped {noop_count} no-op updates without searchable field changes")
+        metrics.add('NoopUpdatesSkipped', noop_count)
+
+    if EMBEDDING_ENABLED and actions and not past_deadline(deadline):
+        with metrics.phase('Embedding'):
+            attach_embeddings(client, actions, reuse_ids, metrics, index_name)
+
+    if actions and past_deadline(deadline):
+        actions, action_positions = defer_actions(action_positions, results, metrics)
+
+    with metrics.phase('Write'):
+        bulk_results = write_actions(client, actions, metrics, index_name)
+    for positions, result in zip(action_positions, bulk_results):
+        for position in positions:
+            results[position] = result
+
+    failed_count = 0
+    for record, (ok, error) in zip(records, results):
+        if not ok:
+            failed_count += 1
+            print(f"Error processing record {record.get('eventID')}: {error}")
+    metrics.add('FailedRecords', failed_count)
+
+    # 재시도된 오래된 배치나 동시에 도는 마이그레이션이 더 새로운 문서를 덮어쓰려던 경우
+    stale_count = sum(1 for result in bulk_results if is_stale_write(result))
+    if stale_count:
+        print(f"Rejected {stale_count} stale writes older than the indexed version")
+    metrics.add('StaleWritesRejected', stale_count)
+
+    return results
+
+def record_batch_metrics(records, metrics):
+    """이벤트 종류별 레코드 수와 스트림 레코드 나이(생성 후 처리까지 걸린 시간)를 기록"""
+    for event_name in ('INSERT', 'MODIFY', 'REMOVE'):
+        metrics.add(f"{event_name.capitalize()}Records", 0)
+    for record in records:
+        metrics.add(f"{record.get('eventName', 'UNKNOWN').capitalize()}Records")
+
+    created = [record['dynamodb']['ApproximateCreationDateTime'] for record in records
+               if 'ApproximateCreationDateTime' in record.get('dynamodb', {})]
+    if created:
+        now = time.time()
+        metrics.set('StreamRecordAgeMax', round((now - min(created)) * 1000), 'Milliseconds')
+        metrics.set('StreamRecordAgeMin', round((now - max(created)) * 1000), 'Milliseconds')
 
 def create_index_if_not_exists(client):
     try:
-        if not client.indices.exists(COLLECTION_NAME):
-            print(f"Creating index {COLLECTION_NAME}...")
-            index_body = {
-                'settings': {
-                    'index': {
-                        'number_of_shards': 1,
-                        'number_of_replicas': 1
-                    },
-                    "analysis": {
-                        "analyzer": {
-                            "ngram_analyzer": {
-                                "type": "custom",
-                                "tokenizer": "ngram_tokenizer",
-                                "filter": ["lowercase"]
-                            },
-                            "standard_with_lowercase": {
-                                "type": "custom",
-                                "tokenizer": "standard",
-                                "filter": ["lowercase"]
-                            }
-                        },
-                        "tokenizer": {
-                            "ngram_tokenizer": {
-                                "type": "ngram",
-                                "min_gram": 2,
-                                "max_gram": 3,
-                                "token_chars": ["letter", "digit"]
-                            }
-                        }
-                    }
-                },
-                'mappings': {
-                    'properties': {
-                        'title': {
-                            'type': 'text',
-                            'analyzer': 'standard_with_lowercase',
-                            'fields': {
-                                'ngram': {
-                                    'type': 'text',
-                                    'analyzer': 'ngram_analyzer'
-                                },
-                                'keyword': {
-                                    'type': 'keyword',
-                                    'ignore_above': 256
-                                }
-                            }
-                        },
-                        'content': {
-                            'type': 'text',
-                            'analyzer': 'standard_with_lowercase',
-                            'fields': {
-                                'ngram': {
-                                    'type': 'text',
-                                    'analyzer': 'ngram_analyzer'
-                                }
-                            }
-                        },
-                        'summary': {
-                            'type': 'text',
-                            'analyzer': 'standard_with_lowercase',
-                            'fields': {
-                                'ngram': {
-                                    'type': 'text',
-                                    'analyzer': 'ngram_analyzer'
-                                }
-                            }
-                        },
-                        'tags': {
-                            'type': 'text',
-                            'fields': {
-                                'keyword': {
-                                    'type': 'keyword'
-                                }
-                            }
-                        },
-                        'prefix': {
-                            'type': 'keyword'
-                        },
-                        'priority': {
-                            'type': 'integer'
-                        },
-                        'updatedAt': {
-                            'type': 'date',
-                            'format': 'epoch_millis'
-                        }
-                    }
-                }
-            }
-            
-            client.indices.create(COLLECTION_NAME, body=index_body)
+        if not client.indices.exists(index=COLLECTION_NAME):
+            # 재색인 시 별칭만 옮기면 되도록 next_memo_v1 인덱스와 next_memo 별칭으로 생성
+            index_name = versioned_index_name(COLLECTION_NAME, 1)
+            print(f"Creating index {index_name} with alias {COLLECTION_NAME}...")
+            client.indices.create(index=index_name, body=build_index_body(aliases=[COLLECTION_NAME]))
             return wait_for_index_ready(client, COLLECTION_NAME)
         else:
             print(f"Index {COLLECTION_NAME} already exists")
@@ -192,23 +309,42 @@ def create_index_if_not_exists(client):
         print(f"Error creating index: {str(e)}")
         return False
 
+def batch_item_failures(records, results):
+    """실패한 레코드를 ReportBatchItemFailures 응답 형식(스트림 시퀀스 번호)으로 변환
+
+    Lambda 는 가장 작은 실패 시퀀스 번호부터 배치를 다시 보내므로 성공한 뒤쪽 레코드도 재전송되지만,
+    문서는 updatedAt 버전으로 색인되어 중복 반영은 무시된다.
+    """
+    return [{'itemIdentifier': record.get('dynamodb', {}).get('SequenceNumber')}
+            for record, (ok, _) in zip(records, results) if not ok]
+
 def handler(event, context):
-    client = create_opensearch_client()
-        
+    """DynamoDB 스트림 배치를 색인하고 실패한 레코드를 batchItemFailures 로 보고
+
+    인덱스와 매핑은 배포 시 bootstrap.py(커스텀 리소스 또는 명령)로 만들어 두므로 여기서는 확인하지 않는다.
+    """
+    deadline = invocation_deadline(context)
+    metrics = InvocationMetrics(context)
+    records = event['Records']
+    record_batch_metrics(records, metrics)
+
     try:
-        # 인덱스 생성 및 준비 상태 확인
-        index_ready = create_index_if_not_exists(client)
-        
-        if index_ready:
-            # DynamoDB 스트림 이벤트 처리
-            for record in event['Records']:
-                process_record(record, client)
+        with metrics.phase('ClientSetup'):
+            client = get_opensearch_client()
+
+        # DynamoDB 스트림 이벤트 처리
+        results = process_records(records, client, metrics, deadline=deadline)
             
     except Exception as e:
+        # 레코드 단위로 판단할 수 없는 에러는 다시 던져 Lambda 가 배치를 반으로 나눠 재시도하게 함
         print(f"Error in handler: {str(e)}")
+        metrics.add('HandlerErrors')
         raise e
-    
-    return {
-        'statusCode': 200,
-        'body': json.dumps('Processing complete')
-    }
\ No newline at end of file
+    finally:
+        metrics.emit()
+
+    # 실패한 레코드만 재시도 대상으로 보고 (재시도를 모두 소진하면 on-failure 대상으로 전달됨)
+    failures = batch_item_failures(records, results)
+    if failures:
+        print(f"Reporting {len(failures)} of {len(records)} records as batch item failures")
+    return {'batchItemFailures': failures}
@@ -1,8 +1,12 @@
 mkdir python
-python3 -m pip install opensearch-py requests requests-aws4auth -t python/
+# SigV4 서명은 connection.py 가 표준 라이브러리로 처리하므로 urllib3 만 포함 (cold start 단축)
+# 함수 런타임(Python 3.12, arm64)용 wheel 을 받아 빌드 머신의 아키텍처와 상관없이 설치
+python3 -m pip install -r requirements.txt -t python/ \
+    --platform manylinux2014_aarch64 --implementation cp --python-version 3.12 --only-binary=:all:
 zip -r layer.zip python
 
 aws lambda publish-layer-version \
     --layer-name python-opensearch-modules \
     --zip-file fileb://layer.zip \
-    --compatible-runtimes python3.9
+    --compatible-runtimes python3.12 \
+    --compatible-architectures arm64
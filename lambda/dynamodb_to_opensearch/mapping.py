@@ -0,0 +1,160 @@
+import os
+from embedding import EMBEDDING_DIMENSION, EMBEDDING_ENABLED
+
+# 인덱스를 만들 때 고르는 분석기 프로필
+#   ngram      : title/content/summary 에 2~3gram 서브필드 (기존 매핑, 긴 본문에서 인덱스가 크게 늘어남)
+#   edge_ngram : 짧은 필드(title, tags)에만 접두어(edge ngram) 서브필드, 본문은 standard 분석만
+#   nori       : 한국어 형태소 분석(nori) + title/tags 접두어 서브필드
+ANALYZER_PROFILES = ('ngram', 'edge_ngram', 'nori')
+ANALYZER_PROFILE = os.environ.get('INDEX_ANALYZER_PROFILE', 'ngram')
+
+# 대량 색인 동안만 쓰는 설정 (refresh / 복제를 끄고 끝나면 build_index_body 의 값으로 되돌림)
+BULK_LOAD_SETTINGS = {'index': {'refresh_interval': '-1', 'number_of_replicas': 0}}
+
+
+def versioned_index_name(alias, version):
+    """별칭 뒤의 실제 인덱스 이름 (next_memo → next_memo_v3)"""
+    return f"{alias}_v{version}"
+
+
+def build_analysis(profile):
+    """프로필 별 analysis 설정 (analyzer / tokenizer)"""
+    analyzers = {
+        "standard_with_lowercase": {
+            "type": "custom",
+            "tokenizer": "standard",
+            "filter": ["lowercase"]
+        }
+    }
+    tokenizers = {}
+
+    if profile == 'ngram':
+        analyzers["ngram_analyzer"] = {
+            "type": "custom",
+            "tokenizer": "ngram_tokenizer",
+            "filter": ["lowercase"]
+        }
+        tokenizers["ngram_tokenizer"] = {
+            "type": "ngram",
+            "min_gram": 2,
+            "max_gram": 3,
+            "token_chars": ["letter", "digit"]
+        }
+        return {"analyzer": analyzers, "tokenizer": tokenizers}
+
+    # 검색어 입력 중 접두어 매칭용 (색인 시에만 edge ngram, 검색어는 그대로 분석)
+    analyzers["autocomplete_analyzer"] = {
+        "type": "custom",
+        "tokenizer": "autocomplete_tokenizer",
+        "filter": ["lowercase"]
+    }
+    tokenizers["autocomplete_tokenizer"] = {
+        "type": "edge_ngram",
+        "min_gram": 1,
+        "max_gram": 10,
+        "token_chars": ["letter", "digit"]
+    }
+    if profile == 'nori':
+        analyzers["korean_analyzer"] = {
+            "type": "custom",
+            "tokenizer": "korean_tokenizer",
+            "filter": ["nori_readingform", "lowercase", "nori_part_of_speech"]
+        }
+        tokenizers["korean_tokenizer"] = {
+            "type": "nori_tokenizer",
+            "decompound_mode": "mixed"
+        }
+    return {"analyzer": analyzers, "tokenizer": tokenizers}
+
+
+def build_text_fields(profile):
+    """title / content / summary / tags 필드 매핑"""
+    text_analyzer = 'korean_analyzer' if profile == 'nori' else 'standard_with_lowercase'
+
+    def text_field(subfields=None):
+        field = {'type': 'text', 'analyzer': text_analyzer}
+        if subfields:
+            field['fields'] = subfields
+        return field
+
+    if profile == 'ngram':
+        ngram = {'type': 'text', 'analyzer': 'ngram_analyzer'}
+        return {
+            'title': text_field({'ngram': ngram, 'keyword': {'type': 'keyword', 'ignore_above': 256}}),
+            'content': text_field({'ngram': ngram}),
+            'summary': text_field({'ngram': ngram}),
+            'tags': {'type': 'text', 'fields': {'keyword': {'type': 'keyword'}}},
+        }
+
+    autocomplete = {'type': 'text', 'analyzer': 'autocomplete_analyzer', 'search_analyzer': text_analyzer}
+    return {
+        'title': text_field({'autocomplete': autocomplete, 'keyword': {'type': 'keyword', 'ignore_above': 256}}),
+        'content': text_field(),
+        'summary': text_field(),
+        'tags': {'type': 'text', 'fields': {'keyword': {'type': 'keyword'}, 'autocomplete': autocomplete}},
+    }
+
+
+def build_vector_fields():
+    """제목 + 요약 + 본문의 Titan 임베딩 (embedding.py) 필드 매핑"""
+    return {
+        'embedding': {
+            'type': 'knn_vector',
+            'dimension': EMBEDDING_DIMENSION,
+            'method': {
+                'name': 'hnsw',
+                'engine': 'faiss',
+                'space_type': 'l2'
+            }
+        },
+        'embeddingHash': {
+            'type': 'keyword',
+            'index': False
+        }
+    }
+
+
+def build_index_body(aliases=None, profile=None, embeddings=None):
+    """next_memo 인덱스의 settings 와 mappings
+
+    profile 은 ANALYZER_PROFILES 중 하나 (기본값: INDEX_ANALYZER_PROFILE 환경 변수, 없으면 기존 ngram 매핑).
+    embeddings 이면 knn 설정과 embedding 필드를 추가한다 (기본값: EMBEDDING_ENABLED 환경 변수).
+    OpenSearch Serverless 는 knn_vector 를 VECTORSEARCH 컬렉션에서만 허용하므로
+    SEARCH 컬렉션에서는 꺼 두어야 한다 (cdk/next_memo/data_stack.py 의 embeddingEnabled).
+    aliases 가 주어지면 생성과 동시에 별칭을 연결한다.
+    """
+    profile = profile or ANALYZER_PROFILE
+    embeddings = EMBEDDING_ENABLED if embeddings is None else embeddings
+    if profile not in ANALYZER_PROFILES:
+        raise ValueError(f"Unknown analyzer profile {profile!r}, expected one of {', '.join(ANALYZER_PROFILES)}")
+
+    body = {
+        'settings': {
+            'index': {
+                'number_of_shards': 1,
+                'number_of_replicas': 1
+            },
+            "analysis": build_analysis(profile)
+        },
+        'mappings': {
+            'properties': {
+                **build_text_fields(profile),
+                'prefix': {
+                    'type': 'keyword'
+                },
+                'priority': {
+                    'type': 'integer'
+                },
+                'updatedAt': {
+                    'type': 'date',
+                    'format': 'epoch_millis'
+                }
+            }
+        }
+    }
+    if embeddings:
+        body['settings']['index']['knn'] = True
+        body['mappings']['properties'].update(build_vector_fields())
+    if aliases:
+        body['aliases'] = {alias: {} for alias in aliases}
+    return body
@@ -0,0 +1,59 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'NextMemo/Sync')
+
+
+class InvocationMetrics:
+    """호출 한 번의 단계별 소요 시간과 카운터를 CloudWatch EMF(Embedded Metric Format) 로그 한 줄로 출력
+
+    Lambda 로그에 기록된 EMF 라인은 CloudWatch 가 메트릭으로 추출하므로 별도 API 호출이 필요 없다.
+    병렬 쓰기 워커가 함께 기록하므로 카운터 갱신은 잠금으로 보호한다.
+    """
+
+    def __init__(self, context=None, namespace=METRICS_NAMESPACE):
+        self.namespace = namespace
+        self.function_name = (getattr(context, 'function_name', None)
+                              or os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local'))
+        self.values = {}
+        self.units = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, value=1, unit='Count'):
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + value
+            self.units[name] = unit
+
+    def set(self, name, value, unit='Count'):
+        with self._lock:
+            self.values[name] = value
+            self.units[name] = unit
+
+    @contextmanager
+    def phase(self, name):
+        """with 블록의 소요 시간을 {name}Time (ms) 로 누적"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(f"{name}Time", round((time.perf_counter() - started) * 1000, 3), 'Milliseconds')
+
+    def to_emf(self):
+        return {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': self.namespace,
+                    'Dimensions': [['FunctionName']],
+                    'Metrics': [{'Name': name, 'Unit': self.units[name]} for name in self.values]
+                }]
+            },
+            'FunctionName': self.function_name,
+            **self.values
+        }
+
+    def emit(self):
+        print(json.dumps(self.to_emf()))
@@ -1,10 +1,20 @@
 import sys, os
 import time
 import json
+import queue
+import random
+import argparse
+import threading
 import boto3
-from opensearchpy import OpenSearch, RequestsHttpConnection
-from requests_aws4auth import AWS4Auth
 from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+import connection
+from bulk import build_document, index_action, chunk_actions, send_chunks, is_throttled, is_stale_write
+from checkpoint import MigrationCheckpoint
+from ratelimit import AdaptiveRateLimiter
+from pipeline import STOP, StageStats, SegmentProgress
+from embedding import embed_actions
+from mapping import build_index_body, versioned_index_name
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'packages'))
 
@@ -12,32 +22,34 @@ COLLECTION_NAME = "next_memo"
 MAX_RETRIES = 10
 RETRY_DELAY = 2  # seconds
 
+TABLE_NAME = "next-memo"
+PAGE_SIZE = 100  # 스캔 페이지 당 아이템 수
+TARGET_RATE = 1000  # items/sec, 쓰로틀링 시 자동으로 낮아짐
+MAX_THROTTLE_RETRIES = 8
+BATCH_GET_BACKOFF = 0.05  # seconds, UnprocessedKeys 재시도 대기의 기준값 (시도마다 두 배, jitter 적용)
+DYNAMODB_THROTTLE_CODES = ('ProvisionedThroughputExceededException', 'ThrottlingException', 'RequestLimitExceeded')
+CHECKPOINT_PATH = "migration-checkpoint.json"
+CONVERTERS = 2  # convert 단계 워커 수
+INDEXERS = 4  # index 단계 워커 수
+QUEUE_SIZE = 8  # 단계 사이 큐에 쌓아둘 최대 페이지 수
+
+# 증분 동기화(--since): updatedAt 정렬 GSI (src/lib/constants.ts 의 UPDATED_INDEX, GSI_PARTITION_KEY)
+UPDATED_INDEX = "UpdatedIndex"
+GSI_PARTITION_KEY = "ALL"
+GSI_SHARD_COUNT = 4
+# 쓰기 분산을 위해 "ALL#<n>" 으로 나눈 샤드 파티션과, 샤딩 이전에 저장된 메모가 남아 있는 "ALL"
+GSI_PARTITION_KEYS = [f"{GSI_PARTITION_KEY}#{shard}" for shard in range(GSI_SHARD_COUNT)] + [GSI_PARTITION_KEY]
+WATERMARK_PATH = "sync-watermark.json"
+# 늦게 도착한 쓰기(클라이언트 시각 기준 updatedAt)를 놓치지 않도록 워터마크보다 조금 앞에서부터 조회
+WATERMARK_OVERLAP_MS = 60 * 1000
+DOCUMENT_ATTRIBUTES = ('id', 'title', 'content', 'updatedAt')
 
 AWS_OPENSEARCH_ENDPOINT="https://69jgxbfclj25cww04bk4.ap-northeast-2.aoss.amazonaws.com"
 AWS_REGION="ap-northeast-2"
 
-def get_aws_auth():
-    credentials = boto3.Session().get_credentials()
-    region = AWS_REGION
-    return AWS4Auth(
-        credentials.access_key,
-        credentials.secret_key,
-        region,
-        'aoss',
-        session_token=credentials.token
-    )
-
-def create_opensearch_client():
-    host = AWS_OPENSEARCH_ENDPOINT.replace('https://', '')
-    region = AWS_REGION
-    
-    return OpenSearch(
-        hosts=[{'host': host, 'port': 443}],
-        http_auth=get_aws_auth(),
-        use_ssl=True,
-        verify_certs=True,
-        connection_class=RequestsHttpConnection
-    )
+def create_opensearch_client(pool_maxsize=10, endpoint=AWS_OPENSEARCH_ENDPOINT, http_compress=True, keep_alive=True):
+    return connection.create_opensearch_client(endpoint, AWS_REGION, pool_maxsize=pool_maxsize,
+                                               http_compress=http_compress, keep_alive=keep_alive)
 
 def wait_for_index_ready(client, index_name):
     """인덱스가 생성되고 사용 가능한 상태가 될 때까지 대기"""
@@ -63,175 +75,426 @@ def wait_for_index_ready(client, index_name):
     return False
 
 
-def process_item(doc, opensearch_client):
-    try:   
-        document = {
-            'title': doc['title']['S'],
-            'content': doc['content']['S'],
-            'summary': doc.get('summary', {}).get('S', ''),
-            'tags': [item.get('S', '') for item in doc.get('tags', {}).get('L', [])],
-            'prefix': doc.get('prefix', {}).get('S', ''),
-            'priority': int(doc.get('priority', {}).get('N', '0')),
-            'updatedAt': int(doc['updatedAt']['N'])
-        }
-    
-        opensearch_client.index(
-            index=COLLECTION_NAME,
-            body=document,
-            id=doc['id']['S']
-        )
-        return True
-    except Exception as e:
-        print(f"Error processing item {doc.get('id', {}).get('S')}: {str(e)}")
-        return False
+def convert_items(items):
+    """스캔한 아이템을 _bulk action 으로 변환하고 (actions, 변환 실패 수) 를 반환"""
+    actions, error_count = [], 0
+    for item in items:
+        try:
+            actions.append(index_action(item['id']['S'], build_document(item)))
+        except Exception as e:
+            print(f"Error processing item {item.get('id', {}).get('S')}: {str(e)}")
+            error_count += 1
+    return actions, error_count
 
-def migrate_data():
-    # DynamoDB 클라이언트 생성
-    dynamodb = boto3.client('dynamodb', region_name=AWS_REGION)
-    opensearch_client = create_opensearch_client()
-    
-    # 페이지네이션을 위한 변수들
-    last_evaluated_key = None
-    processed_count = 0
+def embed_items(actions):
+    """스트림 핸들러와 같은 경로(embed_actions)로 임베딩을 채우고 임베딩을 만들지 못한 action 수를 반환
+
+    임베딩이 실패한 메모도 embedding 없이 색인한다. 빼고 보내면 페이지는 체크포인트에 확정되는데
+    메모는 색인되지 않아 --resume 으로도 다시 처리되지 않는다. 실패 수는 에러가 아닌 경고로 센다.
+    """
+    warning_count = 0
+    for action, error in zip(actions, embed_actions(actions)):
+        if error:
+            print(f"Indexing {action['id']} without embedding: {error}")
+            warning_count += 1
+    return warning_count
+
+def index_actions(actions, opensearch_client, limiter, chunks=None, stats=None, index_name=COLLECTION_NAME):
+    """action 목록을 _bulk 요청으로 색인하고 실패한 action 수를 반환
+
+    OpenSearch 가 429 로 거절한 action 은 처리량을 줄인 뒤 다시 보낸다.
+    스트림이 이미 더 새로운 버전을 색인한 문서는 덮어쓰지 않고 stats 의 'stale' 카운터로 센다.
+    """
     error_count = 0
-    batch_size = 25  # 한 번에 처리할 항목 수
-    
-    print("Starting migration...")
-    
+    chunks = chunks if chunks is not None else chunk_actions(actions, index_name)
+
+    for attempt in range(MAX_THROTTLE_RETRIES + 1):
+        results = send_chunks(opensearch_client, actions, chunks)
+        if stats:
+            stats.count('stale', sum(1 for result in results if is_stale_write(result)))
+        throttled = [action for action, (ok, error) in zip(actions, results) if is_throttled(error)]
+        if not throttled or attempt == MAX_THROTTLE_RETRIES:
+            break
+
+        limiter.on_throttle()
+        limiter.acquire(len(throttled))
+        for action, (ok, error) in zip(actions, results):
+            if not ok and not is_throttled(error):
+                print(f"Error processing item {action['id']}: {error}")
+                error_count += 1
+        actions = throttled
+        chunks = chunk_actions(actions, index_name)
+
+    if not throttled:
+        limiter.on_success()
+    for action, (ok, error) in zip(actions, results):
+        if not ok:
+            print(f"Error processing item {action['id']}: {error}")
+            error_count += 1
+
+    return error_count
+
+def scan_page(dynamodb, scan_params, limiter, operation='scan'):
+    """DynamoDB 쓰로틀링 시 처리량을 줄이고 재시도하는 Scan (operation='query' 면 Query)"""
+    for attempt in range(MAX_THROTTLE_RETRIES + 1):
+        limiter.acquire(scan_params['Limit'])
+        try:
+            return getattr(dynamodb, operation)(**scan_params)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') not in DYNAMODB_THROTTLE_CODES or attempt == MAX_THROTTLE_RETRIES:
+                raise
+            limiter.on_throttle()
+            print(f"{operation.capitalize()} throttled, reducing rate to {limiter.rate:.0f} items/s")
+
+def scan_segment(dynamodb, progress, total_segments, page_size, limiter, start_key, page_queue, stats):
+    """[scan 단계] 세그먼트 하나를 끝까지 스캔하며 페이지를 큐에 넣음 (큐가 가득 차면 대기)"""
+    last_evaluated_key = start_key
+    page_number = 0
+
     try:
         while True:
             # DynamoDB 스캔 파라미터 설정
             scan_params = {
-                'TableName': 'next-memo',
-                'Limit': batch_size
+                'TableName': TABLE_NAME,
+                'Limit': page_size,
+                'Segment': progress.segment,
+                'TotalSegments': total_segments
             }
-            
+
             if last_evaluated_key:
                 scan_params['ExclusiveStartKey'] = last_evaluated_key
-            
+
             # DynamoDB 테이블 스캔
-            response = dynamodb.scan(**scan_params)
+            started = time.time()
+            response = scan_page(dynamodb, scan_params, limiter)
             items = response.get('Items', [])
-            
-            if not items:
-                break
-            
-            for item in items:
-                res = process_item(item, opensearch_client)
-                processed_count += 1
-                
-                if not res:
-                    error_count += 1
-            
-            # 다음 페이지 존재 여부 확인
+            stats.record(len(items), started)
+
+            # 빈 페이지도 넘겨서 세그먼트 진행 상황(LastEvaluatedKey)이 기록되게 함
             last_evaluated_key = response.get('LastEvaluatedKey')
+            page_queue.put({
+                'progress': progress,
+                'page_number': page_number,
+                'items': items,
+                'last_evaluated_key': last_evaluated_key
+            })
+            page_number += 1
+
+            # 다음 페이지 존재 여부 확인
             if not last_evaluated_key:
                 break
-            
-            # API 제한을 위한 잠시 대기
-            time.sleep(1)
-    
+
     except Exception as e:
-        print(f"Migration failed: {str(e)}")
-        return False
-    
-    print(f"\nMigration completed:")
+        print(f"Segment {progress.segment} failed: {str(e)}")
+        progress.failure = str(e)
+
+def convert_pages(page_queue, batch_queue, stats, embeddings=False, index_name=COLLECTION_NAME):
+    """[convert 단계] 페이지를 _bulk action 과 payload 청크로 변환 (embeddings 이면 임베딩 포함)
+
+    페이지 하나가 예외로 실패해도 워커는 계속 돌아 앞 단계가 큐에서 막히지 않는다.
+    """
+    while True:
+        page = page_queue.get()
+        if page is STOP:
+            break
+
+        started = time.time()
+        try:
+            actions, error_count = convert_items(page['items'])
+            if embeddings:
+                stats.count('embedding_warnings', embed_items(actions))
+            page['actions'] = actions
+            page['chunks'] = list(chunk_actions(actions, index_name))
+            page['errors'] = error_count
+        except Exception as e:
+            print(f"Segment {page['progress'].segment} page {page['page_number']} failed to convert: {str(e)}")
+            page['progress'].fail_page(page['page_number'], e)
+            continue
+        finally:
+            stats.record(len(page['items']), started)
+        batch_queue.put(page)
+
+def index_batches(batch_queue, opensearch_client, limiter, stats, index_name=COLLECTION_NAME):
+    """[index 단계] 변환된 페이지를 _bulk 로 색인하고 세그먼트 진행 상황을 확정
+
+    페이지 하나가 예외로 실패하면 그 페이지는 확정하지 않고 세그먼트를 실패로 표시한 뒤 다음 페이지를 처리한다.
+    """
+    while True:
+        page = batch_queue.get()
+        if page is STOP:
+            break
+
+        started = time.time()
+        progress = page['progress']
+        try:
+            error_count = page['errors']
+            if page['actions']:
+                error_count += index_actions(page['actions'], opensearch_client, limiter, page['chunks'], stats,
+                                             index_name)
+            progress.complete_page(page['page_number'], page['last_evaluated_key'],
+                                   len(page['items']), error_count)
+        except Exception as e:
+            print(f"Segment {progress.segment} page {page['page_number']} failed to index: {str(e)}")
+            progress.fail_page(page['page_number'], e)
+            continue
+        finally:
+            stats.record(len(page['items']), started)
+        if page['items']:
+            print(f"Segment {progress.segment}: processed {progress.processed}, errors {progress.errors}, "
+                  f"rate {limiter.rate:.0f} items/s")
+
+def run_stage(workers, target, *args):
+    threads = [threading.Thread(target=target, args=args, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+def migrate_data(total_segments=1, workers=None, page_size=PAGE_SIZE, target_rate=TARGET_RATE,
+                 checkpoint_path=None, resume=False, converters=CONVERTERS, indexers=INDEXERS,
+                 queue_size=QUEUE_SIZE, embeddings=False, dynamodb=None, opensearch_client=None,
+                 index_name=COLLECTION_NAME, watermark_path=None):
+    """테이블을 total_segments 개의 세그먼트로 나눠 scan → convert → index 파이프라인으로 색인
+
+    단계 사이의 큐는 크기가 제한되어 있어 테이블 크기와 상관없이 메모리 사용량이 일정하다.
+    checkpoint_path 가 주어지면 페이지마다 진행 상황을 저장하고, resume 이면 저장된 지점부터 이어서 실행한다.
+    index_name 은 기본적으로 next_memo 별칭이며, 재색인(reindex.py)에서는 새로 만든 인덱스를 지정한다.
+    watermark_path 가 주어지면 성공했을 때 마이그레이션을 처음 시작한 시각을 증분 동기화 워터마크로 남긴다.
+    재개한 경우에도 체크포인트에 저장된 시작 시각을 쓰므로 중단된 사이의 변경을 다음 --since 가 놓치지 않는다.
+    """
+    started_at = int(time.time() * 1000)
+    checkpoint = None
+    if checkpoint_path:
+        if resume and os.path.exists(checkpoint_path):
+            checkpoint = MigrationCheckpoint.load(checkpoint_path)
+            started_at = checkpoint.started_at
+            if checkpoint.total_segments != total_segments:
+                print(f"Resuming with {checkpoint.total_segments} segments from checkpoint")
+                total_segments = checkpoint.total_segments
+            if checkpoint.is_complete():
+                print(f"Migration already completed according to {checkpoint_path}")
+                if watermark_path:
+                    advance_watermark(watermark_path, started_at)
+                return True
+        else:
+            checkpoint = MigrationCheckpoint(checkpoint_path, total_segments, started_at=started_at)
+            checkpoint.save()
+
+    workers = workers or total_segments
+
+    # DynamoDB 클라이언트 생성
+    dynamodb = dynamodb or boto3.client('dynamodb', region_name=AWS_REGION)
+    opensearch_client = opensearch_client or create_opensearch_client(pool_maxsize=indexers)
+
+    # 모든 세그먼트가 공유하는 처리량 제어
+    limiter = AdaptiveRateLimiter(target_rate)
+
+    progresses, pending = [], []
+    for segment in range(total_segments):
+        state = checkpoint.segment(segment) if checkpoint else None
+        if state:
+            progresses.append(SegmentProgress(segment, state['processed'], state['errors'], checkpoint))
+            if not state['done']:
+                pending.append((segment, state['last_evaluated_key']))
+        else:
+            progresses.append(SegmentProgress(segment))
+            pending.append((segment, None))
+
+    print(f"Starting migration with {total_segments} segments, {workers} scan workers, "
+          f"{converters} converters, {indexers} indexers and target rate {target_rate} items/s...")
+    started = time.time()
+
+    scan_stats = StageStats('scan', workers)
+    convert_stats = StageStats('convert', converters)
+    index_stats = StageStats('index', indexers)
+    page_queue = queue.Queue(maxsize=queue_size)
+    batch_queue = queue.Queue(maxsize=queue_size)
+
+    converter_threads = run_stage(converters, convert_pages, page_queue, batch_queue, convert_stats, embeddings,
+                                  index_name)
+    indexer_threads = run_stage(indexers, index_batches, batch_queue, opensearch_client, limiter, index_stats,
+                                index_name)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for segment, start_key in pending:
+            executor.submit(scan_segment, dynamodb, progresses[segment], total_segments, page_size,
+                            limiter, start_key, page_queue, scan_stats)
+
+    # 앞 단계가 끝나면 다음 단계 워커 수만큼 종료 신호를 보냄
+    for _ in converter_threads:
+        page_queue.put(STOP)
+    for thread in converter_threads:
+        thread.join()
+    for _ in indexer_threads:
+        batch_queue.put(STOP)
+    for thread in indexer_threads:
+        thread.join()
+
+    segment_stats = [progress.stats() for progress in progresses]
+    processed_count = sum(stats['processed'] for stats in segment_stats)
+    error_count = sum(stats['errors'] for stats in segment_stats)
+    elapsed = time.time() - started
+
+    print(f"\nMigration completed in {elapsed:.1f}s:")
+    for stats in segment_stats:
+        status = f"failed ({stats['failure']})" if stats['failure'] else "done"
+        print(f"  Segment {stats['segment']}: processed {stats['processed']}, "
+              f"errors {stats['errors']}, {status}")
+    for stats in (scan_stats, convert_stats, index_stats):
+        print(f"  {stats.report(elapsed)}")
     print(f"Total processed: {processed_count}")
     print(f"Total errors: {error_count}")
-    return True
+    print(f"Stale writes skipped: {index_stats.counters['stale']}")
+    if embeddings:
+        print(f"Indexed without embedding: {convert_stats.counters['embedding_warnings']}")
+    print(f"Throttled: {limiter.throttle_count} times, final rate {limiter.rate:.0f} items/s")
+    ok = not any(stats['failure'] for stats in segment_stats)
+    if ok and watermark_path:
+        advance_watermark(watermark_path, started_at)
+    return ok
+
+def parse_since(value, now=None):
+    """--since 값을 epoch ms 로 변환 ('90m', '6h', '2d' 처럼 상대 시간, epoch ms, ISO 8601 날짜)"""
+    now = now if now is not None else time.time()
+    units = {'m': 60, 'h': 3600, 'd': 86400}
+    if value[-1:] in units and value[:-1].isdigit():
+        return int((now - int(value[:-1]) * units[value[-1]]) * 1000)
+    if value.isdigit():
+        return int(value)
+    from datetime import datetime
+    return int(datetime.fromisoformat(value).timestamp() * 1000)
+
+def load_watermark(path):
+    """마지막으로 색인을 확정한 updatedAt (없으면 None)"""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)['updatedAt']
+
+def save_watermark(path, updated_at):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'updatedAt': updated_at}, f)
+    os.replace(tmp_path, path)
+
+def advance_watermark(path, updated_at):
+    """저장된 워터마크보다 뒤일 때만 저장 (시작 시각을 모르는 예전 체크포인트(None)는 건너뜀)"""
+    if updated_at is None:
+        print(f"Checkpoint has no start time; not updating {path}")
+        return
+    if updated_at > (load_watermark(path) or 0):
+        save_watermark(path, updated_at)
+
+def hydrate_items(dynamodb, items, limiter=None):
+    """GSI 프로젝션에 문서 필드가 빠져 있으면 기본 테이블에서 BatchGetItem 으로 전체 아이템을 읽음
+
+    UnprocessedKeys 는 쓰로틀링으로 남은 키이므로 처리량을 줄이고 jitter 를 준 지수 백오프 뒤 다시 요청한다.
+    """
+    def is_complete(item):
+        return all(name in item for name in DOCUMENT_ATTRIBUTES)
+
+    keys = [{'id': item['id']} for item in items if not is_complete(item)]
+    if not keys:
+        return items
+
+    full = {}
+    for start in range(0, len(keys), 100):
+        request = {TABLE_NAME: {'Keys': keys[start:start + 100]}}
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            response = dynamodb.batch_get_item(RequestItems=request)
+            for item in response.get('Responses', {}).get(TABLE_NAME, []):
+                full[item['id']['S']] = item
+            request = response.get('UnprocessedKeys')
+            if not request:
+                break
+            if attempt == MAX_THROTTLE_RETRIES:
+                raise RuntimeError(f"BatchGetItem left {len(request[TABLE_NAME]['Keys'])} keys unprocessed")
+            if limiter:
+                limiter.on_throttle()
+            time.sleep(random.uniform(0, BATCH_GET_BACKOFF * 2 ** attempt))
+
+    # 조회 사이에 삭제된 아이템은 건너뜀 (삭제는 스트림 핸들러가 반영)
+    hydrated = []
+    for item in items:
+        if is_complete(item):
+            hydrated.append(item)
+        elif item['id']['S'] in full:
+            hydrated.append(full[item['id']['S']])
+    return hydrated
+
+def sync_since(since=None, watermark_path=WATERMARK_PATH, page_size=PAGE_SIZE, target_rate=TARGET_RATE,
+               embeddings=False, dynamodb=None, opensearch_client=None, index_name=COLLECTION_NAME):
+    """updatedAt GSI 를 since(ms, 기본값: 저장된 워터마크)부터 조회해 바뀐 메모만 색인하고 워터마크를 전진
+
+    GSI 파티션(샤드)마다 updatedAt 오름차순으로 조회하며, 에러 없이 색인된 구간만큼만 워터마크를 옮긴다.
+    한 샤드라도 실패하면 그 샤드에서 실패한 페이지 직전까지만 전진해 다음 실행이 다시 시도한다.
+    삭제된 메모는 테이블에 남지 않으므로 스트림 핸들러가 반영한다.
+    """
+    watermark = load_watermark(watermark_path)
+    if since is None:
+        if watermark is None:
+            print(f"No watermark in {watermark_path}; run a full migration first or pass --since <time>")
+            return False
+        since = watermark - WATERMARK_OVERLAP_MS
+
+    dynamodb = dynamodb or boto3.client('dynamodb', region_name=AWS_REGION)
+    opensearch_client = opensearch_client or create_opensearch_client()
+    limiter = AdaptiveRateLimiter(target_rate)
+
+    print(f"Syncing memos updated since {since} from {UPDATED_INDEX}...")
+    processed_count = error_count = warning_count = 0
+    synced_until = None  # 모든 샤드에서 색인이 끝난 최대 updatedAt
+    failed_until = []  # 실패한 샤드별로 색인이 끝난 마지막 updatedAt
+    for key in GSI_PARTITION_KEYS:
+        query_params = {
+            'TableName': TABLE_NAME,
+            'IndexName': UPDATED_INDEX,
+            'KeyConditionExpression': 'gsiPartitionKey = :key AND updatedAt >= :since',
+            'ExpressionAttributeValues': {':key': {'S': key}, ':since': {'N': str(since)}},
+            'ScanIndexForward': True,
+            'Limit': page_size,
+        }
+        shard_until = None
+        advancing = True
+        while True:
+            response = scan_page(dynamodb, query_params, limiter, operation='query')
+            items = hydrate_items(dynamodb, response.get('Items', []), limiter)
+
+            actions, page_errors = convert_items(items)
+            if embeddings:
+                warning_count += embed_items(actions)
+            if actions:
+                page_errors += index_actions(actions, opensearch_client, limiter, index_name=index_name)
+            processed_count += len(items)
+            error_count += page_errors
+
+            # 실패한 페이지 이후로는 이 샤드의 진행 위치를 옮기지 않음
+            if page_errors and advancing:
+                advancing = False
+                failed_until.append(shard_until)
+            if advancing and items:
+                shard_until = max(int(item['updatedAt']['N']) for item in items)
+                synced_until = max(synced_until or 0, shard_until)
+
+            if not response.get('LastEvaluatedKey'):
+                break
+            query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    if failed_until:
+        synced_until = None if None in failed_until else min(failed_until)
+    if synced_until is not None and synced_until > (watermark or 0):
+        watermark = synced_until
+        save_watermark(watermark_path, watermark)
+
+    print(f"Delta sync processed {processed_count} memos with {error_count} errors, "
+          f"{warning_count} indexed without embedding, watermark {watermark}")
+    return error_count == 0
 
 def create_index_if_not_exists(client):
     try:
-        if not client.indices.exists(COLLECTION_NAME):
-            print(f"Creating index {COLLECTION_NAME}...")
-            index_body = {
-                'settings': {
-                    'index': {
-                        'number_of_shards': 1,
-                        'number_of_replicas': 1
-                    },
-                    "analysis": {
-                        "analyzer": {
-                            "ngram_analyzer": {
-                                "type": "custom",
-                                "tokenizer": "ngram_tokenizer",
-                                "filter": ["lowercase"]
-                            },
-                            "standard_with_lowercase": {
-                                "type": "custom",
-                                "tokenizer": "standard",
-                                "filter": ["lowercase"]
-                            }
-                        },
-                        "tokenizer": {
-                            "ngram_tokenizer": {
-                                "type": "ngram",
-                                "min_gram": 2,
-                                "max_gram": 3,
-                                "token_chars": ["letter", "digit"]
-                            }
-                        }
-                    }
-                },
-                'mappings': {
-                    'properties': {
-                        'title': {
-                            'type': 'text',
-                            'analyzer': 'standard_with_lowercase',
-                            'fields': {
-                                'ngram': {
-                                    'type': 'text',
-                                    'analyzer': 'ngram_analyzer'
-                                },
-                                'keyword': {
-                                    'type': 'keyword',
-                                    'ignore_above': 256
-                                }
-                            }
-                        },
-                        'content': {
-                            'type': 'text',
-                            'analyzer': 'standard_with_lowercase',
-                            'fields': {
-                                'ngram': {
-                                    'type': 'text',
-                                    'analyzer': 'ngram_analyzer'
-                                }
-                            }
-                        },
-                        'summary': {
-                            'type': 'text',
-                            'analyzer': 'standard_with_lowercase',
-                            'fields': {
-                                'ngram': {
-                                    'type': 'text',
-                                    'analyzer': 'ngram_analyzer'
-                                }
-                            }
-                        },
-                        'tags': {
-                            'type': 'text',
-                            'fields': {
-                                'keyword': {
-                                    'type': 'keyword'
-                                }
-                            }
-                        },
-                        'prefix': {
-                            'type': 'keyword'
-                        },
-                        'priority': {
-                            'type': 'integer'
-                        },
-                        'updatedAt': {
-                            'type': 'date',
-                            'format': 'epoch_millis'
-                        }
-                    }
-                }
-            }
-            
-            client.indices.create(COLLECTION_NAME, body=index_body)
+        if not client.indices.exists(index=COLLECTION_NAME):
+            index_name = versioned_index_name(COLLECTION_NAME, 1)
+            print(f"Creating index {index_name} with alias {COLLECTION_NAME}...")
+            client.indices.create(index=index_name, body=build_index_body(aliases=[COLLECTION_NAME]))
             return wait_for_index_ready(client, COLLECTION_NAME)
         else:
             print(f"Index {COLLECTION_NAME} already exists")
@@ -242,14 +505,40 @@ def create_index_if_not_exists(client):
         return False
 
 if __name__ == "__main__":
-    client = create_opensearch_client()
-        
-    try:
-        # index_ready = create_index_if_not_exists(client)
-        # if index_ready:
-        migrate_data()
-            
-    except Exception as e:
-        print(f"Error in handler: {str(e)}")
-        raise e
-    
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="DynamoDB 메모 테이블을 OpenSearch 로 마이그레이션")
+    parser.add_argument('--segments', type=int, default=1, help="병렬 스캔 세그먼트 수 (TotalSegments)")
+    parser.add_argument('--workers', type=int, default=None, help="스캔 워커 스레드 수 (기본값: 세그먼트 수)")
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help="스캔 페이지 당 아이템 수")
+    parser.add_argument('--rate', type=float, default=TARGET_RATE, help="목표 처리량 (items/sec)")
+    parser.add_argument('--converters', type=int, default=CONVERTERS, help="변환 워커 스레드 수")
+    parser.add_argument('--indexers', type=int, default=INDEXERS, help="_bulk 색인 워커 스레드 수")
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE, help="단계 사이 큐의 최대 페이지 수")
+    parser.add_argument('--pool-size', type=int, default=None, help="OpenSearch 커넥션 풀 크기 (기본값: indexers 수)")
+    parser.add_argument('--no-compress', action='store_true', help="_bulk 요청 본문 gzip 압축 끄기")
+    parser.add_argument('--no-keep-alive', action='store_true', help="요청마다 OpenSearch 연결을 새로 맺기")
+    parser.add_argument('--embeddings', action='store_true', help="Titan 임베딩을 함께 색인")
+    parser.add_argument('--checkpoint', default=CHECKPOINT_PATH, help="진행 상황을 저장할 체크포인트 파일")
+    parser.add_argument('--resume', action='store_true', help="체크포인트에 저장된 지점부터 이어서 실행")
+    parser.add_argument('--since', nargs='?', const='watermark', default=None,
+                        help="전체 Scan 대신 updatedAt GSI 로 증분 동기화 (값 없이 주면 저장된 워터마크부터, "
+                             "또는 '6h', epoch ms, ISO 날짜)")
+    parser.add_argument('--watermark', default=WATERMARK_PATH, help="증분 동기화 워터마크 파일")
+    args = parser.parse_args()
+
+    client = create_opensearch_client(pool_maxsize=args.pool_size or args.indexers,
+                                      http_compress=not args.no_compress, keep_alive=not args.no_keep_alive)
+    # index_ready = create_index_if_not_exists(client)
+    # if index_ready:
+    if args.since:
+        since = None if args.since == 'watermark' else parse_since(args.since)
+        if not sync_since(since, args.watermark, args.page_size, args.rate, args.embeddings,
+                          opensearch_client=client):
+            sys.exit(1)
+        sys.exit(0)
+
+    # 전체 마이그레이션 시작 시각을 워터마크로 남겨 다음 --since 가 이어서 동기화하게 함
+    if not migrate_data(args.segments, args.workers, args.page_size, args.rate,
+                        checkpoint_path=args.checkpoint, resume=args.resume, converters=args.converters,
+                        indexers=args.indexers, queue_size=args.queue_size, embeddings=args.embeddings,
+                        opensearch_client=client, watermark_path=args.watermark):
+        sys.exit(1)
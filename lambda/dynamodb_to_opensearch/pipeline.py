@@ -0,0 +1,75 @@
+import time
+import threading
+from collections import Counter
+
+# 단계 사이 큐에 넣어 워커 종료를 알리는 값
+STOP = object()
+
+
+class StageStats:
+    """파이프라인 단계별 처리 아이템 수와 실제 작업 시간(큐 대기 제외)"""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0
+        self.counters = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, items, started):
+        with self._lock:
+            self.items += items
+            self.busy += time.time() - started
+
+    def count(self, name, value=1):
+        """단계별 부가 카운터 (예: 버전 조건으로 건너뛴 쓰기 수)"""
+        with self._lock:
+            self.counters[name] += value
+
+    def report(self, elapsed):
+        """처리량과 가동률 (가동률이 100% 에 가까운 단계가 병목)"""
+        throughput = self.items / elapsed if elapsed else 0
+        utilization = self.busy / (elapsed * self.workers) if elapsed else 0
+        counters = ''.join(f", {value} {name}" for name, value in sorted(self.counters.items()))
+        return (f"{self.name}: {self.items} items, {throughput:.0f} items/s, "
+                f"{self.workers} workers, {utilization:.0%} busy{counters}")
+
+
+class SegmentProgress:
+    """세그먼트의 페이지가 색인 완료된 순서와 상관없이 스캔 순서대로 진행 상황을 확정
+
+    파이프라인에서는 뒤 페이지가 먼저 색인될 수 있으므로, 앞 페이지가 모두 끝난 지점까지만
+    체크포인트에 기록해야 재개 시 빠지는 페이지가 없다.
+    """
+
+    def __init__(self, segment, processed=0, errors=0, checkpoint=None):
+        self.segment = segment
+        self.processed = processed
+        self.errors = errors
+        self.failure = None
+        self.checkpoint = checkpoint
+        self._next_page = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def complete_page(self, page_number, last_evaluated_key, processed, errors):
+        with self._lock:
+            self._pending[page_number] = (last_evaluated_key, processed, errors)
+            while self._next_page in self._pending:
+                last_evaluated_key, processed, errors = self._pending.pop(self._next_page)
+                self._next_page += 1
+                self.processed += processed
+                self.errors += errors
+                if self.checkpoint:
+                    self.checkpoint.commit_page(self.segment, last_evaluated_key, self.processed, self.errors)
+
+    def fail_page(self, page_number, error):
+        """페이지 처리 중 예외가 나면 세그먼트를 실패로 표시 (이 페이지부터는 체크포인트에 확정되지 않음)"""
+        with self._lock:
+            self.failure = f"page {page_number}: {error}"
+
+    def stats(self):
+        with self._lock:
+            return {'segment': self.segment, 'processed': self.processed,
+                    'errors': self.errors, 'failure': self.failure}
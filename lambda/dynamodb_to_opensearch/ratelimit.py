@@ -0,0 +1,46 @@
+import time
+import threading
+
+
+class AdaptiveRateLimiter:
+    """AIMD 방식으로 처리량(items/sec)을 조절하는 토큰 버킷
+
+    쓰로틀링이 없으면 target_rate 까지 조금씩 올리고(additive increase),
+    DynamoDB / OpenSearch 쓰로틀링 신호를 받으면 비율로 줄인다(multiplicative decrease).
+    여러 세그먼트 워커가 하나의 인스턴스를 공유한다.
+    """
+
+    def __init__(self, target_rate, min_rate=1.0, increase=None, decrease_factor=0.5,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.target_rate = float(target_rate)
+        self.min_rate = min(float(min_rate), self.target_rate)
+        self.increase = increase or max(1.0, self.target_rate / 20)
+        self.decrease_factor = decrease_factor
+        self.rate = self.target_rate
+        self.throttle_count = 0
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.rate
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """tokens 개 만큼 처리할 수 있을 때까지 대기 (부족하면 빚을 지고 그만큼 기다림)"""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+
+        if wait:
+            self._sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.target_rate, self.rate + self.increase)
+
+    def on_throttle(self):
+        with self._lock:
+            self.throttle_count += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
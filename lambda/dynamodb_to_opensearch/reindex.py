@@ -0,0 +1,337 @@
+"""next_memo 무중단 재색인 (blue/green)
+
+1. next_memo_v<N> 인덱스를 새 매핑으로 만들고 대량 색인용 설정(refresh/복제 끔)을 적용
+2. migration.migrate_data 로 DynamoDB 테이블 전체를 새 인덱스에 백필
+3. 백필하는 동안 쌓인 변경을 DynamoDB 스트림에서 다시 읽어 새 인덱스에 반영 (따라잡기)
+   시작한 지 스트림 보관 기간(24시간)이 지났으면 updatedAt GSI 증분 동기화(migration.sync_since)로 먼저 반영
+4. 설정을 되돌리고 next_memo 별칭을 새 인덱스로 원자적으로 옮긴 뒤, 전환 직전 변경을 한 번 더 따라잡기
+
+문서는 updatedAt 을 외부 버전으로 색인하므로 백필, 스트림 핸들러, 따라잡기가 겹쳐도 오래된 문서로 덮어쓰지 않는다.
+이전 인덱스는 지우지 않으므로 --rollback 으로 별칭을 되돌릴 수 있다.
+
+    python reindex.py --segments 4 --rate 2000
+    python reindex.py --resume
+    python reindex.py --rollback
+"""
+import sys, os
+import re
+import json
+import time
+import argparse
+import boto3
+import index
+import migration
+from mapping import ANALYZER_PROFILE, ANALYZER_PROFILES, BULK_LOAD_SETTINGS, build_index_body, versioned_index_name
+
+ALIAS = "next_memo"
+STATE_PATH = "reindex-state.json"
+CHECKPOINT_PATH = "reindex-checkpoint.json"
+WATERMARK_PATH = "reindex-watermark.json"  # 따라잡기를 GSI 증분 동기화로 할 때의 워터마크 (migration 의 것과 별도)
+CATCHUP_BATCH_SIZE = 500  # 따라잡기에서 process_records 한 번에 넘길 스트림 레코드 수
+# 스트림 레코드 생성 시각은 근사값이므로 여유를 두고 더 앞에서부터 다시 읽음 (중복 반영은 버전으로 무시됨)
+CATCHUP_MARGIN_MS = 60 * 1000
+# DynamoDB 스트림 보관 기간, 경계 근처의 레코드는 읽는 동안 잘릴 수 있으므로 한 시간 일찍 GSI 로 전환
+STREAM_RETENTION_MS = 24 * 60 * 60 * 1000
+STREAM_RETENTION_MARGIN_MS = 60 * 60 * 1000
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+def load_state(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(path, state):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def index_versions(client):
+    """존재하는 next_memo_v<N> 인덱스의 N 목록 (오름차순)"""
+    pattern = re.compile(rf"^{re.escape(ALIAS)}_v(\d+)$")
+    names = client.indices.get(f"{ALIAS}_v*")
+    return sorted(int(match.group(1)) for match in map(pattern.match, names) if match)
+
+
+def alias_targets(client):
+    """next_memo 별칭이 가리키는 인덱스 목록 (별칭이 아니라 실제 인덱스면 빈 목록)"""
+    return sorted(client.indices.get_alias(ALIAS))
+
+
+def is_concrete_index(client):
+    """next_memo 가 별칭이 아니라 예전 방식으로 만든 실제 인덱스인지 확인"""
+    return not alias_targets(client) and client.indices.exists(index=ALIAS)
+
+
+def apply_settings(client, index_name, settings, label):
+    """인덱스 설정 변경 (OpenSearch Serverless 처럼 지원하지 않는 경우 경고만 출력)"""
+    try:
+        client.indices.put_settings(index=index_name, body=settings)
+        print(f"Applied {label} settings to {index_name}")
+        return True
+    except Exception as e:
+        print(f"Skipping {label} settings for {index_name}: {str(e)}")
+        return False
+
+
+def create_target_index(client, index_name, analyzer=None, embeddings=False):
+    """embeddings 이면 knn_vector 필드를 포함 (VECTORSEARCH 컬렉션에서만 생성 가능)"""
+    print(f"Creating index {index_name} with {analyzer or ANALYZER_PROFILE} analyzer profile...")
+    client.indices.create(index=index_name, body=build_index_body(profile=analyzer, embeddings=embeddings))
+    apply_settings(client, index_name, BULK_LOAD_SETTINGS, 'bulk load')
+    return migration.wait_for_index_ready(client, index_name)
+
+
+def finalize_target_index(client, index_name):
+    """대량 색인용 설정을 원래 매핑의 값으로 되돌리고 검색 가능하도록 refresh"""
+    settings = build_index_body()['settings']['index']
+    apply_settings(client, index_name, {'index': {
+        'refresh_interval': settings.get('refresh_interval'),
+        'number_of_replicas': settings.get('number_of_replicas'),
+    }}, 'search')
+    try:
+        client.indices.refresh(index=index_name)
+    except Exception as e:
+        print(f"Skipping refresh for {index_name}: {str(e)}")
+
+
+def list_shards(streams, stream_arn):
+    """스트림의 모든 샤드를 부모 샤드가 먼저 오도록 정렬해 반환"""
+    shards, start_shard_id = [], None
+    while True:
+        params = {'StreamArn': stream_arn}
+        if start_shard_id:
+            params['ExclusiveStartShardId'] = start_shard_id
+        description = streams.describe_stream(**params)['StreamDescription']
+        shards.extend(description['Shards'])
+        start_shard_id = description.get('LastEvaluatedShardId')
+        if not start_shard_id:
+            break
+
+    known = {shard['ShardId'] for shard in shards}
+    ordered, emitted = [], set()
+    while len(ordered) < len(shards):
+        for shard in shards:
+            parent = shard.get('ParentShardId')
+            if shard['ShardId'] not in emitted and (parent not in known or parent in emitted):
+                ordered.append(shard)
+                emitted.add(shard['ShardId'])
+    return ordered
+
+
+def record_created_ms(record):
+    created = record['dynamodb'].get('ApproximateCreationDateTime', 0)
+    # boto3 는 datetime, Lambda 이벤트는 epoch 초
+    if hasattr(created, 'timestamp'):
+        created = created.timestamp()
+    return int(created * 1000)
+
+
+def read_stream_records(streams, stream_arn, since_ms):
+    """스트림(최대 24시간 보관)에서 since_ms 이후에 생성된 레코드를 샤드 순서대로 읽음"""
+    for shard in list_shards(streams, stream_arn):
+        iterator = streams.get_shard_iterator(StreamArn=stream_arn, ShardId=shard['ShardId'],
+                                              ShardIteratorType='TRIM_HORIZON')['ShardIterator']
+        is_open = 'EndingSequenceNumber' not in shard.get('SequenceNumberRange', {})
+        while iterator:
+            response = streams.get_records(ShardIterator=iterator, Limit=1000)
+            records = response.get('Records', [])
+            for record in records:
+                if record_created_ms(record) >= since_ms:
+                    yield record
+            iterator = response.get('NextShardIterator')
+            # 열린 샤드는 끝이 없으므로 빈 응답(최신 지점 도달)에서 멈춤
+            if is_open and not records:
+                break
+
+
+def catch_up(client, streams, stream_arn, since_ms, index_name):
+    """since_ms 이후의 스트림 변경을 스트림 핸들러와 같은 경로(process_records)로 index_name 에 반영"""
+    print(f"Catching up {index_name} with stream changes since {since_ms}...")
+    applied = failed = 0
+    batch = []
+
+    def flush():
+        nonlocal applied, failed
+        results = index.process_records(batch, client, index_name=index_name)
+        applied += sum(1 for ok, _ in results if ok)
+        failed += sum(1 for ok, _ in results if not ok)
+        batch.clear()
+
+    for record in read_stream_records(streams, stream_arn, since_ms):
+        batch.append(record)
+        if len(batch) >= CATCHUP_BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+
+    print(f"Catch-up applied {applied} stream records ({failed} failed)")
+    return failed == 0
+
+
+def catch_up_changes(client, dynamodb, streams, stream_arn, since_ms, index_name, watermark_path=WATERMARK_PATH,
+                     **sync_options):
+    """since_ms 이후 변경을 index_name 에 반영
+
+    since_ms 가 스트림 보관 기간보다 오래전이면 스트림에서 이미 지워진 변경이 있으므로
+    updatedAt GSI 로 그 이후 수정된 메모를 먼저 색인한 뒤, 남아 있는 스트림(삭제 포함)을 따라잡는다.
+    보관 기간이 지난 삭제는 복구할 수 없으므로 경고를 출력한다.
+    """
+    if now_ms() - since_ms > STREAM_RETENTION_MS - STREAM_RETENTION_MARGIN_MS:
+        print(f"Changes since {since_ms} are older than the stream retention; "
+              f"syncing updated memos from {migration.UPDATED_INDEX} first")
+        print(f"Warning: memos deleted more than {STREAM_RETENTION_MS // 3600000}h ago may remain in {index_name}")
+        if not migration.sync_since(since_ms, watermark_path, dynamodb=dynamodb, opensearch_client=client,
+                                    index_name=index_name, **sync_options):
+            return False
+    return catch_up(client, streams, stream_arn, since_ms, index_name)
+
+
+def swap_alias(client, target, replace_concrete=False):
+    """next_memo 별칭을 target 으로 원자적으로 옮기고 이전 대상 인덱스 목록을 반환
+
+    next_memo 가 실제 인덱스인 경우(최초 전환)에는 replace_concrete 일 때만 그 인덱스를 지우고 별칭을 만든다.
+    """
+    previous = alias_targets(client)
+    actions = [{'add': {'index': target, 'alias': ALIAS}}]
+    actions += [{'remove': {'index': name, 'alias': ALIAS}} for name in previous if name != target]
+    if not previous and client.indices.exists(index=ALIAS):
+        if not replace_concrete:
+            raise RuntimeError(f"{ALIAS} is a concrete index; pass --replace-concrete-index to replace it")
+        actions.append({'remove_index': {'index': ALIAS}})
+
+    client.indices.update_aliases(body={'actions': actions})
+    print(f"Alias {ALIAS} now points to {target} (previously: {', '.join(previous) or 'none'})")
+    return previous
+
+
+def stream_arn_for_table(dynamodb, table_name=migration.TABLE_NAME):
+    return dynamodb.describe_table(TableName=table_name)['Table']['LatestStreamArn']
+
+
+def reindex(version=None, resume=False, swap=True, replace_concrete=False, analyzer=None, state_path=STATE_PATH,
+            checkpoint_path=CHECKPOINT_PATH, watermark_path=WATERMARK_PATH, opensearch_client=None, dynamodb=None,
+            streams=None, **migration_options):
+    """새 버전 인덱스를 만들어 백필하고 스트림 변경을 따라잡은 뒤 별칭을 전환
+
+    analyzer 는 새 인덱스의 분석기 프로필 (mapping.ANALYZER_PROFILES).
+    resume 이면 state_path 에 기록된 인덱스와 시작 시각으로 이어서 진행한다.
+    따라잡기 구간이 스트림 보관 기간을 넘으면 updatedAt GSI 로 보충한다 (catch_up_changes).
+    """
+    client = opensearch_client or migration.create_opensearch_client(
+        pool_maxsize=migration_options.get('indexers', migration.INDEXERS))
+    dynamodb = dynamodb or boto3.client('dynamodb', region_name=migration.AWS_REGION)
+    streams = streams or boto3.client('dynamodbstreams', region_name=migration.AWS_REGION)
+    stream_arn = stream_arn_for_table(dynamodb)
+
+    if swap and not replace_concrete and is_concrete_index(client):
+        print(f"{ALIAS} is a concrete index, not an alias. The first switch deletes it; "
+              f"re-run with --replace-concrete-index (no rollback for that step) or --no-swap.")
+        return False
+
+    if resume and os.path.exists(state_path):
+        state = load_state(state_path)
+        print(f"Resuming reindex into {state['index']} started at {state['started_at']}")
+        if state['phase'] == 'swapped':
+            print(f"Alias {ALIAS} already points to {state['index']}")
+            return True
+    else:
+        target = versioned_index_name(ALIAS, version or (max(index_versions(client), default=0) + 1))
+        state = {'index': target, 'started_at': now_ms(), 'phase': 'backfill'}
+        if not create_target_index(client, target, analyzer, migration_options.get('embeddings', False)):
+            return False
+        save_state(state_path, state)
+        resume = False
+    target = state['index']
+
+    if state['phase'] == 'backfill':
+        if not migration.migrate_data(checkpoint_path=checkpoint_path, resume=resume, dynamodb=dynamodb,
+                                      opensearch_client=client, index_name=target, **migration_options):
+            print("Backfill failed; fix the errors and re-run with --resume")
+            return False
+        state['phase'] = 'catchup'
+        save_state(state_path, state)
+
+    sync_options = {name: migration_options[name] for name in ('target_rate', 'embeddings')
+                    if name in migration_options}
+
+    def catch_up_since(since_ms):
+        return catch_up_changes(client, dynamodb, streams, stream_arn, since_ms - CATCHUP_MARGIN_MS, target,
+                                watermark_path, **sync_options)
+
+    if state['phase'] == 'catchup':
+        caught_up_at = now_ms()
+        if not catch_up_since(state['started_at']):
+            print("Catch-up had failures; re-run with --resume")
+            return False
+        finalize_target_index(client, target)
+        state.update(phase='ready', caught_up_at=caught_up_at)
+        save_state(state_path, state)
+
+    if not swap:
+        print(f"{target} is ready; run again with --resume to switch the alias")
+        return True
+
+    previous = swap_alias(client, target, replace_concrete)
+    state.update(phase='swapped', swapped_at=now_ms(), previous=previous)
+    save_state(state_path, state)
+
+    # 첫 따라잡기 이후 전환 전까지 스트림 핸들러가 이전 인덱스에만 쓴 변경을 반영
+    ok = catch_up_since(state['caught_up_at'])
+    if previous:
+        print(f"Previous index kept for rollback: {', '.join(previous)} (python reindex.py --rollback)")
+    return ok
+
+
+def rollback(opensearch_client=None, dynamodb=None, streams=None, state_path=STATE_PATH):
+    """별칭을 바로 이전 버전 인덱스로 되돌리고, 전환 이후 변경을 그 인덱스에 따라잡기"""
+    client = opensearch_client or migration.create_opensearch_client()
+    dynamodb = dynamodb or boto3.client('dynamodb', region_name=migration.AWS_REGION)
+    streams = streams or boto3.client('dynamodbstreams', region_name=migration.AWS_REGION)
+
+    current = alias_targets(client)
+    current_version = max((int(name.rsplit('_v', 1)[1]) for name in current if '_v' in name), default=None)
+    previous = [version for version in index_versions(client)
+                if current_version is None or version < current_version]
+    if not previous:
+        print(f"No previous {ALIAS}_v<N> index to roll back to")
+        return False
+
+    target = versioned_index_name(ALIAS, previous[-1])
+    swap_alias(client, target)
+    # 전환 시각을 모르면 스트림 전체(최대 24시간)를 다시 반영
+    swapped_at = load_state(state_path).get('swapped_at', 0) if os.path.exists(state_path) else 0
+    return catch_up(client, streams, stream_arn_for_table(dynamodb), max(swapped_at - CATCHUP_MARGIN_MS, 0), target)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="next_memo 무중단 재색인 (새 버전 인덱스 백필 후 별칭 전환)")
+    parser.add_argument('--version', type=int, default=None, help="만들 인덱스 버전 N (기본값: 기존 최대 + 1)")
+    parser.add_argument('--analyzer', choices=ANALYZER_PROFILES, default=None,
+                        help=f"새 인덱스의 분석기 프로필 (기본값: {ANALYZER_PROFILE})")
+    parser.add_argument('--segments', type=int, default=4, help="병렬 스캔 세그먼트 수")
+    parser.add_argument('--rate', type=float, default=migration.TARGET_RATE, help="목표 처리량 (items/sec)")
+    parser.add_argument('--indexers', type=int, default=migration.INDEXERS, help="_bulk 색인 워커 스레드 수")
+    parser.add_argument('--embeddings', action='store_true',
+                        help="Titan 임베딩을 함께 색인 (knn_vector 매핑 포함, VECTORSEARCH 컬렉션 필요)")
+    parser.add_argument('--resume', action='store_true', help="중단된 재색인을 상태 파일에서 이어서 실행")
+    parser.add_argument('--no-swap', action='store_true', help="백필과 따라잡기만 하고 별칭은 옮기지 않음")
+    parser.add_argument('--replace-concrete-index', action='store_true',
+                        help="next_memo 가 실제 인덱스면 삭제하고 별칭으로 교체 (최초 1회)")
+    parser.add_argument('--rollback', action='store_true', help="별칭을 이전 버전 인덱스로 되돌림")
+    args = parser.parse_args()
+
+    if args.rollback:
+        ok = rollback()
+    else:
+        ok = reindex(args.version, resume=args.resume, swap=not args.no_swap,
+                     replace_concrete=args.replace_concrete_index, analyzer=args.analyzer,
+                     total_segments=args.segments,
+                     target_rate=args.rate, indexers=args.indexers, embeddings=args.embeddings)
+    if not ok:
+        sys.exit(1)
@@ -0,0 +1,121 @@
+"""동기화 Lambda 의 on-failure SQS 큐에 쌓인 실패 배치를 다시 색인
+
+재시도를 모두 소진한 스트림 배치는 레코드 자체가 아니라 샤드와 시퀀스 번호 범위(DDBStreamBatchInfo)만 큐에 남는다.
+그 범위의 레코드를 DynamoDB 스트림에서 다시 읽어 스트림 핸들러와 같은 경로(process_records)로 색인하고,
+모두 성공한 메시지만 큐에서 지운다. 문서는 updatedAt 버전으로 색인되므로 이미 더 새로운 문서가 있으면 무시된다.
+
+스트림 보관 기간(24시간)이 지난 배치는 다시 읽을 수 없으므로 migration.py --since 로 그 시각 이후를 동기화한다.
+
+    python replay_failures.py --queue-url https://sqs.ap-northeast-2.amazonaws.com/123456789012/next-memo-sync-failures
+    python replay_failures.py --dry-run
+"""
+import sys, os
+import json
+import argparse
+import boto3
+import index
+import migration
+
+ALIAS = "next_memo"
+QUEUE_URL = os.environ.get('SYNC_FAILURE_QUEUE_URL')
+# 한 메시지(배치)를 다시 읽고 색인하는 동안 다른 소비자에게 보이지 않도록 하는 시간
+VISIBILITY_TIMEOUT = 300  # seconds
+
+
+def batch_info(message):
+    return json.loads(message['Body'])['DDBStreamBatchInfo']
+
+
+def describe_batch(info):
+    return f"{info['shardId']} {info['startSequenceNumber']}..{info['endSequenceNumber']} ({info.get('batchSize')} records)"
+
+
+def read_batch_records(streams, info):
+    """배치의 시작 시퀀스 번호부터 끝 시퀀스 번호까지 스트림 레코드를 읽음"""
+    end = int(info['endSequenceNumber'])
+    iterator = streams.get_shard_iterator(StreamArn=info['streamArn'], ShardId=info['shardId'],
+                                          ShardIteratorType='AT_SEQUENCE_NUMBER',
+                                          SequenceNumber=info['startSequenceNumber'])['ShardIterator']
+    records = []
+    while iterator:
+        response = streams.get_records(ShardIterator=iterator, Limit=1000)
+        page = response.get('Records', [])
+        for record in page:
+            if int(record['dynamodb']['SequenceNumber']) > end:
+                return records
+            records.append(record)
+        # 열린 샤드는 끝이 없으므로 빈 응답(최신 지점 도달)에서 멈춤
+        if not page:
+            break
+        iterator = response.get('NextShardIterator')
+    return records
+
+
+def replay_batch(client, streams, info, index_name=ALIAS):
+    """실패 배치 하나를 다시 색인하고 모든 레코드가 성공했는지 반환"""
+    try:
+        records = read_batch_records(streams, info)
+    except Exception as e:
+        print(f"Cannot read {describe_batch(info)}: {str(e)}")
+        records = []
+    if not records:
+        print(f"No stream records left for {describe_batch(info)}; run "
+              f"`python migration.py --since {info.get('approximateArrivalOfFirstRecord')}` instead")
+        return False
+
+    results = index.process_records(records, client, index_name=index_name)
+    failed = sum(1 for ok, _ in results if not ok)
+    print(f"Replayed {describe_batch(info)}: {len(records) - failed} indexed, {failed} failed")
+    return failed == 0
+
+
+def replay_failures(queue_url=QUEUE_URL, max_messages=None, delete=True, dry_run=False, index_name=ALIAS,
+                    opensearch_client=None, sqs=None, streams=None):
+    """큐가 빌 때까지 (또는 max_messages 개까지) 실패 배치를 다시 색인
+
+    성공한 메시지는 delete 일 때 큐에서 지우고, 실패한 메시지는 가시성 제한 시간이 지나면 큐에 다시 나타난다.
+    """
+    client = opensearch_client or migration.create_opensearch_client()
+    sqs = sqs or boto3.client('sqs', region_name=migration.AWS_REGION)
+    streams = streams or boto3.client('dynamodbstreams', region_name=migration.AWS_REGION)
+
+    received = replayed = failed = 0
+    while max_messages is None or received < max_messages:
+        batch_size = 10 if max_messages is None else min(10, max_messages - received)
+        messages = sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=batch_size, WaitTimeSeconds=1,
+                                       VisibilityTimeout=VISIBILITY_TIMEOUT).get('Messages', [])
+        if not messages:
+            break
+        received += len(messages)
+
+        for message in messages:
+            info = batch_info(message)
+            if dry_run:
+                print(f"Failed batch {describe_batch(info)}, first record at {info.get('approximateArrivalOfFirstRecord')}")
+                continue
+            if replay_batch(client, streams, info, index_name):
+                replayed += 1
+                if delete:
+                    sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=message['ReceiptHandle'])
+            else:
+                failed += 1
+
+    print(f"Received {received} failed batches: {replayed} replayed, {failed} still failing")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="on-failure 큐의 실패한 스트림 배치를 다시 색인")
+    parser.add_argument('--queue-url', default=QUEUE_URL, help="동기화 Lambda 의 on-failure SQS 큐 URL")
+    parser.add_argument('--max-messages', type=int, default=None, help="처리할 최대 메시지 수")
+    parser.add_argument('--keep-messages', action='store_true', help="다시 색인한 메시지를 큐에서 지우지 않음")
+    parser.add_argument('--dry-run', action='store_true', help="색인하지 않고 실패 배치 목록만 출력")
+    parser.add_argument('--index', default=ALIAS, help="색인할 인덱스 또는 별칭")
+    args = parser.parse_args()
+
+    if not args.queue_url:
+        parser.error("--queue-url 또는 SYNC_FAILURE_QUEUE_URL 이 필요합니다")
+
+    if not replay_failures(args.queue_url, args.max_messages, delete=not args.keep_messages,
+                           dry_run=args.dry_run, index_name=args.index):
+        sys.exit(1)
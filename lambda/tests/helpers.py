@@ -0,0 +1,248 @@
+import io
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+from botocore.exceptions import ClientError
+
+
+def memo_image(memo_id, title='title', content='content', updated_at=1700000000000, **extra):
+    image = {
+        'id': {'S': memo_id},
+        'title': {'S': title},
+        'content': {'S': content},
+        'summary': {'S': extra.pop('summary', '')},
+        'tags': {'L': [{'S': tag} for tag in extra.pop('tags', [])]},
+        'priority': {'N': str(extra.pop('priority', 0))},
+        'updatedAt': {'N': str(updated_at)},
+    }
+    image.update(extra)
+    return image
+
+
+def stream_record(event_name, memo_id, sequence_number=1, old_image=None, new_image=None, **fields):
+    dynamodb = {
+        'Keys': {'id': {'S': memo_id}},
+        'SequenceNumber': str(sequence_number),
+    }
+    if event_name != 'INSERT':
+        dynamodb['OldImage'] = old_image or memo_image(memo_id, **fields)
+    if event_name != 'REMOVE':
+        dynamodb['NewImage'] = new_image or memo_image(memo_id, **fields)
+    return {
+        'eventID': f'event-{sequence_number}',
+        'eventName': event_name,
+        'dynamodb': dynamodb,
+    }
+
+
+class FakeOpenSearch:
+    """_bulk 요청을 기록하고 action 별 결과를 돌려주는 테스트용 클라이언트
+
+    문서와 내부 _version 을 인덱스 별로 저장해 OpenSearch 의 버전 규칙을 흉내낸다.
+    external_gte 버전의 index / delete 는 저장된 _version 보다 작으면 409 이고, 성공하면 _version 이 그 값이 된다.
+    _update 는 외부 버전을 받지 않고 _version 을 1 올린다 (스크립트가 ctx.op = 'none' 이면 그대로).
+    """
+
+    def __init__(self, fail_ids=(), stale_ids=()):
+        self.fail_ids = set(fail_ids)
+        self.stale_ids = set(stale_ids)
+        self.documents = {}
+        self.bulk_calls = []
+        self.last_request_bytes = 0
+
+    def document(self, doc_id, index='next_memo'):
+        """저장된 {'_version', '_source'} (없으면 None)"""
+        return self.documents.get((index, doc_id))
+
+    def bulk(self, body, **kwargs):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.last_request_bytes = len(body)
+        body = body.decode('utf-8')
+        lines = [json.loads(line) for line in body.splitlines() if line]
+        self.bulk_calls.append(lines)
+
+        items, i = [], 0
+        while i < len(lines):
+            op, meta = next(iter(lines[i].items()))
+            source = None if op == 'delete' else lines[i + 1]
+            i += 1 if op == 'delete' else 2
+            if meta['_id'] in self.fail_ids:
+                items.append({op: {'_id': meta['_id'], 'status': 400,
+                                   'error': {'type': 'mapper_parsing_exception', 'reason': 'bad'}}})
+            elif meta['_id'] in self.stale_ids:
+                items.append({op: {'_id': meta['_id'], 'status': 409,
+                                   'error': {'type': 'version_conflict_engine_exception', 'reason': 'stale'}}})
+            else:
+                items.append({op: self._apply(op, meta, source)})
+        return {'errors': bool(self.fail_ids), 'items': items}
+
+    def _apply(self, op, meta, source):
+        key = (meta.get('_index', 'next_memo'), meta['_id'])
+        stored = self.documents.get(key)
+        version = meta.get('version')
+        if version is not None and stored and version < stored['_version']:
+            return {'_id': meta['_id'], 'status': 409,
+                    'error': {'type': 'version_conflict_engine_exception', 'reason': 'stale'}}
+
+        if op == 'delete':
+            if not stored:
+                return {'_id': meta['_id'], 'status': 404, 'result': 'not_found'}
+            del self.documents[key]
+            return {'_id': meta['_id'], 'status': 200, 'result': 'deleted'}
+        if op == 'update':
+            if not stored:
+                return {'_id': meta['_id'], 'status': 404,
+                        'error': {'type': 'document_missing_exception', 'reason': 'missing'}}
+            fields = source['script']['params']['doc'] if 'script' in source else source['doc']
+            if stored['_source'].get('updatedAt', 0) > fields.get('updatedAt', 0):
+                return {'_id': meta['_id'], 'status': 200, 'result': 'noop'}
+            stored['_source'].update(fields)
+            stored['_version'] += 1
+            return {'_id': meta['_id'], 'status': 200, 'result': 'updated'}
+
+        if version is None:
+            version = stored['_version'] + 1 if stored else 1
+        self.documents[key] = {'_version': version, '_source': source}
+        return {'_id': meta['_id'], 'status': 201, 'result': 'created'}
+
+    def search(self, index, body):
+        """ids 쿼리만 지원"""
+        ids = body['query']['ids']['values']
+        fields = body.get('_source')
+        hits = []
+        for doc_id in ids:
+            stored = self.documents.get((index, doc_id))
+            if stored:
+                source = {name: value for name, value in stored['_source'].items() if not fields or name in fields}
+                hits.append({'_id': doc_id, '_source': source})
+        return {'hits': {'hits': hits}}
+
+
+class FakeDynamoDB:
+    """Segment/TotalSegments 와 페이지네이션을 흉내내는 테스트용 Scan 클라이언트
+
+    updatedAt GSI Query 와 BatchGetItem 도 지원한다 (gsi_attributes 로 GSI 프로젝션을 좁힐 수 있음).
+    """
+
+    def __init__(self, items, gsi_attributes=None):
+        self.items = sorted(items, key=lambda item: item['id']['S'])
+        self.gsi_attributes = gsi_attributes
+        self.scan_calls = []
+        self.query_calls = []
+        self.batch_get_calls = []
+
+    def query(self, TableName, IndexName, KeyConditionExpression, ExpressionAttributeValues, Limit,
+              ExclusiveStartKey=None, ScanIndexForward=True, **kwargs):
+        self.query_calls.append({'IndexName': IndexName, 'ExclusiveStartKey': ExclusiveStartKey})
+        since = int(ExpressionAttributeValues[':since']['N'])
+        key = ExpressionAttributeValues[':key']['S']
+        # gsiPartitionKey 가 없는 아이템은 샤딩 이전의 "ALL" 파티션에 있는 것으로 취급
+        matches = sorted((item for item in self.items if int(item['updatedAt']['N']) >= since
+                          and item.get('gsiPartitionKey', {'S': 'ALL'})['S'] == key),
+                         key=lambda item: (int(item['updatedAt']['N']), item['id']['S']))
+
+        start = 0
+        if ExclusiveStartKey:
+            ids = [item['id']['S'] for item in matches]
+            start = ids.index(ExclusiveStartKey['id']['S']) + 1
+
+        page = matches[start:start + Limit]
+        if self.gsi_attributes:
+            page = [{name: value for name, value in item.items() if name in self.gsi_attributes} for item in page]
+        response = {'Items': page, 'Count': len(page)}
+        if start + Limit < len(matches):
+            response['LastEvaluatedKey'] = {'id': page[-1]['id'], 'updatedAt': page[-1]['updatedAt']}
+        return response
+
+    def batch_get_item(self, RequestItems):
+        (table, request), = RequestItems.items()
+        ids = {key['id']['S'] for key in request['Keys']}
+        self.batch_get_calls.append(sorted(ids))
+        return {'Responses': {table: [item for item in self.items if item['id']['S'] in ids]}}
+
+    def scan(self, TableName, Limit, Segment=0, TotalSegments=1, ExclusiveStartKey=None, **kwargs):
+        self.scan_calls.append({'Segment': Segment, 'ExclusiveStartKey': ExclusiveStartKey})
+        segment_items = [item for i, item in enumerate(self.items) if i % TotalSegments == Segment]
+
+        start = 0
+        if ExclusiveStartKey:
+            ids = [item['id']['S'] for item in segment_items]
+            start = ids.index(ExclusiveStartKey['id']['S']) + 1
+
+        page = segment_items[start:start + Limit]
+        response = {'Items': page, 'Count': len(page)}
+        if start + Limit < len(segment_items):
+            response['LastEvaluatedKey'] = {'id': page[-1]['id']}
+        return response
+
+
+class FakeBedrock:
+    """Titan 임베딩 응답 형식을 흉내내는 로컬 Bedrock Runtime 스텁"""
+
+    def __init__(self, dimension=4, max_input_chars=None, error=None):
+        self.dimension = dimension
+        # 주어지면 모든 호출에서 이 예외를 던짐 (쓰로틀링, 장애)
+        self.error = error
+        # 입력 토큰 제한을 흉내내 이보다 긴 입력은 ValidationException 으로 거절
+        self.max_input_chars = max_input_chars
+        self.calls = []
+
+    def invoke_model(self, modelId, body, **kwargs):
+        request = json.loads(body)
+        self.calls.append(request['inputText'])
+        if self.error:
+            raise self.error
+        if self.max_input_chars and len(request['inputText']) > self.max_input_chars:
+            raise ClientError({'Error': {'Code': 'ValidationException', 'Message': 'Too many input tokens'}},
+                              'InvokeModel')
+        seed = sum(request['inputText'].encode('utf-8'))
+        vector = [((seed * (i + 1)) % 97) / 97 for i in range(self.dimension)]
+        return {'body': io.BytesIO(json.dumps({'embedding': vector}).encode('utf-8'))}
+
+
+class InFlightCounter:
+    """호출마다 delay 초 동안 머물며 동시에 실행 중인 호출 수의 최댓값을 기록"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.in_flight = self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class SlowOpenSearch(FakeOpenSearch):
+    """_bulk 요청마다 지연을 두고 동시에 처리 중인 요청 수를 기록하는 FakeOpenSearch"""
+
+    def __init__(self, delay=0.05, **kwargs):
+        super().__init__(**kwargs)
+        self.counter = InFlightCounter(delay)
+
+    def bulk(self, body, **kwargs):
+        with self.counter.track():
+            return super().bulk(body, **kwargs)
+
+
+class SlowBedrock(FakeBedrock):
+    """호출마다 지연을 두고 동시에 처리 중인 호출 수를 기록하는 FakeBedrock"""
+
+    def __init__(self, delay=0.02, **kwargs):
+        super().__init__(**kwargs)
+        self.counter = InFlightCounter(delay)
+
+    def invoke_model(self, **kwargs):
+        with self.counter.track():
+            return super().invoke_model(**kwargs)
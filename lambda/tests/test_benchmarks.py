@@ -0,0 +1,92 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+import index
+from fake_opensearch import FakeOpenSearchServer
+from ingest_bench import benchmark_environment, run_migration_benchmark, run_stream_benchmark
+from cold_start_bench import run_cold_start_benchmark
+from compression_bench import run_compression_benchmark
+from analyzer_bench import run_analyzer_benchmark, search_body
+from power_tuning_bench import run_power_tuning_benchmark
+import connection
+from mapping import build_index_body
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(index, '_client', None)
+    monkeypatch.setattr(index, 'HTTP_COMPRESS', index.HTTP_COMPRESS)
+    monkeypatch.setattr(index, 'KEEP_ALIVE', index.KEEP_ALIVE)
+    server = FakeOpenSearchServer().start()
+    # 벤치마크가 configure_environment 로 다시 써도 테스트가 끝나면 원래 값(없으면 삭제)으로 되돌림
+    for name, value in benchmark_environment(server.endpoint).items():
+        monkeypatch.setenv(name, value)
+    yield server
+    server.stop()
+    index._client = None
+
+
+def test_stream_benchmark_indexes_through_fake_endpoint(server):
+    result = run_stream_benchmark(server, batches=3, batch_size=20)
+
+    assert result['records'] == 60
+    assert result['requests']['POST /_bulk'] == 3
+    assert server.documents
+
+
+def test_migration_benchmark_backfills_every_item(server):
+    result = run_migration_benchmark(server, items=150, segments=3, page_size=20)
+
+    assert len(server.documents) == 150
+    assert result['scan_calls'] >= 9
+
+
+def test_cold_start_benchmark_runs_fresh_processes(server):
+    result = run_cold_start_benchmark(server, runs=1, batch_size=5)
+
+    assert result['runs'] == 1
+    assert result['init']['p50_ms'] > 0
+    assert result['invoke']['p50_ms'] > 0
+
+
+def test_compression_benchmark_reduces_bytes_sent(server):
+    results = run_compression_benchmark(server, batches=2, batch_size=20, items=50, segments=1, page_size=25)
+
+    for path in ('stream', 'migration'):
+        assert results['gzip'][path]['bytes_sent'] < results['plain'][path]['bytes_sent']
+    assert results['gzip, no keep-alive']['stream']['connections'] > results['gzip']['stream']['connections']
+
+
+def test_analyzer_benchmark_creates_and_drops_index_per_profile(server):
+    client = connection.create_opensearch_client(server.endpoint, 'us-east-1')
+    results = run_analyzer_benchmark(client, docs=30, queries=6)
+
+    assert [result['profile'] for result in results] == ['ngram', 'edge_ngram', 'nori']
+    for result in results:
+        assert result['index_errors'] == 0
+        assert server.requests[f"PUT /analyzer_bench_{result['profile']}"] == 1
+        assert server.requests[f"POST /analyzer_bench_{result['profile']}/_search"] == 6
+    assert len(server.documents) == 30
+
+
+def test_search_queries_every_autocomplete_subfield():
+    properties = build_index_body(profile='edge_ngram')['mappings']['properties']
+    autocomplete = {f"{name}.autocomplete" for name, field in properties.items()
+                    if 'autocomplete' in field.get('fields', {})}
+    [match] = search_body('메모')['query']['bool']['must']
+
+    assert autocomplete == {'title.autocomplete', 'tags.autocomplete'}
+    assert autocomplete <= set(match['multi_match']['fields'])
+
+
+def test_power_tuning_benchmark_prices_each_memory_setting(server):
+    result = run_power_tuning_benchmark(server, batches=2, batch_size=10, memory_sizes=(256, 1769))
+
+    small, full = result['settings']
+    assert result['records'] == 20
+    assert small['p50_ms'] >= full['p50_ms']
+    assert all(setting['usd_per_1k_records'] > 0 for setting in result['settings'])
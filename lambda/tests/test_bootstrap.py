@@ -0,0 +1,43 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+import bootstrap
+import index
+
+
+@pytest.fixture
+def created(monkeypatch):
+    calls = []
+    monkeypatch.setattr(index, 'get_opensearch_client', lambda: 'client')
+    monkeypatch.setattr(index, 'create_index_if_not_exists', lambda client: calls.append(client) or True)
+    return calls
+
+
+def test_create_and_update_bootstrap_the_index(created):
+    for request_type in ('Create', 'Update'):
+        assert bootstrap.on_event({'RequestType': request_type}, None) == {'PhysicalResourceId': 'next_memo'}
+    assert created == ['client', 'client']
+
+
+def test_delete_keeps_the_index(created):
+    bootstrap.on_event({'RequestType': 'Delete'}, None)
+
+    assert created == []
+
+
+def test_failed_bootstrap_fails_the_deployment(monkeypatch):
+    monkeypatch.setattr(index, 'get_opensearch_client', lambda: 'client')
+    monkeypatch.setattr(index, 'create_index_if_not_exists', lambda client: False)
+
+    with pytest.raises(RuntimeError):
+        bootstrap.on_event({'RequestType': 'Create'}, None)
+
+
+def test_bootstrap_import_skips_migration_and_boto3():
+    source_dir = os.path.join(os.path.dirname(__file__), '..', 'dynamodb_to_opensearch')
+    script = "import sys, bootstrap; print(','.join(m for m in ('migration', 'boto3') if m in sys.modules))"
+    result = subprocess.run([sys.executable, '-c', script], cwd=source_dir, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ''
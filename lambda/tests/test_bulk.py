@@ -0,0 +1,37 @@
+from bulk import chunk_actions, index_action, delete_action, send_bulk, partition_by_id
+from helpers import FakeOpenSearch
+
+
+def test_chunk_actions_respects_action_and_byte_limits():
+    actions = [index_action(str(i), {'content': 'x' * 100}) for i in range(10)]
+
+    chunks = list(chunk_actions(actions, 'memo', max_actions=4))
+    assert [positions for positions, _ in chunks] == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+
+    chunks = list(chunk_actions(actions, 'memo', max_actions=100, max_bytes=300))
+    assert all(len(positions) == 1 for positions, _ in chunks)
+    assert sum(len(positions) for positions, _ in chunks) == 10
+
+
+def test_send_bulk_maps_item_results_back_to_actions():
+    client = FakeOpenSearch(fail_ids={'b'})
+    actions = [index_action('a', {}), index_action('b', {}), delete_action('c')]
+
+    results = send_bulk(client, actions, 'memo', max_actions=2)
+
+    assert len(client.bulk_calls) == 2
+    assert [ok for ok, _ in results] == [True, False, True]
+    assert 'mapper_parsing_exception' in results[1][1]
+
+
+def test_partition_by_id_keeps_same_id_together_in_order():
+    actions = [index_action(str(i % 7), {'n': i}) for i in range(70)]
+
+    groups = partition_by_id(actions, 4)
+
+    assert sorted(position for group in groups for position in group) == list(range(70))
+    group_of_id = {}
+    for number, group in enumerate(groups):
+        assert group == sorted(group)
+        for position in group:
+            assert group_of_id.setdefault(actions[position]['id'], number) == number
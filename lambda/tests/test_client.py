@@ -0,0 +1,210 @@
+import os
+import sys
+import socket
+import datetime
+import threading
+import subprocess
+
+import pytest
+import urllib3
+
+import bulk
+import connection
+import index
+from metrics import InvocationMetrics
+from helpers import stream_record
+
+
+@pytest.fixture
+def lambda_env(monkeypatch):
+    monkeypatch.setenv('OPENSEARCH_ENDPOINT', 'https://example.ap-northeast-2.aoss.amazonaws.com')
+    monkeypatch.setenv('REGION', 'ap-northeast-2')
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'AKIDEXAMPLE')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'secret')
+    monkeypatch.setenv('AWS_SESSION_TOKEN', 'token')
+    monkeypatch.setattr(index, '_client', None)
+
+
+def test_handler_reuses_client_and_connection_pool(lambda_env, monkeypatch):
+    seen = []
+
+    def process_records(records, client, metrics, deadline=None):
+        seen.append(client)
+        return [(True, None)] * len(records)
+    monkeypatch.setattr(index, 'process_records', process_records)
+    event = {'Records': [stream_record('INSERT', 'a')]}
+
+    index.handler(event, None)
+    index.handler(event, None)
+
+    first, second = seen
+    assert first is second
+    assert first.pool is second.pool
+
+
+def test_signer_reads_credentials_per_request(lambda_env, monkeypatch):
+    signer = connection.SigV4Signer('ap-northeast-2')
+
+    def sign():
+        return signer.sign('GET', 'example.com', '/', {}, {}, None)['Authorization']
+
+    assert 'Credential=AKIDEXAMPLE/' in sign()
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'AKIDROTATED')
+    assert 'Credential=AKIDROTATED/' in sign()
+
+
+def test_signature_matches_botocore(lambda_env, monkeypatch):
+    botocore_auth = pytest.importorskip('botocore.auth')
+    from botocore.awsrequest import AWSRequest
+    from botocore.credentials import Credentials
+
+    now = datetime.datetime(2024, 5, 1, 12, 30, 0)
+    body = b'{"index":{"_index":"next_memo","_id":"a"}}\n{"title":"\xed\x9a\x8c\xec\x9d\x98"}\n'
+    host = 'example.ap-northeast-2.aoss.amazonaws.com'
+
+    request = AWSRequest(method='POST', url=f"https://{host}/_cluster/health/next_memo?wait_for_status=yellow&timeout=30s",
+                         data=body, headers={'Content-Type': 'application/x-ndjson'})
+    request.headers['x-amz-content-sha256'] = connection.hashlib.sha256(body).hexdigest()
+    monkeypatch.setattr(botocore_auth, 'get_current_datetime', lambda: now, raising=False)
+    botocore_auth.SigV4Auth(Credentials('AKIDEXAMPLE', 'secret', 'token'), 'aoss', 'ap-northeast-2').add_auth(request)
+
+    signed = connection.SigV4Signer('ap-northeast-2').sign(
+        'POST', host, '/_cluster/health/next_memo', {'wait_for_status': 'yellow', 'timeout': '30s'},
+        {'Content-Type': 'application/x-ndjson'}, body, now=now)
+
+    assert signed['Authorization'] == request.headers['Authorization']
+
+
+def test_index_import_skips_heavy_sdks():
+    """cold start 경로에서 boto3 / botocore / opensearch-py 를 불러오지 않는지 확인"""
+    source_dir = os.path.join(os.path.dirname(__file__), '..', 'dynamodb_to_opensearch')
+    script = (
+        "import sys, index; "
+        "print(','.join(m for m in ('boto3', 'botocore', 'opensearchpy', 'requests') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, '-c', script], cwd=source_dir, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ''
+
+
+def test_compressed_body_is_signed_as_sent(lambda_env):
+    client = connection.create_opensearch_client('https://example.com', 'ap-northeast-2', http_compress=True)
+    sent = {}
+
+    def urlopen(method, url, body=None, headers=None, **kwargs):
+        sent.update(body=body, headers=headers)
+        return type('Response', (), {'status': 200, 'data': b'{"errors": false, "items": []}'})()
+
+    client.pool.urlopen = urlopen
+    payload = b'{"index":{"_id":"a"}}\n{"content":"' + b'x' * 1000 + b'"}\n'
+    client.bulk(body=payload)
+
+    assert sent['headers']['Content-Encoding'] == 'gzip'
+    assert connection.gzip.decompress(sent['body']) == payload
+    assert sent['headers']['x-amz-content-sha256'] == connection.hashlib.sha256(sent['body']).hexdigest()
+    assert len(sent['body']) < len(payload)
+
+
+def test_bytes_sent_metric_records_compressed_size(lambda_env):
+    client = connection.create_opensearch_client('https://example.com', 'ap-northeast-2', http_compress=True)
+    client.pool.urlopen = lambda method, url, body=None, **kwargs: type(
+        'Response', (), {'status': 200, 'data': b'{"errors": false, "items": []}'})()
+    actions = [bulk.index_action(f'{i:03d}', {'content': 'x' * 1000}) for i in range(3)]
+    metrics = InvocationMetrics()
+
+    bulk.send_bulk(client, actions, 'next_memo', metrics=metrics)
+
+    assert metrics.values['PayloadBytes'] > 3000
+    assert metrics.values['BytesSent'] == client.last_request_bytes < metrics.values['PayloadBytes']
+
+
+def test_read_errors_are_not_retried_for_writes():
+    timeout = urllib3.exceptions.ReadTimeoutError(None, '/_bulk', 'read timed out')
+    refused = urllib3.exceptions.NewConnectionError(None, 'connection refused')
+
+    with pytest.raises(urllib3.exceptions.ReadTimeoutError):
+        connection.RETRIES.increment(method='POST', url='/_bulk', error=timeout)
+    assert connection.RETRIES.increment(method='GET', url='/_cluster/health', error=timeout).read == 0
+    assert connection.RETRIES.increment(method='POST', url='/_bulk', error=refused).connect == 1
+
+
+class KeepAliveDroppingServer:
+    """첫 응답 뒤 keep-alive 연결을 조용히 버리는 서버
+
+    같은 소켓으로 온 두 번째 요청은 읽기만 하고 응답 없이 닫는다 (Lambda freeze/thaw 동안 끊긴 연결).
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.sock = socket.create_server(('127.0.0.1', 0))
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            for served in range(2):
+                request = self._read_request(conn)
+                if request is None:
+                    return
+                self.requests.append((request, served))
+                if served:
+                    return
+                body = b'{"errors": false, "items": []}'
+                conn.sendall(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                             b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body)
+
+    @staticmethod
+    def _read_request(conn):
+        data = b''
+        while b'\r\n\r\n' not in data:
+            chunk = conn.recv(65536)
+            if not chunk:
+                return None
+            data += chunk
+        head, body = data.split(b'\r\n\r\n', 1)
+        length = next((int(line.split(b':')[1]) for line in head.split(b'\r\n')
+                       if line.lower().startswith(b'content-length:')), 0)
+        while len(body) < length:
+            body += conn.recv(65536)
+        return head.split(b'\r\n')[0]
+
+    def close(self):
+        self.sock.close()
+
+
+def test_post_is_resent_once_when_pooled_connection_was_dropped(lambda_env):
+    server = KeepAliveDroppingServer()
+    try:
+        client = connection.create_opensearch_client(f"http://127.0.0.1:{server.port}", 'ap-northeast-2')
+        client.bulk(body=b'{"index":{"_id":"a"}}\n{"content":"a"}\n')
+        stale_pool = client.pool
+
+        assert client.bulk(body=b'{"index":{"_id":"b"}}\n{"content":"b"}\n') == {'errors': False, 'items': []}
+        # 끊긴 소켓으로 한 번, 새 연결로 한 번 더 보낸다
+        assert [served for _, served in server.requests] == [0, 1, 0]
+        assert client.pool is not stale_pool
+    finally:
+        server.close()
+
+
+def test_post_is_not_resent_when_new_connection_drops():
+    pool = type('Pool', (), {'num_connections': 0})()
+
+    def urlopen(method, url, **kwargs):
+        pool.num_connections += 1
+        raise urllib3.exceptions.ProtocolError('Connection aborted.', connection.http.client.RemoteDisconnected())
+
+    pool.urlopen = urlopen
+    client = connection.OpenSearchHttpClient('https://example.com', 'ap-northeast-2', signer=object())
+    client.pool = pool
+
+    with pytest.raises(urllib3.exceptions.ProtocolError):
+        client._urlopen('POST', '/_bulk', b'', {})
+    assert pool.num_connections == 1
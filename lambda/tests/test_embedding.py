@@ -0,0 +1,169 @@
+import pytest
+from botocore.exceptions import ClientError
+
+import embedding
+import index
+import migration
+from helpers import FakeBedrock, FakeDynamoDB, FakeOpenSearch, SlowBedrock, memo_image, stream_record
+
+
+@pytest.fixture
+def bedrock(monkeypatch):
+    stub = FakeBedrock()
+    monkeypatch.setattr(embedding, '_cache', embedding.OrderedDict())
+    monkeypatch.setattr(embedding, 'get_bedrock_client', lambda: stub)
+    monkeypatch.setattr(index, 'EMBEDDING_ENABLED', True)
+    return stub
+
+
+def bulk_lines(client):
+    return [line for call in client.bulk_calls for line in call]
+
+
+def embedding_free_document(**fields):
+    document = {'title': 'title', 'content': 'content', 'summary': '', 'tags': [], 'prefix': '',
+                'priority': 0, 'updatedAt': 1700000000000}
+    document.update(fields)
+    return document
+
+
+def test_embeddings_are_cached_by_content_hash(bedrock):
+    client = FakeOpenSearch()
+    index.process_records([stream_record('INSERT', 'a', content='같은 내용')], client)
+    index.process_records([stream_record('INSERT', 'b', content='같은 내용')], client)
+
+    assert len(bedrock.calls) == 1
+    documents = [line for line in bulk_lines(client) if 'embedding' in line]
+    assert len(documents) == 2
+    assert documents[0]['embedding'] == documents[1]['embedding']
+    assert documents[0]['embeddingHash'] == embedding.content_hash('title\n같은 내용')
+
+
+def test_modify_with_unchanged_text_reuses_indexed_embedding(bedrock):
+    client = FakeOpenSearch()
+    index.process_records([stream_record('INSERT', 'a', updated_at=1000)], client)
+    indexed = client.document('a')['_source']
+    embedding._cache.clear()  # 다른 Lambda 인스턴스처럼 캐시가 비어 있어도 색인된 임베딩을 씀
+    record = stream_record('MODIFY', 'a', old_image=memo_image('a', updated_at=1000),
+                           new_image=memo_image('a', priority=1, updated_at=2000))
+    metrics = index.InvocationMetrics()
+
+    results = index.process_records([record], client, metrics)
+
+    assert results == [(True, None)]
+    assert len(bedrock.calls) == 1
+    meta, body = client.bulk_calls[-1]
+    assert meta['index']['version'] == 2000
+    assert body == dict(embedding_free_document(priority=1, updatedAt=2000),
+                        embedding=indexed['embedding'], embeddingHash=indexed['embeddingHash'])
+    assert metrics.values['EmbeddingsReused'] == 1
+
+
+def test_missing_document_is_indexed_with_new_embedding(bedrock):
+    client = FakeOpenSearch()
+    record = stream_record('MODIFY', 'a', old_image=memo_image('a', priority=0),
+                           new_image=memo_image('a', priority=1))
+
+    results = index.process_records([record], client)
+
+    assert results == [(True, None)]
+    assert len(bedrock.calls) == 1
+    meta, body = client.bulk_calls[0]
+    assert 'index' in meta and len(body['embedding']) == 4
+
+
+def test_indexed_document_without_embedding_gets_embedding(bedrock):
+    client = FakeOpenSearch()
+    client.documents[('next_memo', 'a')] = {'_version': 1700000000000, '_source': embedding_free_document()}
+    record = stream_record('MODIFY', 'a', old_image=memo_image('a', priority=0),
+                           new_image=memo_image('a', priority=1))
+
+    results = index.process_records([record], client)
+
+    assert results == [(True, None)]
+    assert len(bedrock.calls) == 1
+    assert len(client.document('a')['_source']['embedding']) == 4
+
+
+def test_embedding_reuse_keeps_updated_at_as_external_version(bedrock):
+    client = FakeOpenSearch()
+    index.process_records([stream_record('INSERT', 'a', updated_at=1000)], client)
+    for version in (2000, 3000):
+        index.process_records([stream_record('MODIFY', 'a', old_image=memo_image('a', updated_at=1000),
+                                             new_image=memo_image('a', priority=version, updated_at=version))],
+                              client)
+    metrics = index.InvocationMetrics()
+
+    # 텍스트가 그대로인 두 번의 수정 뒤에 늦게 도착한 재시도(2000)가 더 새로운 문서를 덮어쓰지 않아야 함
+    # (_update 였다면 _version 은 1002 가 되어 2000 이 통과함)
+    results = index.process_records([stream_record('INSERT', 'a', new_image=memo_image('a', updated_at=2000))],
+                                    client, metrics)
+
+    assert results == [(True, 'stale')]
+    assert metrics.values['StaleWritesRejected'] == 1
+    stored = client.document('a')
+    assert stored['_version'] == 3000
+    assert stored['_source']['priority'] == 3000 and 'embedding' in stored['_source']
+
+
+def test_embedding_failure_indexes_document_without_vector(bedrock):
+    bedrock.error = RuntimeError('ThrottlingException')
+    client = FakeOpenSearch()
+    metrics = index.InvocationMetrics()
+
+    results = index.process_records([stream_record('INSERT', 'a')], client, metrics)
+
+    assert results == [(True, None)]
+    meta, body = client.bulk_calls[0]
+    assert 'index' in meta and 'embedding' not in body
+    assert metrics.values['EmbeddingFailures'] == 1
+    assert metrics.values['FailedRecords'] == 0
+
+
+def test_bedrock_calls_run_concurrently_up_to_limit(bedrock):
+    stub = SlowBedrock()
+    actions = [index.index_action(str(i), {'title': f'memo {i}'}) for i in range(10)]
+
+    errors = embedding.embed_actions(actions, client=stub, concurrency=3)
+
+    assert errors == [None] * 10
+    assert len(stub.calls) == 10
+    assert 1 < stub.counter.max_in_flight <= 3
+    assert all('embedding' in action['doc'] for action in actions)
+
+
+def test_input_over_token_limit_is_shortened_and_retried():
+    stub = FakeBedrock(max_input_chars=3000)
+
+    key, vector = embedding.get_embedding('가' * 8000, client=stub)
+
+    assert [len(text) for text in stub.calls] == [8000, 4000, 2000]
+    assert key == embedding.content_hash('가' * 8000) and len(vector) == 4
+
+
+def test_backfill_reuses_embedding_path(bedrock):
+    client = FakeOpenSearch()
+    items = [memo_image(f'{i:03d}', content=f'memo {i}') for i in range(5)]
+
+    assert migration.migrate_data(page_size=2, target_rate=1e6, embeddings=True,
+                                  dynamodb=FakeDynamoDB(items), opensearch_client=client)
+
+    documents = [line for line in bulk_lines(client) if 'title' in line]
+    assert len(documents) == 5 and all('embedding' in document for document in documents)
+    assert len(bedrock.calls) == 5
+
+
+def test_backfill_indexes_memo_without_embedding_when_bedrock_fails(bedrock, capsys):
+    bedrock.error = ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'}},
+                                'InvokeModel')
+    client = FakeOpenSearch()
+    items = [memo_image(f'{i:03d}', content=f'memo {i}') for i in range(3)]
+
+    assert migration.migrate_data(page_size=2, target_rate=1e6, embeddings=True,
+                                  dynamodb=FakeDynamoDB(items), opensearch_client=client)
+
+    output = capsys.readouterr().out
+    assert 'Total errors: 0' in output
+    assert 'Indexed without embedding: 3' in output
+    documents = [client.document(f'{i:03d}') for i in range(3)]
+    assert all(document and 'embedding' not in document['_source'] for document in documents)
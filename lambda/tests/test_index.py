@@ -0,0 +1,147 @@
+import index
+from helpers import FakeOpenSearch, SlowOpenSearch, memo_image, stream_record
+
+
+def test_process_records_sends_whole_batch_in_one_request():
+    client = FakeOpenSearch()
+    records = [stream_record('INSERT', str(i), sequence_number=i) for i in range(20)]
+    records.append(stream_record('REMOVE', '3', sequence_number=21))
+
+    results = index.process_records(records, client)
+
+    assert len(client.bulk_calls) == 1
+    assert all(ok for ok, _ in results)
+
+
+def test_coalesce_keeps_final_state_per_memo():
+    records = [
+        stream_record('MODIFY', 'a', sequence_number=3, title='third'),
+        stream_record('INSERT', 'a', sequence_number=1, title='first'),
+        stream_record('MODIFY', 'a', sequence_number=2, title='second'),
+        stream_record('INSERT', 'b', sequence_number=4),
+        stream_record('REMOVE', 'b', sequence_number=5),
+    ]
+
+    coalesced = index.coalesce_records(records)
+
+    assert [(record['dynamodb']['SequenceNumber'], positions) for record, positions in coalesced] == [
+        ('3', [1, 2, 0]),
+        ('5', [3, 4]),
+    ]
+    assert index.record_to_action(coalesced[1][0]) == {'op': 'delete', 'id': 'b', 'version': 1700000000000}
+
+
+def test_process_records_shares_result_across_coalesced_records():
+    client = FakeOpenSearch(fail_ids={'a'})
+    records = [stream_record('MODIFY', 'a', sequence_number=i, new_image=memo_image('a', title=f'v{i}'))
+               for i in range(3)]
+    records.append(stream_record('INSERT', 'b', sequence_number=3))
+
+    results = index.process_records(records, client)
+
+    assert len(client.bulk_calls[0]) == 4  # a, b 각각 메타 + 문서
+    assert [ok for ok, _ in results] == [False, False, False, True]
+
+
+def test_modify_without_searchable_changes_is_skipped():
+    client = FakeOpenSearch()
+    old_image = memo_image('a', fileCount={'N': '1'})
+    new_image = memo_image('a', fileCount={'N': '2'}, files={'L': []})
+    records = [
+        stream_record('MODIFY', 'a', sequence_number=1, old_image=old_image, new_image=new_image),
+        stream_record('MODIFY', 'b', sequence_number=2,
+                      old_image=memo_image('b'), new_image=memo_image('b', title='changed')),
+    ]
+
+    results = index.process_records(records, client)
+
+    assert all(ok for ok, _ in results)
+    indexed_ids = [line['index']['_id'] for line in client.bulk_calls[0] if 'index' in line]
+    assert indexed_ids == ['b']
+
+
+def test_noop_check_spans_coalesced_records():
+    first = stream_record('MODIFY', 'a', sequence_number=1,
+                          old_image=memo_image('a'), new_image=memo_image('a', title='draft'))
+    last = stream_record('MODIFY', 'a', sequence_number=2,
+                         old_image=memo_image('a', title='draft'), new_image=memo_image('a'))
+
+    assert index.is_noop_update(first, last)
+    assert not index.is_noop_update(stream_record('INSERT', 'a'), last)
+
+
+def test_large_batch_is_written_in_parallel_per_memo(monkeypatch):
+    monkeypatch.setattr(index, 'WRITE_CONCURRENCY', 4)
+    monkeypatch.setattr(index, 'MIN_PARTITION_ACTIONS', 10)
+    client = SlowOpenSearch()
+    records = [stream_record('INSERT', str(i), sequence_number=i) for i in range(60)]
+
+    results = index.process_records(records, client)
+
+    assert all(ok for ok, _ in results)
+    assert len(client.bulk_calls) == 4
+    assert client.counter.max_in_flight > 1
+    sent_ids = [line['index']['_id'] for call in client.bulk_calls for line in call if 'index' in line]
+    assert sorted(sent_ids, key=int) == [str(i) for i in range(60)]
+
+
+def test_stale_writes_are_versioned_and_not_failures():
+    client = FakeOpenSearch(stale_ids={'old'})
+    records = [stream_record('INSERT', 'old', sequence_number=1), stream_record('INSERT', 'new', sequence_number=2)]
+    metrics = index.InvocationMetrics()
+
+    results = index.process_records(records, client, metrics)
+
+    assert results == [(True, 'stale'), (True, None)]
+    assert metrics.values['StaleWritesRejected'] == 1
+    assert metrics.values['FailedRecords'] == 0
+    meta = client.bulk_calls[0][0]['index']
+    assert meta['version'] == 1700000000000
+    assert meta['version_type'] == 'external_gte'
+
+
+def test_handler_reports_only_failed_records(monkeypatch):
+    client = FakeOpenSearch(fail_ids={'b'})
+    monkeypatch.setattr(index, 'get_opensearch_client', lambda: client)
+    records = [
+        stream_record('INSERT', 'a', sequence_number=1),
+        stream_record('INSERT', 'b', sequence_number=2),
+        stream_record('MODIFY', 'b', sequence_number=3, new_image=memo_image('b', title='changed')),
+        stream_record('INSERT', 'c', sequence_number=4),
+    ]
+
+    response = index.handler({'Records': records}, None)
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': '2'}, {'itemIdentifier': '3'}]}
+
+
+class LambdaContext:
+    function_name = 'sync'
+
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+def test_handler_defers_records_when_out_of_time(monkeypatch):
+    client = FakeOpenSearch()
+    monkeypatch.setattr(index, 'get_opensearch_client', lambda: client)
+    records = [stream_record('INSERT', 'a', sequence_number=1), stream_record('INSERT', 'b', sequence_number=2)]
+
+    response = index.handler({'Records': records}, LambdaContext(index.DEADLINE_MARGIN_MS - 1))
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': '1'}, {'itemIdentifier': '2'}]}
+    assert client.bulk_calls == []
+
+
+def test_handler_does_not_check_index_per_invocation(monkeypatch):
+    client = FakeOpenSearch()
+    monkeypatch.setattr(index, 'get_opensearch_client', lambda: client)
+    monkeypatch.setattr(index, 'create_index_if_not_exists', lambda client: 1 / 0)
+
+    response = index.handler({'Records': [stream_record('INSERT', 'a')]}, LambdaContext(30000))
+
+    assert response == {'batchItemFailures': []}
+    assert len(client.bulk_calls) == 1
@@ -0,0 +1,45 @@
+import pytest
+
+from mapping import build_index_body
+
+
+def test_default_profile_keeps_ngram_subfields():
+    body = build_index_body(profile='ngram')
+    properties = body['mappings']['properties']
+
+    assert properties['content']['fields']['ngram']['analyzer'] == 'ngram_analyzer'
+    assert 'ngram_analyzer' in body['settings']['analysis']['analyzer']
+
+
+def test_edge_ngram_profile_only_adds_autocomplete_to_short_fields():
+    body = build_index_body(profile='edge_ngram')
+    properties = body['mappings']['properties']
+
+    assert properties['title']['fields']['autocomplete']['analyzer'] == 'autocomplete_analyzer'
+    assert properties['tags']['fields']['autocomplete']['analyzer'] == 'autocomplete_analyzer'
+    assert 'fields' not in properties['content']
+    assert 'ngram_analyzer' not in body['settings']['analysis']['analyzer']
+
+
+def test_nori_profile_uses_korean_analyzer():
+    body = build_index_body(profile='nori')
+    analysis = body['settings']['analysis']
+    tokenizer = analysis['analyzer']['korean_analyzer']['tokenizer']
+
+    assert analysis['tokenizer'][tokenizer]['type'] == 'nori_tokenizer'
+    assert body['mappings']['properties']['content']['analyzer'] == 'korean_analyzer'
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        build_index_body(profile='whitespace')
+
+
+def test_vector_field_is_only_mapped_with_embeddings():
+    text_only = build_index_body(embeddings=False)
+    vector = build_index_body(embeddings=True)
+
+    assert 'embedding' not in text_only['mappings']['properties']
+    assert 'knn' not in text_only['settings']['index']
+    assert vector['mappings']['properties']['embedding']['type'] == 'knn_vector'
+    assert vector['settings']['index']['knn'] is True
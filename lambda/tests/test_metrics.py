@@ -0,0 +1,35 @@
+import json
+
+import index
+from helpers import FakeOpenSearch, memo_image, stream_record
+
+
+def emf_lines(output):
+    return [json.loads(line) for line in output.splitlines() if line.startswith('{"_aws"')]
+
+
+def test_handler_emits_one_emf_line_per_invocation(monkeypatch, capsys):
+    client = FakeOpenSearch(fail_ids={'c'})
+    monkeypatch.setattr(index, 'get_opensearch_client', lambda: client)
+    records = [
+        stream_record('INSERT', 'a', sequence_number=1),
+        stream_record('MODIFY', 'a', sequence_number=2, new_image=memo_image('a', title='changed')),
+        stream_record('MODIFY', 'b', sequence_number=3, old_image=memo_image('b'), new_image=memo_image('b')),
+        stream_record('REMOVE', 'c', sequence_number=4),
+    ]
+    records[0]['dynamodb']['ApproximateCreationDateTime'] = 1700000000
+
+    index.handler({'Records': records}, type('Context', (), {'function_name': 'sync'})())
+
+    [line] = emf_lines(capsys.readouterr().out)
+    directive = line['_aws']['CloudWatchMetrics'][0]
+    assert directive['Dimensions'] == [['FunctionName']]
+    assert line['FunctionName'] == 'sync'
+    assert (line['InsertRecords'], line['ModifyRecords'], line['RemoveRecords']) == (1, 2, 1)
+    assert line['CoalescedRecords'] == 1
+    assert line['NoopUpdatesSkipped'] == 1
+    assert line['FailedRecords'] == 1
+    assert line['BulkRequests'] == 1 and line['BytesSent'] == line['PayloadBytes'] > 0
+    assert line['StreamRecordAgeMax'] > 0
+    for phase in ('ClientSetupTime', 'ConvertTime', 'WriteTime'):
+        assert {'Name': phase, 'Unit': 'Milliseconds'} in directive['Metrics']
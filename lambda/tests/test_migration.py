@@ -0,0 +1,298 @@
+import pytest
+
+import migration
+from botocore.exceptions import ClientError
+from checkpoint import MigrationCheckpoint
+from pipeline import SegmentProgress
+from ratelimit import AdaptiveRateLimiter
+from helpers import FakeDynamoDB, FakeOpenSearch, memo_image
+
+
+def indexed_ids(client):
+    return sorted(line['index']['_id'] for call in client.bulk_calls for line in call if 'index' in line)
+
+
+def test_segmented_migration_indexes_every_item_once():
+    items = [memo_image(f'{i:03d}') for i in range(57)]
+    dynamodb, client = FakeDynamoDB(items), FakeOpenSearch()
+
+    ok = migration.migrate_data(total_segments=4, page_size=5, target_rate=1e6,
+                                dynamodb=dynamodb, opensearch_client=client)
+
+    assert ok
+    assert indexed_ids(client) == [f'{i:03d}' for i in range(57)]
+    assert {call['Segment'] for call in dynamodb.scan_calls} == {0, 1, 2, 3}
+
+
+def test_migration_reports_item_errors_per_segment(capsys):
+    items = [memo_image(f'{i:03d}') for i in range(10)]
+    client = FakeOpenSearch(fail_ids={'003', '007'})
+
+    assert migration.migrate_data(total_segments=2, page_size=2, target_rate=1e6,
+                                  dynamodb=FakeDynamoDB(items), opensearch_client=client)
+
+    output = capsys.readouterr().out
+    assert 'Segment 0: processed 5, errors 0, done' in output
+    assert 'Segment 1: processed 5, errors 2, done' in output
+    assert 'Total errors: 2' in output
+
+
+def test_migration_skips_documents_newer_than_the_scan(capsys):
+    items = [memo_image(f'{i:03d}', updated_at=1700000000000 + i) for i in range(6)]
+    client = FakeOpenSearch(stale_ids={'002', '004'})
+
+    assert migration.migrate_data(page_size=3, target_rate=1e6,
+                                  dynamodb=FakeDynamoDB(items), opensearch_client=client)
+
+    output = capsys.readouterr().out
+    assert 'Total errors: 0' in output
+    assert 'Stale writes skipped: 2' in output
+    versions = [line['index']['version'] for call in client.bulk_calls for line in call if 'index' in line]
+    assert sorted(versions) == [1700000000000 + i for i in range(6)]
+
+
+class FailingDynamoDB(FakeDynamoDB):
+    """지정한 횟수만큼 스캔한 뒤 실패하는 클라이언트"""
+
+    def __init__(self, items, fail_after):
+        super().__init__(items)
+        self.fail_after = fail_after
+
+    def scan(self, **kwargs):
+        if len(self.scan_calls) >= self.fail_after:
+            raise RuntimeError('connection reset')
+        return super().scan(**kwargs)
+
+
+def test_resume_continues_from_checkpoint(tmp_path):
+    items = [memo_image(f'{i:03d}') for i in range(20)]
+    path = str(tmp_path / 'checkpoint.json')
+
+    first = FakeOpenSearch()
+    assert not migration.migrate_data(page_size=5, target_rate=1e6, checkpoint_path=path,
+                                      dynamodb=FailingDynamoDB(items, fail_after=2), opensearch_client=first)
+    assert indexed_ids(first) == [f'{i:03d}' for i in range(10)]
+
+    second, dynamodb = FakeOpenSearch(), FakeDynamoDB(items)
+    assert migration.migrate_data(page_size=5, target_rate=1e6, checkpoint_path=path, resume=True,
+                                  dynamodb=dynamodb, opensearch_client=second)
+    assert indexed_ids(second) == [f'{i:03d}' for i in range(10, 20)]
+    assert dynamodb.scan_calls[0]['ExclusiveStartKey'] == {'id': {'S': '009'}}
+
+    # 완료된 마이그레이션은 다시 스캔하지 않음
+    third = FakeDynamoDB(items)
+    assert migration.migrate_data(page_size=5, target_rate=1e6, checkpoint_path=path, resume=True,
+                                  dynamodb=third, opensearch_client=FakeOpenSearch())
+    assert third.scan_calls == []
+
+
+def test_resumed_migration_saves_original_start_as_watermark(tmp_path, monkeypatch):
+    items = [memo_image(f'{i:03d}') for i in range(20)]
+    path, watermark_path = str(tmp_path / 'checkpoint.json'), str(tmp_path / 'watermark.json')
+    clock = [1700000000.0]
+    monkeypatch.setattr(migration.time, 'time', lambda: clock[0])
+
+    assert not migration.migrate_data(page_size=5, target_rate=1e6, checkpoint_path=path, watermark_path=watermark_path,
+                                      dynamodb=FailingDynamoDB(items, fail_after=2), opensearch_client=FakeOpenSearch())
+    assert migration.load_watermark(watermark_path) is None
+
+    # 중단된 사이의 변경을 다음 --since 가 다시 읽도록 재개한 시각이 아니라 처음 시작한 시각을 남김
+    clock[0] += 3600
+    for _ in range(2):
+        assert migration.migrate_data(page_size=5, target_rate=1e6, checkpoint_path=path, resume=True,
+                                      watermark_path=watermark_path, dynamodb=FakeDynamoDB(items),
+                                      opensearch_client=FakeOpenSearch())
+        assert migration.load_watermark(watermark_path) == 1700000000000
+
+
+def test_rate_limiter_backs_off_and_recovers():
+    now, slept = [0.0], []
+    limiter = AdaptiveRateLimiter(100, increase=10, clock=lambda: now[0], sleep=slept.append)
+
+    limiter.acquire(150)
+    assert slept == [0.5]
+
+    limiter.on_throttle()
+    limiter.on_throttle()
+    assert limiter.rate == 25
+    limiter.on_success()
+    assert limiter.rate == 35
+    for _ in range(10):
+        limiter.on_success()
+    assert limiter.rate == 100
+
+
+class ThrottlingDynamoDB(FakeDynamoDB):
+    def __init__(self, items, throttles):
+        super().__init__(items)
+        self.throttles = throttles
+
+    def scan(self, **kwargs):
+        if self.throttles:
+            self.throttles -= 1
+            raise ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException'}}, 'Scan')
+        return super().scan(**kwargs)
+
+
+class ThrottlingOpenSearch(FakeOpenSearch):
+    def __init__(self, throttles):
+        super().__init__()
+        self.throttles = throttles
+
+    def bulk(self, body, **kwargs):
+        response = super().bulk(body, **kwargs)
+        if self.throttles:
+            self.throttles -= 1
+            for item in response['items']:
+                item['index'].update(status=429, error={'type': 'too_many_requests', 'reason': 'slow down'})
+        return response
+
+
+def test_throttling_on_both_sides_reduces_rate_and_retries(capsys):
+    items = [memo_image(f'{i:03d}') for i in range(10)]
+    client = ThrottlingOpenSearch(throttles=1)
+
+    assert migration.migrate_data(page_size=10, target_rate=1e6, indexers=1,
+                                  dynamodb=ThrottlingDynamoDB(items, throttles=2), opensearch_client=client)
+
+    output = capsys.readouterr().out
+    assert 'Total errors: 0' in output
+    assert 'Throttled: 3 times' in output
+    assert len(client.bulk_calls) == 2
+
+
+@pytest.mark.parametrize('stage', ['convert_items', 'index_actions'])
+def test_page_failure_in_a_stage_fails_segment_without_deadlock(tmp_path, monkeypatch, stage):
+    items = [memo_image(f'{i:03d}') for i in range(40)]
+    checkpoint_path = str(tmp_path / 'checkpoint.json')
+    original = getattr(migration, stage)
+
+    def fail_on_first_page(actions_or_items, *args, **kwargs):
+        if any(item['id'] in ('000', {'S': '000'}) for item in actions_or_items):
+            raise RuntimeError('boom')
+        return original(actions_or_items, *args, **kwargs)
+
+    monkeypatch.setattr(migration, stage, fail_on_first_page)
+    client = FakeOpenSearch()
+
+    # 큐가 한 페이지만 담아도 실패한 워커 때문에 앞 단계가 막히지 않아야 함
+    ok = migration.migrate_data(page_size=2, target_rate=1e6, converters=1, indexers=1, queue_size=1,
+                                checkpoint_path=checkpoint_path, dynamodb=FakeDynamoDB(items),
+                                opensearch_client=client)
+
+    assert not ok
+    assert len(indexed_ids(client)) >= 38
+    assert MigrationCheckpoint.load(checkpoint_path).segment(0)['last_evaluated_key'] is None
+
+
+def test_out_of_order_pages_commit_checkpoint_in_scan_order(tmp_path):
+    checkpoint = MigrationCheckpoint(str(tmp_path / 'checkpoint.json'), 1)
+    progress = SegmentProgress(0, checkpoint=checkpoint)
+
+    progress.complete_page(1, {'id': {'S': 'b'}}, 5, 1)
+    assert checkpoint.segment(0)['last_evaluated_key'] is None
+
+    progress.complete_page(0, {'id': {'S': 'a'}}, 5, 0)
+    assert checkpoint.segment(0) == {'last_evaluated_key': {'id': {'S': 'b'}}, 'processed': 10,
+                                     'errors': 1, 'done': False}
+
+
+def test_delta_sync_queries_from_watermark_and_advances_it(tmp_path, capsys):
+    minute = 60 * 1000
+    items = [memo_image(f'{i:03d}', updated_at=1700000000000 + i * minute) for i in range(10)]
+    dynamodb, client = FakeDynamoDB(items), FakeOpenSearch()
+    path = str(tmp_path / 'watermark.json')
+
+    assert not migration.sync_since(watermark_path=path, dynamodb=dynamodb, opensearch_client=client)
+
+    migration.save_watermark(path, 1700000000000 + 5 * minute)
+    assert migration.sync_since(watermark_path=path, page_size=2, target_rate=1e6,
+                                dynamodb=dynamodb, opensearch_client=client)
+
+    assert dynamodb.scan_calls == []
+    assert {call['IndexName'] for call in dynamodb.query_calls} == {'UpdatedIndex'}
+    # 워터마크보다 WATERMARK_OVERLAP_MS(1분) 앞에서부터 다시 조회
+    assert indexed_ids(client) == ['004', '005', '006', '007', '008', '009']
+    assert migration.load_watermark(path) == 1700000000000 + 9 * minute
+
+
+def test_delta_sync_keeps_watermark_before_failed_page(tmp_path):
+    items = [memo_image(f'{i:03d}', updated_at=1000 + i) for i in range(6)]
+    path = str(tmp_path / 'watermark.json')
+
+    assert not migration.sync_since(since=0, watermark_path=path, page_size=2, target_rate=1e6,
+                                    dynamodb=FakeDynamoDB(items), opensearch_client=FakeOpenSearch(fail_ids={'003'}))
+
+    assert migration.load_watermark(path) == 1001
+
+
+def test_delta_sync_reads_full_items_when_gsi_projection_is_narrow(tmp_path):
+    items = [memo_image(f'{i:03d}', updated_at=1000 + i) for i in range(3)]
+    dynamodb = FakeDynamoDB(items, gsi_attributes={'id', 'updatedAt', 'gsiPartitionKey'})
+    client = FakeOpenSearch()
+
+    assert migration.sync_since(since=0, watermark_path=str(tmp_path / 'w.json'), target_rate=1e6,
+                                dynamodb=dynamodb, opensearch_client=client)
+
+    assert dynamodb.batch_get_calls == [['000', '001', '002']]
+    assert indexed_ids(client) == ['000', '001', '002']
+
+
+def test_delta_sync_fans_in_write_sharded_partitions(tmp_path):
+    items = [memo_image(f'{i:03d}', updated_at=1000 + i, gsiPartitionKey={'S': f'ALL#{i % 4}'}) for i in range(8)]
+    items.append(memo_image('legacy', updated_at=1100))
+    dynamodb, path = FakeDynamoDB(items), str(tmp_path / 'w.json')
+
+    assert not migration.sync_since(since=0, watermark_path=path, page_size=1, target_rate=1e6,
+                                    dynamodb=dynamodb, opensearch_client=FakeOpenSearch(fail_ids={'006'}))
+
+    assert {call['ExclusiveStartKey'] is None for call in dynamodb.query_calls} == {True, False}
+    # ALL#2 샤드는 1002 까지만 색인됐으므로 다른 샤드가 더 진행했어도 워터마크는 1002
+    assert migration.load_watermark(path) == 1002
+
+    client = FakeOpenSearch()
+    assert migration.sync_since(since=0, watermark_path=path, target_rate=1e6, dynamodb=dynamodb,
+                                opensearch_client=client)
+    assert sorted(indexed_ids(client)) == [f'{i:03d}' for i in range(8)] + ['legacy']
+    assert migration.load_watermark(path) == 1100
+
+
+def test_parse_since_accepts_relative_and_absolute_times():
+    assert migration.parse_since('2h', now=10000) == (10000 - 7200) * 1000
+    assert migration.parse_since('1700000000000') == 1700000000000
+    assert migration.parse_since('2024-01-01T00:00:00+00:00') == 1704067200000
+
+
+class UnprocessedKeysDynamoDB(FakeDynamoDB):
+    """BatchGetItem 마다 마지막 키 하나를 UnprocessedKeys 로 돌려주는 클라이언트 (unprocessed 번까지)"""
+
+    def __init__(self, items, unprocessed, **kwargs):
+        super().__init__(items, **kwargs)
+        self.unprocessed = unprocessed
+
+    def batch_get_item(self, RequestItems):
+        response = super().batch_get_item(RequestItems)
+        if self.unprocessed:
+            self.unprocessed -= 1
+            (table, request), = RequestItems.items()
+            skipped = request['Keys'][-1]['id']['S']
+            response['Responses'][table] = [item for item in response['Responses'][table]
+                                            if item['id']['S'] != skipped]
+            response['UnprocessedKeys'] = {table: {'Keys': request['Keys'][-1:]}}
+        return response
+
+
+def test_hydrate_retries_unprocessed_keys_with_jittered_backoff(monkeypatch):
+    items = [memo_image(f'{i:03d}') for i in range(3)]
+    dynamodb = UnprocessedKeysDynamoDB(items, unprocessed=2, gsi_attributes={'id', 'updatedAt'})
+    narrow = [{'id': item['id'], 'updatedAt': item['updatedAt']} for item in items]
+    slept, limiter = [], AdaptiveRateLimiter(100)
+    monkeypatch.setattr(migration.time, 'sleep', slept.append)
+
+    hydrated = migration.hydrate_items(dynamodb, narrow, limiter)
+
+    assert [item['id']['S'] for item in hydrated] == ['000', '001', '002']
+    assert dynamodb.batch_get_calls == [['000', '001', '002'], ['002'], ['002']]
+    assert len(slept) == 2 and 0 <= slept[0] <= migration.BATCH_GET_BACKOFF
+    assert 0 <= slept[1] <= 2 * migration.BATCH_GET_BACKOFF
+    assert limiter.throttle_count == 2
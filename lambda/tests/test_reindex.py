@@ -0,0 +1,146 @@
+import datetime
+
+import pytest
+
+import reindex
+from helpers import FakeDynamoDB, FakeOpenSearch, memo_image, stream_record
+
+
+class FakeIndices:
+    def __init__(self, indices=(), aliases=None):
+        self.indices = {name: {} for name in indices}
+        self.aliases = dict(aliases or {})
+        self.settings = []
+        self.alias_updates = []
+
+    def exists(self, index):
+        return index in self.indices or index in self.aliases.values()
+
+    def create(self, index, body=None):
+        self.indices[index] = body
+
+    def get(self, index):
+        prefix = index.rstrip('*')
+        return {name: {} for name in self.indices if name.startswith(prefix)}
+
+    def get_alias(self, name):
+        return {index: {'aliases': {name: {}}} for index, alias in self.aliases.items() if alias == name}
+
+    def update_aliases(self, body):
+        self.alias_updates.append(body['actions'])
+        for action in body['actions']:
+            (op, args), = action.items()
+            if op == 'add':
+                self.aliases[args['index']] = args['alias']
+            elif op == 'remove':
+                self.aliases.pop(args['index'], None)
+            elif op == 'remove_index':
+                self.indices.pop(args['index'])
+
+    def put_settings(self, index, body):
+        self.settings.append((index, body))
+
+    def refresh(self, index):
+        pass
+
+
+class FakeCluster:
+    def health(self, **kwargs):
+        return {'status': 'green'}
+
+
+class FakeStreams:
+    """샤드 하나짜리 DynamoDB 스트림"""
+
+    def __init__(self, records):
+        self.records = records
+
+    def describe_stream(self, StreamArn, **kwargs):
+        return {'StreamDescription': {'Shards': [{'ShardId': 'shard-1', 'SequenceNumberRange': {}}]}}
+
+    def get_shard_iterator(self, **kwargs):
+        return {'ShardIterator': '0'}
+
+    def get_records(self, ShardIterator, Limit):
+        start = int(ShardIterator)
+        page = self.records[start:start + 2]
+        return {'Records': page, 'NextShardIterator': str(start + len(page))}
+
+
+class StreamTable(FakeDynamoDB):
+    def describe_table(self, TableName):
+        return {'Table': {'LatestStreamArn': 'arn:stream'}}
+
+
+def opensearch(indices=(), aliases=None):
+    client = FakeOpenSearch()
+    client.indices = FakeIndices(indices, aliases)
+    client.cluster = FakeCluster()
+    return client
+
+
+def written_indices(client):
+    return {meta['_index'] for call in client.bulk_calls for line in call
+            for op, meta in line.items() if op in ('index', 'update', 'delete')}
+
+
+def test_reindex_backfills_catches_up_and_swaps_alias(tmp_path):
+    client = opensearch(['next_memo_v1'], {'next_memo_v1': 'next_memo'})
+    created = datetime.datetime.now(datetime.timezone.utc)
+    change = stream_record('MODIFY', '001', sequence_number=5, old_image=memo_image('001'),
+                           new_image=memo_image('001', title='changed during build', updated_at=1700000000001))
+    change['dynamodb']['ApproximateCreationDateTime'] = created
+    old_change = stream_record('MODIFY', '002', sequence_number=1)
+    old_change['dynamodb']['ApproximateCreationDateTime'] = created - datetime.timedelta(hours=2)
+
+    ok = reindex.reindex(state_path=str(tmp_path / 'state.json'), checkpoint_path=str(tmp_path / 'cp.json'),
+                         opensearch_client=client, dynamodb=StreamTable([memo_image('001'), memo_image('002')]),
+                         streams=FakeStreams([old_change, change]), target_rate=1e6)
+
+    assert ok
+    assert client.indices.aliases == {'next_memo_v2': 'next_memo'}
+    assert 'next_memo_v1' in client.indices.indices
+    assert written_indices(client) == {'next_memo_v2'}
+    assert [index for index, _ in client.indices.settings] == ['next_memo_v2', 'next_memo_v2']
+    titles = [line.get('title') for call in client.bulk_calls for line in call]
+    assert 'changed during build' in titles
+    # 두 번의 따라잡기 모두 빌드 시작 이전 변경은 다시 반영하지 않음
+    assert sum(1 for call in client.bulk_calls for line in call if line.get('index', {}).get('_id') == '002') == 1
+
+
+def test_catch_up_older_than_stream_retention_uses_updated_index(tmp_path):
+    client = opensearch(['next_memo_v1', 'next_memo_v2'], {'next_memo_v1': 'next_memo'})
+    started_at = reindex.now_ms() - 48 * 3600 * 1000
+    state_path = tmp_path / 'state.json'
+    reindex.save_state(str(state_path), {'index': 'next_memo_v2', 'started_at': started_at, 'phase': 'catchup'})
+    items = [memo_image('001', title='changed 30h ago', updated_at=started_at + 18 * 3600 * 1000),
+             memo_image('002', updated_at=started_at - 3600 * 1000)]
+
+    ok = reindex.reindex(resume=True, state_path=str(state_path), watermark_path=str(tmp_path / 'wm.json'),
+                         opensearch_client=client, dynamodb=StreamTable(items), streams=FakeStreams([]),
+                         target_rate=1e6)
+
+    assert ok
+    assert client.indices.aliases == {'next_memo_v2': 'next_memo'}
+    assert written_indices(client) == {'next_memo_v2'}
+    titles = [line.get('title') for call in client.bulk_calls for line in call]
+    assert titles.count('changed 30h ago') == 1
+    assert 'title' not in titles
+
+
+def test_reindex_refuses_to_replace_concrete_index_without_flag(tmp_path):
+    client = opensearch(['next_memo'])
+
+    ok = reindex.reindex(state_path=str(tmp_path / 'state.json'), opensearch_client=client,
+                         dynamodb=StreamTable([]), streams=FakeStreams([]))
+
+    assert not ok
+    assert client.indices.indices == {'next_memo': {}}
+
+
+def test_rollback_moves_alias_to_previous_version(tmp_path):
+    client = opensearch(['next_memo_v1', 'next_memo_v2'], {'next_memo_v2': 'next_memo'})
+
+    assert reindex.rollback(opensearch_client=client, dynamodb=StreamTable([]), streams=FakeStreams([]),
+                            state_path=str(tmp_path / 'missing.json'))
+    assert client.indices.aliases == {'next_memo_v1': 'next_memo'}
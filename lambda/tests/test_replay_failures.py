@@ -0,0 +1,63 @@
+import json
+
+import replay_failures
+from helpers import FakeOpenSearch, stream_record
+
+
+class FakeSQS:
+    def __init__(self, bodies):
+        self.messages = [{'Body': json.dumps(body), 'ReceiptHandle': f'handle-{i}'} for i, body in enumerate(bodies)]
+        self.deleted = []
+
+    def receive_message(self, QueueUrl, MaxNumberOfMessages, **kwargs):
+        received = [message for message in self.messages if message['ReceiptHandle'] not in self.deleted]
+        # 받은 메시지는 가시성 제한 시간 동안 다시 받지 않음
+        self.messages = [message for message in self.messages if message not in received[:MaxNumberOfMessages]]
+        return {'Messages': received[:MaxNumberOfMessages]}
+
+    def delete_message(self, QueueUrl, ReceiptHandle):
+        self.deleted.append(ReceiptHandle)
+
+
+class SequenceStreams:
+    """시퀀스 번호로 이어서 읽을 수 있는 샤드 하나짜리 스트림"""
+
+    def __init__(self, records):
+        self.records = records
+
+    def get_shard_iterator(self, StreamArn, ShardId, ShardIteratorType, SequenceNumber):
+        position = next(i for i, record in enumerate(self.records)
+                        if int(record['dynamodb']['SequenceNumber']) >= int(SequenceNumber))
+        return {'ShardIterator': str(position)}
+
+    def get_records(self, ShardIterator, Limit):
+        start = int(ShardIterator)
+        page = self.records[start:start + 2]
+        return {'Records': page, 'NextShardIterator': str(start + len(page))}
+
+
+def failure(start, end):
+    return {'DDBStreamBatchInfo': {'shardId': 'shard-1', 'streamArn': 'arn:stream', 'batchSize': end - start + 1,
+                                   'startSequenceNumber': str(start), 'endSequenceNumber': str(end),
+                                   'approximateArrivalOfFirstRecord': '2024-01-01T00:00:00Z'}}
+
+
+def test_replays_failed_batch_range_and_deletes_message():
+    records = [stream_record('INSERT', memo_id, sequence_number=i) for i, memo_id in enumerate('abcde', start=1)]
+    client, sqs = FakeOpenSearch(), FakeSQS([failure(2, 4)])
+
+    ok = replay_failures.replay_failures('queue', opensearch_client=client, sqs=sqs, streams=SequenceStreams(records))
+
+    assert ok
+    assert [line['index']['_id'] for call in client.bulk_calls for line in call if 'index' in line] == ['b', 'c', 'd']
+    assert sqs.deleted == ['handle-0']
+
+
+def test_still_failing_batch_stays_in_queue():
+    records = [stream_record('INSERT', 'a', sequence_number=1)]
+    client, sqs = FakeOpenSearch(fail_ids={'a'}), FakeSQS([failure(1, 1)])
+
+    ok = replay_failures.replay_failures('queue', opensearch_client=client, sqs=sqs, streams=SequenceStreams(records))
+
+    assert not ok
+    assert sqs.deleted == []
@@ -0,0 +1,8 @@
+import { NextResponse } from 'next/server';
+
+// ALB 헬스 체크용: 페이지 렌더링이나 DynamoDB/OpenSearch 호출 없이 프로세스가 요청을 받는지만 확인
+export const dynamic = 'force-dynamic';
+
+export function GET() {
+  return NextResponse.json({ status: 'ok' });
+}
@@ -13,6 +13,7 @@ import { s3Client } from '@/lib/s3';
 import { escapeRegExp, isImageFile } from '@/utils/format';
 import { FileInfo, Memo } from '@/types/memo';
 import { DYNAMODB_TABLE } from '@/lib/constants';
+import { gsiShardKey } from '@/lib/gsi';
 
 export async function PUT(request: NextRequest & { params: { id: string } }) {
   try {
@@ -114,6 +115,8 @@ export async function PUT(request: NextRequest & { params: { id: string } }) {
     existingMemo.files = updatedFiles;
     existingMemo.fileCount = updatedFiles.length;
     existingMemo.updatedAt = updatedAt;
+    // 샤딩 이전의 "ALL" 파티션에 있던 메모도 수정할 때 샤드 파티션으로 옮김
+    existingMemo.gsiPartitionKey = gsiShardKey(id);
 
     // DynamoDB에 업데이트
     await docClient.send(
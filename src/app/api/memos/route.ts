@@ -13,12 +13,8 @@ import { s3Client, generateCdnUrl } from '@/lib/s3';
 import { FileInfo, Memo } from '@/types/memo';
 import { escapeRegExp, isImageFile } from '@/utils/format';
 import { generateSummary } from '@/lib/bedrock';
-import {
-  DYNAMODB_TABLE,
-  GSI_PARTITION_KEY,
-  PRIORITY_UPDATED_INDEX,
-  UPDATED_INDEX,
-} from '@/lib/constants';
+import { DYNAMODB_TABLE, PRIORITY_UPDATED_INDEX } from '@/lib/constants';
+import { gsiShardKey, queryUpdatedIndex } from '@/lib/gsi';
 
 export async function POST(request: NextRequest) {
   try {
@@ -88,7 +84,7 @@ export async function POST(request: NextRequest) {
     // DynamoDB에 저장할 메모 데이터 생성
     const memo: Memo = {
       id, // Partition Key
-      gsiPartitionKey: 'ALL', // GSI에서 사용하는 고정 Partition Key
+      gsiPartitionKey: gsiShardKey(id), // UpdatedIndex 의 샤드 Partition Key ("ALL#<n>")
       priority, // GSI의 Partition Key
       title,
       content,
@@ -140,10 +136,6 @@ export async function GET(request: NextRequest) {
       queryParams.IndexName = PRIORITY_UPDATED_INDEX;
       queryParams.KeyConditionExpression = 'priority = :priority';
       expressionAttributeValues[':priority'] = Number(priority);
-    } else {
-      queryParams.IndexName = UPDATED_INDEX;
-      queryParams.KeyConditionExpression = 'gsiPartitionKey = :key';
-      expressionAttributeValues[':key'] = GSI_PARTITION_KEY;
     }
 
     if (prefix) {
@@ -180,6 +172,16 @@ export async function GET(request: NextRequest) {
       queryParams.ExpressionAttributeNames = expressionAttributeNames;
     }
 
+    // 우선순위가 없으면 UpdatedIndex 의 샤드 파티션들을 합쳐 읽음 (lastKey 는 샤드별 시작 위치)
+    if (!priority) {
+      const { IndexName, KeyConditionExpression, ...params } = queryParams;
+      const result = await queryUpdatedIndex(
+        params,
+        lastEvaluatedKey ? JSON.parse(lastEvaluatedKey) : {}
+      );
+      return NextResponse.json(result);
+    }
+
     if (lastEvaluatedKey) {
       queryParams.ExclusiveStartKey = JSON.parse(lastEvaluatedKey);
     }
@@ -47,7 +47,15 @@ export async function POST(req: NextRequest) {
             {
               multi_match: {
                 query: query,
-                fields: ['title^2', 'content', 'summary', 'tags'],
+                // *.autocomplete 는 edge_ngram 매핑에만 있는 접두어 필드 (다른 매핑에서는 무시됨)
+                fields: [
+                  'title^2',
+                  'content',
+                  'summary',
+                  'tags',
+                  'title.autocomplete',
+                  'tags.autocomplete',
+                ],
                 type: 'best_fields',
                 fuzziness: 'AUTO',
                 operator: 'or',
@@ -6,3 +6,14 @@ export const PRIORITY_UPDATED_INDEX = 'PriorityUpdatedIndex';
 
 // GSI Partition Key
 export const GSI_PARTITION_KEY = 'ALL';
+// 모든 쓰기가 한 파티션에 몰리지 않도록 UpdatedIndex 파티션 키를 "ALL#<n>" 으로 나눔
+// (cdk/next_memo/data_stack.py, lambda/dynamodb_to_opensearch/migration.py 와 같은 값)
+export const GSI_SHARD_COUNT = 4;
+// 목록 조회 시 합쳐 읽는 파티션 키 (샤딩 이전에 저장된 메모는 "ALL" 에 남아 있음)
+export const GSI_PARTITION_KEYS = [
+  ...Array.from(
+    { length: GSI_SHARD_COUNT },
+    (_, shard) => `${GSI_PARTITION_KEY}#${shard}`
+  ),
+  GSI_PARTITION_KEY,
+];
@@ -0,0 +1,115 @@
+// src/lib/gsi.ts
+import { QueryCommand, QueryCommandInput } from '@aws-sdk/lib-dynamodb';
+import { docClient } from '@/lib/dynamodb';
+import {
+  GSI_PARTITION_KEY,
+  GSI_PARTITION_KEYS,
+  GSI_SHARD_COUNT,
+  UPDATED_INDEX,
+} from '@/lib/constants';
+
+// 파티션 키별 다음 조회 시작 위치 (없으면 처음부터, null 이면 끝까지 읽음)
+export type ShardCursor = Record<string, Record<string, any> | null>;
+
+// 메모 id 로 UpdatedIndex 샤드 파티션 키를 정함 (같은 메모는 항상 같은 샤드)
+export function gsiShardKey(id: string): string {
+  let hash = 0;
+  for (let i = 0; i < id.length; i++) {
+    hash = (hash * 31 + id.charCodeAt(i)) | 0;
+  }
+  return `${GSI_PARTITION_KEY}#${Math.abs(hash) % GSI_SHARD_COUNT}`;
+}
+
+function indexKey(item: Record<string, any>) {
+  return {
+    id: item.id,
+    gsiPartitionKey: item.gsiPartitionKey,
+    updatedAt: item.updatedAt,
+  };
+}
+
+type UpdatedIndexParams = Omit<
+  QueryCommandInput,
+  'IndexName' | 'KeyConditionExpression'
+>;
+
+function isExhausted(cursor: ShardCursor) {
+  return GSI_PARTITION_KEYS.every((key) => cursor[key] === null);
+}
+
+// UpdatedIndex 의 모든 샤드 파티션을 동시에 조회해 updatedAt 내림차순으로 합침
+export async function queryUpdatedIndex(
+  params: UpdatedIndexParams,
+  cursor: ShardCursor = {}
+) {
+  // 프런티어와 FilterExpression 때문에 한 번의 조회에서 확정된 아이템이 없을 수 있으므로
+  // (빈 items 와 lastEvaluatedKey 를 함께 돌려주면 무한 스크롤이 멈춤) 아이템을 모으거나 모든 샤드를 다 읽을 때까지 이어서 조회.
+  // 빈 조회에서도 가장 앞선 샤드의 위치는 항상 전진한다.
+  let current = cursor;
+  while (true) {
+    const { items, nextCursor } = await readShards(params, current);
+    const done = isExhausted(nextCursor);
+    if (items.length > 0 || done) {
+      return { items, lastEvaluatedKey: done ? null : nextCursor };
+    }
+    current = nextCursor;
+  }
+}
+
+// 샤드마다 한 페이지씩 읽어 순서가 확정된 아이템과 다음 샤드별 시작 위치를 반환
+async function readShards(params: UpdatedIndexParams, cursor: ShardCursor) {
+  const limit = params.Limit || 10;
+  const pages = await Promise.all(
+    GSI_PARTITION_KEYS.filter((key) => cursor[key] !== null).map(
+      async (key) => {
+        const result = await docClient.send(
+          new QueryCommand({
+            ...params,
+            IndexName: UPDATED_INDEX,
+            KeyConditionExpression: 'gsiPartitionKey = :key',
+            ExpressionAttributeValues: {
+              ...params.ExpressionAttributeValues,
+              ':key': key,
+            },
+            ExclusiveStartKey: cursor[key] || undefined,
+          })
+        );
+        return {
+          key,
+          items: result.Items || [],
+          lastKey: result.LastEvaluatedKey,
+        };
+      }
+    )
+  );
+
+  // 아직 남은 아이템이 있는 샤드가 마지막으로 읽은 시각보다 최신인 아이템만 순서가 확정됨
+  const frontier = Math.max(
+    -Infinity,
+    ...pages
+      .filter((page) => page.lastKey)
+      .map((page) => Number(page.lastKey!.updatedAt))
+  );
+  const merged = pages
+    .flatMap((page) => page.items.map((item) => ({ key: page.key, item })))
+    .filter(({ item }) => item.updatedAt >= frontier)
+    .sort((a, b) => b.item.updatedAt - a.item.updatedAt)
+    .slice(0, limit);
+
+  const nextCursor: ShardCursor = { ...cursor };
+  for (const page of pages) {
+    const taken = merged
+      .filter((entry) => entry.key === page.key)
+      .map((entry) => entry.item);
+    if (taken.length < page.items.length) {
+      // 돌려주지 못한 아이템은 다음 페이지에서 다시 읽음
+      if (taken.length > 0) {
+        nextCursor[page.key] = indexKey(taken[taken.length - 1]);
+      }
+    } else {
+      nextCursor[page.key] = page.lastKey || null;
+    }
+  }
+
+  return { items: merged.map((entry) => entry.item), nextCursor };
+}
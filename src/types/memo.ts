@@ -6,7 +6,7 @@ export interface FileInfo {
 
 export interface Memo {
   id: string; // DynamoDB에서 사용하는 Partition Key (필수)
-  gsiPartitionKey?: string; // 고정 값 "ALL", 클라이언트에서 처리 필요 없음
+  gsiPartitionKey?: string; // UpdatedIndex 샤드 키 "ALL#<n>" (gsiShardKey), 클라이언트에서 처리 필요 없음
 
   prefix?: string;
   title?: string;